@@ -0,0 +1,71 @@
+"""Throughput of receive_inbound in a loop vs receive_inbound_batch for webhook bursts.
+
+Run from the repository root: ``python -m benchmarks.bench_batch [burst_size] [bursts]``.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.models import Contact, InboundMessage
+from whatsapp_bot.sqlite_store import SqliteStore
+from whatsapp_bot.store import InMemoryStore, Store
+
+FUNNEL = ("ok", "ja", "150")
+
+
+def bursts(burst_size: int, count: int) -> list[list[InboundMessage]]:
+    base = datetime(2026, 1, 1, 10, 0, 0)
+    out: list[list[InboundMessage]] = []
+    for b in range(count):
+        burst = []
+        for i in range(burst_size):
+            # Spread each burst over burst_size // 3 conversations walking the funnel.
+            conv = b * burst_size + i // 3
+            burst.append(
+                InboundMessage(f"m{b}-{i}", f"c{conv}", f"u{conv}", FUNNEL[i % 3], base + timedelta(seconds=i))
+            )
+        out.append(burst)
+    return out
+
+
+def make_app(store_factory: Callable[[], Store], data: list[list[InboundMessage]]) -> WhatsAppBotApp:
+    app = WhatsAppBotApp(store=store_factory())
+    for contact_id in {m.contact_id for burst in data for m in burst}:
+        app.register_contact(Contact(contact_id=contact_id, whatsapp_e164="+491234", first_name="Max"))
+    return app
+
+
+def loop(app: WhatsAppBotApp, burst: list[InboundMessage]) -> None:
+    for m in burst:
+        app.receive_inbound(m.provider_message_id, m.conversation_id, m.contact_id, m.content, m.received_at)
+
+
+def batch(app: WhatsAppBotApp, burst: list[InboundMessage]) -> None:
+    app.receive_inbound_batch(burst)
+
+
+def measure(name: str, store_factory: Callable[[], Store], mode: Callable, data: list[list[InboundMessage]]) -> None:
+    app = make_app(store_factory, data)
+    started = time.perf_counter()
+    for burst in data:
+        mode(app, burst)
+    elapsed = time.perf_counter() - started
+    total = sum(len(b) for b in data)
+    print(f"{name:<22} {total / elapsed:10.0f} msg/s")
+
+
+def main() -> None:
+    burst_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    data = bursts(burst_size, count)
+    for store_name, factory in (("memory", InMemoryStore), ("sqlite", SqliteStore)):
+        measure(f"{store_name} loop", factory, loop, data)
+        measure(f"{store_name} batch", factory, batch, data)
+
+
+if __name__ == "__main__":
+    main()
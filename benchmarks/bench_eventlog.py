@@ -0,0 +1,57 @@
+"""Restart time of DurableStore from a snapshot plus log tail, and inbound cost of logging.
+
+Run from the repository root: ``python -m benchmarks.bench_eventlog [conversations]``.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.eventlog import LOG_FILE, SNAPSHOT_FILE, DurableStore
+from whatsapp_bot.models import Contact
+from whatsapp_bot.store import InMemoryStore, Store
+
+FUNNEL = ("ok", "ja")
+
+
+def fill(store: Store, conversations: int, start: int = 0) -> float:
+    app = WhatsAppBotApp(store=store)
+    base = datetime(2026, 1, 1, 10, 0, 0)
+    started = time.perf_counter()
+    for i in range(start, start + conversations):
+        app.register_contact(Contact(contact_id=f"u{i}", whatsapp_e164=f"+4915{i:08d}", first_name="Max"))
+    for step, text in enumerate(FUNNEL):
+        at = base + timedelta(minutes=step)
+        for i in range(start, start + conversations):
+            app.receive_inbound(f"m{i}-{step}", f"c{i}", f"u{i}", text, at)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    conversations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    tail = max(1, conversations // 100)
+    inbounds = conversations * len(FUNNEL)
+    elapsed = fill(InMemoryStore(), conversations)
+    print(f"in-memory      {inbounds / elapsed:10.0f} inbound/s")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DurableStore(tmp)
+        elapsed = fill(store, conversations)
+        print(f"durable        {inbounds / elapsed:10.0f} inbound/s")
+        started = time.perf_counter()
+        store.snapshot()
+        print(f"snapshot       {time.perf_counter() - started:10.2f} s  {os.path.getsize(os.path.join(tmp, SNAPSHOT_FILE)) / 2**20:.1f} MiB")
+        fill(store, tail, start=conversations)
+        store.close()
+        print(f"log tail       {os.path.getsize(os.path.join(tmp, LOG_FILE)) / 2**20:10.1f} MiB ({tail} conversations)")
+        started = time.perf_counter()
+        restored = DurableStore(tmp)
+        print(f"restart        {time.perf_counter() - started:10.2f} s  {len(restored.conversations)} conversations")
+        restored.close()
+
+
+if __name__ == "__main__":
+    main()
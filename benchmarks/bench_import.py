@@ -0,0 +1,57 @@
+"""Contact onboarding throughput: one ``register_contact`` per row vs ``import_contacts``.
+
+Run from the repository root: ``python -m benchmarks.bench_import [contacts]``.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from typing import Iterator
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.importer import contact_from_record, read_csv
+from whatsapp_bot.sqlite_store import SqliteStore
+from whatsapp_bot.store import InMemoryStore, Store
+
+
+def csv_lines(contacts: int) -> Iterator[str]:
+    yield "contact_id,whatsapp_e164,first_name,timezone,consent_granted\n"
+    for i in range(contacts):
+        yield f"u{i},+49 15{i:09d},Max,Europe/Berlin,true\n"
+
+
+def per_row(store: Store, contacts: int) -> float:
+    app = WhatsAppBotApp(store=store)
+    started = time.perf_counter()
+    for record in read_csv(csv_lines(contacts)):
+        app.register_contact(contact_from_record(record))
+    return time.perf_counter() - started
+
+
+def bulk(store: Store, contacts: int) -> float:
+    app = WhatsAppBotApp(store=store)
+    started = time.perf_counter()
+    app.import_contacts(read_csv(csv_lines(contacts)))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    contacts = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make in (
+            ("in-memory", InMemoryStore),
+            ("sqlite file/WAL", lambda: SqliteStore(os.path.join(tmp, f"bench-{time.monotonic_ns()}.db"))),
+        ):
+            for mode, fn in (("per-row", per_row), ("bulk", bulk)):
+                store = make()
+                elapsed = fn(store, contacts)
+                close = getattr(store, "close", None)
+                if close:
+                    close()
+                print(f"{name:<16} {mode:<8} {contacts / elapsed:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Bytes per conversation and per scheduled task: legacy dict-backed dataclasses vs current models.
+
+Field values are decoded from JSON, as they would be when loaded from a store,
+so the legacy models hold fresh strings per row while the current ones intern.
+Run from the repository root: ``python -m benchmarks.bench_models_memory [count]``.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from whatsapp_bot.models import (
+    EMPTY_PAYLOAD,
+    AdsRunning,
+    Conversation,
+    ConversationState,
+    ConversationStatus,
+    LeadsBucket,
+    Owner,
+    ScheduledTask,
+    TaskType,
+)
+
+
+@dataclass
+class LegacyConversation:
+    conversation_id: str
+    contact_id: str
+    state: str = "awaiting_consent_ack"
+    status: str = "open"
+    service_window_expires_at: datetime | None = None
+    owner: str = "bot"
+    ads_running: str = "unknown"
+    monthly_leads_bucket: str = "unknown"
+
+
+@dataclass
+class LegacyScheduledTask:
+    conversation_id: str
+    task_type: str
+    run_at: datetime
+    payload: dict = field(default_factory=dict)
+
+
+ROW = json.dumps(["closed", "qualified", "bot", "yes", "100-300"])
+TASK_TYPES = json.dumps(["nudge_30m", "followup_24h", "followup_48h", "reminder_22h", "reminder_55m", "reminder_5m"])
+
+
+def legacy(count: int, run_at: datetime) -> tuple[list, list]:
+    conversations, tasks = [], []
+    for i in range(count):
+        state, status, owner, ads, bucket = json.loads(ROW)
+        cid = f"c{i}"
+        conversations.append(LegacyConversation(cid, f"u{i}", state, status, run_at, owner, ads, bucket))
+        for task_type in json.loads(TASK_TYPES):
+            tasks.append(LegacyScheduledTask(cid, task_type, run_at))
+    return conversations, tasks
+
+
+def current(count: int, run_at: datetime) -> tuple[list, list]:
+    conversations, tasks = [], []
+    for i in range(count):
+        state, status, owner, ads, bucket = json.loads(ROW)
+        cid = f"c{i}"
+        conversations.append(
+            Conversation(
+                cid,
+                f"u{i}",
+                ConversationState(state),
+                ConversationStatus(status),
+                run_at,
+                Owner(owner),
+                AdsRunning(ads),
+                LeadsBucket(bucket),
+            )
+        )
+        for task_type in json.loads(TASK_TYPES):
+            tasks.append(ScheduledTask(cid, TaskType(task_type), run_at, EMPTY_PAYLOAD))
+    return conversations, tasks
+
+
+def measure(build, count: int) -> int:
+    run_at = datetime(2026, 1, 1) + timedelta(days=1)
+    tracemalloc.start()
+    data = build(count, run_at)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return size
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    for name, build in (("legacy", legacy), ("current", current)):
+        total = measure(build, count)
+        # Split: a conversation row plus its six tasks; tasks measured alone below.
+        task_only = measure(lambda n, at, b=build: b(n, at)[1], count)
+        print(
+            f"{name:<8} bytes/conversation+6 tasks={total / count:7.0f}  "
+            f"bytes/conversation={(total - task_only) / count:6.0f}  bytes/task={task_only / (6 * count):6.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Dispatcher overhead and achieved send rate for a follow-up wave against FakeTransport.
+
+Runs on a virtual clock, so the achieved rate is what the rate limits allow, and
+the CPU figure is the dispatcher's own cost per message.
+Run from the repository root: ``python -m benchmarks.bench_outbound [messages] [sender_rate]``.
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from whatsapp_bot.models import OutboundMessage
+from whatsapp_bot.outbound import FakeTransport, OutboundDispatcher
+
+
+class VirtualClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def main() -> None:
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sender_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 1000.0
+    clock = VirtualClock()
+    transport = FakeTransport()
+    dispatcher = OutboundDispatcher(transport, sender_rate=sender_rate, clock=clock)
+    recipients = max(1, messages // 2)
+    for i in range(messages):
+        contact = f"u{i % recipients}"
+        dispatcher.enqueue(OutboundMessage(f"c{contact}", contact, "Kurzer Reminder", "template", "lead_nudge_v1"))
+
+    started = time.perf_counter()
+    while len(dispatcher):
+        if not dispatcher.pump():
+            clock.now += dispatcher.next_wakeup() or 0.001
+    cpu = time.perf_counter() - started
+    print(f"messages={messages} virtual_seconds={clock.now:.1f} achieved_rate={messages / max(clock.now, 1e-9):.0f}/s")
+    print(f"dispatcher_cpu={cpu:.2f}s ({cpu / messages * 1e6:.1f}us/msg) transport_calls={transport.calls}")
+    print(f"throttled={dispatcher.stats.throttled}")
+
+
+if __name__ == "__main__":
+    main()
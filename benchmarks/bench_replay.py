@@ -0,0 +1,63 @@
+"""Replay speed: weeks of synthetic webhook traffic through ``whatsapp_bot.replay``.
+
+Writes the harness's seeded traffic, spread over ``--days``, as a JSONL
+recording, then replays it from the file and prints the replay stats.
+``speedup`` is recorded seconds replayed per wall-clock second. Agent
+replies are left out because they are not webhooks.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_replay --contacts 20000 --days 14
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from benchmarks.harness import INBOUND, REVOKE, generate_traffic
+from whatsapp_bot.importer import read_jsonl
+from whatsapp_bot.replay import Replay
+
+
+def write_recording(path: str, contacts: int, days: int, seed: int) -> int:
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for event in generate_traffic(contacts, seed, spread=timedelta(days=days)):
+            at = event.at.isoformat() + "Z"
+            if event.kind == INBOUND:
+                record = {
+                    "providerMessageId": event.message_id,
+                    "conversationId": event.conversation_id,
+                    "contactId": event.contact_id,
+                    "content": event.text,
+                    "receivedAt": at,
+                }
+            elif event.kind == REVOKE:
+                record = {"type": "revoke", "contactId": event.contact_id, "at": at}
+            else:
+                continue
+            f.write(json.dumps(record) + "\n")
+            written += 1
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contacts", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "events.jsonl")
+        write_recording(path, args.contacts, args.days, args.seed)
+        with open(path, encoding="utf-8") as f:
+            stats = Replay().run(read_jsonl(f))
+    print(json.dumps(stats.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
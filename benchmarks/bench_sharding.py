@@ -0,0 +1,54 @@
+"""Throughput scaling of ShardedSupervisor with the number of worker processes.
+
+Run from the repository root: ``python -m benchmarks.bench_sharding [conversations] [max_shards]``.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from whatsapp_bot.models import Contact, InboundMessage
+from whatsapp_bot.sharding import ShardedSupervisor
+
+FUNNEL = ("ok", "ja", "150")
+BURST = 1000
+
+
+def workload(conversations: int) -> list[list[InboundMessage]]:
+    base = datetime(2026, 1, 1, 10, 0, 0)
+    messages = [
+        InboundMessage(f"m{i}-{step}", f"c{i}", f"u{i}", text, base + timedelta(minutes=step))
+        for step, text in enumerate(FUNNEL)
+        for i in range(conversations)
+    ]
+    return [messages[i : i + BURST] for i in range(0, len(messages), BURST)]
+
+
+def measure(shards: int, conversations: int, bursts: list[list[InboundMessage]]) -> float:
+    with ShardedSupervisor(shards=shards) as supervisor:
+        for i in range(conversations):
+            supervisor.register_contact(Contact(contact_id=f"u{i}", whatsapp_e164="+491234", first_name="Max"))
+        started = time.perf_counter()
+        for burst in bursts:
+            supervisor.receive_inbound_batch(burst)
+        elapsed = time.perf_counter() - started
+    return sum(len(b) for b in bursts) / elapsed
+
+
+def main() -> None:
+    conversations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    max_shards = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    bursts = workload(conversations)
+    single = None
+    shards = 1
+    while shards <= max_shards:
+        rate = measure(shards, conversations, bursts)
+        single = single or rate
+        print(f"shards={shards:<3} {rate:10.0f} msg/s  speedup={rate / single:5.2f}x")
+        shards *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Per-inbound latency of WhatsAppBotApp on InMemoryStore vs SqliteStore.
+
+Run from the repository root: ``python -m benchmarks.bench_store [conversations]``.
+"""
+from __future__ import annotations
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.models import Contact
+from whatsapp_bot.sqlite_store import SqliteStore
+from whatsapp_bot.store import InMemoryStore, Store
+
+FUNNEL = ("ok", "ja", "150")
+
+
+def run(store: Store, conversations: int) -> list[float]:
+    app = WhatsAppBotApp(store=store)
+    base = datetime(2026, 1, 1, 10, 0, 0)
+    for i in range(conversations):
+        app.register_contact(Contact(contact_id=f"u{i}", whatsapp_e164=f"+4915{i:08d}", first_name="Max"))
+    samples: list[float] = []
+    for step, text in enumerate(FUNNEL):
+        at = base + timedelta(minutes=step)
+        for i in range(conversations):
+            started = time.perf_counter()
+            app.receive_inbound(f"m{i}-{step}", f"c{i}", f"u{i}", text, at)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def report(name: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2] * 1e6
+    p99 = ordered[int(len(ordered) * 0.99)] * 1e6
+    print(f"{name:<16} n={len(samples):<7} mean={statistics.fmean(samples) * 1e6:8.1f}us p50={p50:8.1f}us p99={p99:8.1f}us")
+
+
+def main() -> None:
+    conversations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    report("in-memory", run(InMemoryStore(), conversations))
+    report("sqlite :memory:", run(SqliteStore(), conversations))
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SqliteStore(os.path.join(tmp, "bench.db"))
+        report("sqlite file/WAL", run(store, conversations))
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Resident memory over a growing lead history: InMemoryStore vs TieredStore.
+
+Every simulated day ``per_day`` new contacts run through the qualification
+funnel and the scheduler ticks hourly, so reminders fire and closed
+conversations settle. Reports resident conversations, messages and traced
+heap bytes at the end, plus the cost of rehydrating one old conversation.
+Run from the repository root: ``python -m benchmarks.bench_tiered [days] [per_day]``.
+"""
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.models import Contact
+from whatsapp_bot.store import InMemoryStore
+from whatsapp_bot.tiered import TieredStore
+
+START = datetime(2026, 1, 5, 9, 0)
+FUNNEL = ("ok", "ja", "150")
+
+
+def simulate(store: InMemoryStore, days: int, per_day: int) -> WhatsAppBotApp:
+    app = WhatsAppBotApp(store=store)
+    for day in range(days):
+        morning = START + timedelta(days=day)
+        for n in range(per_day):
+            i = day * per_day + n
+            app.register_contact(Contact(f"u{i}", f"+4915{i:08d}", "Max"))
+            for step, text in enumerate(FUNNEL):
+                app.receive_inbound(f"m{i}-{step}", f"c{i}", f"u{i}", text, morning + timedelta(minutes=step))
+        for hour in range(24):
+            app.run_scheduler(morning + timedelta(hours=hour))
+    return app
+
+
+def measure(name: str, store: InMemoryStore, days: int, per_day: int) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    simulate(store, days, per_day)
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    sizes = store.sizes()
+    started = time.perf_counter()
+    store.last_messages("c0", 10)
+    rehydrate_ms = (time.perf_counter() - started) * 1e3
+    print(
+        f"{name:<10} resident conversations={sizes['conversations']:7d}  messages={sizes['messages']:7d}  "
+        f"cold={sizes.get('cold_conversations', 0):7d}  heap={size / 2**20:7.1f} MiB  "
+        f"run={elapsed:6.2f}s  first read of c0={rehydrate_ms:6.2f} ms"
+    )
+
+
+def main() -> None:
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    measure("in-memory", InMemoryStore(), days, per_day)
+    tiered = TieredStore()
+    try:
+        measure("tiered", tiered, days, per_day)
+    finally:
+        tiered.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Local HTTP load test for ``whatsapp_bot.server``: requests/s and tail latency.
+
+Starts a ``BotServer`` on an ephemeral port (or targets ``--url``), registers
+the contacts, then has ``--clients`` threads drive the inbound webhook over
+keep-alive connections: each client walks its own conversations through the
+qualification funnel. Client threads share the interpreter with an in-process
+server, so numbers against ``--url`` with the server in its own process are
+the ones to compare across machines.
+
+Run from the repository root::
+
+    python -m benchmarks.http_load --clients 8 --contacts 2000
+    python -m benchmarks.http_load --url http://127.0.0.1:3000
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from whatsapp_bot.server import BotServer
+
+FUNNEL = ("ok", "ja", "150")
+
+
+def _post(conn: http.client.HTTPConnection, path: str, body: dict) -> int:
+    conn.request("POST", path, body=json.dumps(body), headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def client(host: str, port: int, contacts: range, samples: list[float], errors: list[int]) -> None:
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    clock = time.perf_counter
+    for step, text in enumerate(FUNNEL):
+        for i in contacts:
+            body = {"providerMessageId": f"m{i}-{step}", "conversationId": f"c{i}", "contactId": f"u{i}", "content": text}
+            started = clock()
+            status = _post(conn, "/webhooks/whatsapp/inbound", body)
+            samples.append(clock() - started)
+            if status != 200:
+                errors.append(status)
+    conn.close()
+
+
+def run(host: str, port: int, clients: int, contacts: int) -> dict:
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    for i in range(contacts):
+        _post(conn, "/contacts", {"contactId": f"u{i}", "whatsappE164": f"+4915{i:08d}", "firstName": "Max"})
+    conn.close()
+
+    per_client: list[list[float]] = [[] for _ in range(clients)]
+    errors: list[int] = []
+    threads = [
+        threading.Thread(target=client, args=(host, port, range(n, contacts, clients), per_client[n], errors))
+        for n in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = sorted(s for client_samples in per_client for s in client_samples)
+    return {
+        "clients": clients,
+        "requests": len(samples),
+        "errors": len(errors),
+        "requests_per_s": round(len(samples) / elapsed, 1),
+        "p50_ms": round(samples[len(samples) // 2] * 1e3, 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e3, 3),
+        "max_ms": round(samples[-1] * 1e3, 3),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="running server to target; default starts one in-process")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--contacts", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        server = BotServer(("127.0.0.1", 0), scheduler_interval=None)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+    try:
+        print(json.dumps(run(host, port, args.clients, args.contacts), indent=2))
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
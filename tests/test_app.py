@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta
+import threading
 import unittest
+from unittest import mock
 
+from whatsapp_bot import app as app_module
 from whatsapp_bot.app import WhatsAppBotApp
-from whatsapp_bot.models import Contact
+from whatsapp_bot.models import Contact, InboundMessage
+from whatsapp_bot.templates import COMPILED_TEMPLATES, TemplateDefinition, compile_template
 
 
 class AppTests(unittest.TestCase):
@@ -41,6 +45,74 @@ class AppTests(unittest.TestCase):
         sent = self.app.run_scheduler(base + timedelta(days=2))
         self.assertEqual([], sent)
 
+    def test_task_stats_count_popped_and_executed_separately(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        self.assertEqual(2, len(self.app.run_scheduler(base + timedelta(hours=24, minutes=1))))
+        # Consent withdrawn outside revoke_consent: the last follow-up is popped but never sent.
+        self.app.store.upsert_contact(Contact("u1", "+491234", "Max", consent_granted=False))
+        self.assertEqual([], self.app.run_scheduler(base + timedelta(days=3)))
+        stats = self.app.store.task_stats
+        self.assertEqual((3, 2), (stats.popped, stats.executed))
+
+    def test_scheduler_renders_batch_once_per_template(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        for i in range(3):
+            self.app.register_contact(Contact(f"v{i}", "+491234", f"Name{i}"))
+            self.app.receive_inbound(f"n{i}", f"d{i}", f"v{i}", "ok", base)
+        with mock.patch.object(app_module, "render_many", wraps=app_module.render_many) as render_many:
+            sent = self.app.run_scheduler(base + timedelta(hours=24, minutes=1))
+        self.assertEqual(6, len(sent))
+        self.assertEqual(2, render_many.call_count)
+        greetings = {m.content.split(",")[0] for m in sent if m.template_name == "lead_followup_24h_v1"}
+        self.assertEqual({f"Hi Name{i}" for i in range(3)}, greetings)
+
+    def test_unknown_task_placeholder_fails_instead_of_rendering_blank(self) -> None:
+        typo = TemplateDefinition("lead_nudge_v1", "Hallo {frist_name}")
+        with mock.patch.dict(COMPILED_TEMPLATES, {"lead_nudge_v1": compile_template(typo)}):
+            with self.assertRaisesRegex(ValueError, "frist_name"):
+                app_module._check_task_templates()
+            base = datetime(2026, 1, 1, 10, 0, 0)
+            self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+            with self.assertRaisesRegex(ValueError, "Missing variables"):
+                self.app.run_scheduler(base + timedelta(minutes=31))
+
+    def test_revoke_consent_cancels_pending_tasks(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        self.app.revoke_consent("u1")
+        self.assertEqual(0, len(self.app.store.tasks))
+        self.assertEqual(3, self.app.store.task_stats.cancelled)
+
+    def test_closing_conversation_drops_followups_but_keeps_reminders(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        self.app.receive_inbound("m2", "c1", "u1", "ja", base)
+        self.app.receive_inbound("m3", "c1", "u1", "150", base)
+        pending = sorted(t.task_type for t in self.app.store.tasks)
+        self.assertEqual(["reminder_22h", "reminder_55m", "reminder_5m"], pending)
+        self.app.receive_inbound("m4", "c1", "u1", "danke", base)
+        self.assertEqual(3, len(self.app.store.tasks))
+        self.assertEqual(3, self.app.store.task_stats.cancelled)
+
+    def test_handover_in_batch_drops_followups_from_same_batch(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound_batch(
+            [InboundMessage("m1", "c1", "u1", "ok", base), InboundMessage("m2", "c1", "u1", "Mitarbeiter", base)]
+        )
+        self.assertEqual(0, len(self.app.store.tasks))
+
+    def test_conversation_history_pages_backwards(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        for i, text in enumerate(("ok", "vielleicht", "ja")):
+            self.app.receive_inbound(f"m{i}", "c1", "u1", text, base + timedelta(minutes=i))
+        page, cursor = self.app.store.conversation_history("c1", limit=4)
+        self.assertEqual(["vielleicht", "ja"], [m.content for m in page[::2]])
+        older, cursor = self.app.store.conversation_history("c1", cursor=cursor, limit=4)
+        self.assertEqual(["ok", "Top. Schaltest du aktuell Ads? (Ja/Nein)"], [m.content for m in older])
+        self.assertIsNone(cursor)
+        self.assertEqual("ja", self.app.store.last_inbound("u1").content)
+
     def test_manual_message_blocked_when_consent_revoked(self) -> None:
         base = datetime(2026, 1, 1, 10, 0, 0)
         self.app.receive_inbound("m1", "c1", "u1", "ok", base)
@@ -54,6 +126,52 @@ class AppTests(unittest.TestCase):
                 now=base + timedelta(hours=1),
             )
 
+    def test_receive_inbound_batch_keeps_per_conversation_order(self) -> None:
+        self.app.register_contact(Contact(contact_id="u2", whatsapp_e164="+495678", first_name="Eva"))
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        batch = [
+            InboundMessage("m1", "c1", "u1", "ok", base),
+            InboundMessage("m2", "c2", "u2", "ok", base),
+            InboundMessage("m3", "c1", "u1", "ja", base),
+            InboundMessage("m1", "c1", "u1", "ok", base),
+            InboundMessage("m4", "c2", "u2", "nein", base),
+        ]
+        results = self.app.receive_inbound_batch(batch)
+        self.assertEqual([1, 1, 1, 0, 1], [len(out) for out in results])
+        self.assertIn("Leads", results[2][0].content)
+        self.assertEqual("awaiting_leads", self.app.store.conversations["c1"].state)
+        self.assertEqual("disqualified", self.app.store.conversations["c2"].status)
+        self.assertEqual(3, len(self.app.store.tasks))
+
+    def test_receive_inbound_batch_rejects_unknown_contact(self) -> None:
+        batch = [InboundMessage("m1", "c1", "u9", "ok", datetime(2026, 1, 1, 10, 0, 0))]
+        with self.assertRaisesRegex(ValueError, "Unknown contact u9"):
+            self.app.receive_inbound_batch(batch)
+
+    def test_leased_scheduler_needs_leasing_store(self) -> None:
+        with self.assertRaises(TypeError):
+            self.app.run_scheduler_leased("w1", datetime(2026, 1, 1, 10, 0, 0))
+
+    def test_scheduler_loop_survives_failing_tick(self) -> None:
+        now = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", now - timedelta(minutes=31))
+        stop = threading.Event()
+        run_scheduler = self.app.run_scheduler
+        calls = []
+
+        def flaky(at: datetime) -> list:
+            calls.append(at)
+            if len(calls) == 1:
+                raise RuntimeError("store unavailable")
+            stop.set()
+            return run_scheduler(at)
+
+        with mock.patch.object(self.app, "run_scheduler", side_effect=flaky):
+            with self.assertLogs("whatsapp_bot.app", "ERROR"):
+                self.app.run_scheduler_loop(stop, max_idle=0.01, clock=lambda: now)
+        self.assertEqual(2, len(calls))
+        self.assertEqual(1, self.app.store.task_stats.executed)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+import os
+import tempfile
+import unittest
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.audit import AuditLog, to_micros
+from whatsapp_bot.eventlog import AUDIT_DIR, DurableStore
+from whatsapp_bot.models import Contact
+from whatsapp_bot.sqlite_store import SqliteStore
+
+START = datetime(2026, 1, 1, 10, 0, 0)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = to_micros(START) / 1e6
+
+    def __call__(self) -> float:
+        self.now += 60
+        return self.now
+
+
+class AuditLogTests(unittest.TestCase):
+    def fill(self, log: AuditLog, n: int = 10) -> None:
+        for i in range(n):
+            log.append("consent_granted" if i % 2 else "policy_blocked_send", f"u{i % 3}", {"i": i} if i % 4 == 0 else None)
+
+    def test_sequence_spans_sealed_and_hot_segments(self) -> None:
+        log = AuditLog(segment_size=4, clock=FakeClock())
+        self.fill(log)
+        self.assertEqual(2, len(log.segments))
+        self.assertEqual(10, len(log))
+        self.assertEqual({"i": 4}, log[4]["details"])
+        self.assertEqual({}, log[5]["details"])
+        self.assertEqual("2026-01-01T10:10:00", log[-1]["created_at"])
+        self.assertEqual([e["details"].get("i") for e in log][:5], [0, None, None, None, 4])
+        self.assertEqual([4, "policy_blocked_send", "u1", {"i": 4}, to_micros(START) + 5 * 60_000_000], log.row(4))
+
+    def test_time_range_and_contact_queries(self) -> None:
+        log = AuditLog(segment_size=4, clock=FakeClock())
+        self.fill(log)
+        window = log.query(START + timedelta(minutes=3), START + timedelta(minutes=6))
+        self.assertEqual(["2026-01-01T10:03:00", "2026-01-01T10:04:00", "2026-01-01T10:05:00"], [e["created_at"] for e in window])
+        self.assertEqual(["10:02:00", "10:05:00", "10:08:00"], [e["created_at"][11:] for e in log.query(contact_id="u1")])
+        self.assertEqual([], list(log.query(contact_id="missing")))
+
+    def test_sealed_segments_reopen_from_disk(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            log = AuditLog(directory, segment_size=4, clock=FakeClock())
+            self.fill(log)
+            reopened = AuditLog(directory, segment_size=4)
+            self.assertEqual(8, len(reopened))
+            self.assertEqual([8, 9], [row[0] for row in log.hot_rows()])
+            for row in log.hot_rows():
+                reopened.restore(row)
+            reopened.restore(log.row(3))
+            self.assertEqual(list(log), list(reopened))
+            for segment in reopened.segments:
+                self.assertTrue(all(segment.may_contain(f"u{i}") for i in range(3)))
+                segment.path = os.path.join(directory, "gone")
+            # The filters rule the contact out without reading a segment file.
+            self.assertEqual([], list(reopened.query(contact_id="missing")))
+
+    def test_contact_filter_false_positive_is_confirmed_against_contacts(self) -> None:
+        log = AuditLog(segment_size=4, clock=FakeClock())
+        self.fill(log)
+        for segment in log.segments:
+            segment.bloom = b"\xff" * len(segment.bloom)
+        self.assertTrue(log.segments[0].may_contain("missing"))
+        self.assertEqual([], list(log.query(contact_id="missing")))
+        self.assertEqual(3, len(list(log.query(contact_id="u1"))))
+
+
+class StoreAuditTests(unittest.TestCase):
+    def test_durable_store_keeps_audit_across_restart_without_duplicates(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            store = DurableStore(directory, flush_interval=0, audit_segment_size=3)
+            app = WhatsAppBotApp(store=store)
+            for i in range(5):
+                app.register_contact(Contact(f"u{i}", f"+4912345{i}", "Max"))
+            store.snapshot()
+            app.revoke_consent("u1")
+            app.revoke_consent("u2")
+            store.close()
+
+            reopened = DurableStore(directory, flush_interval=0, audit_segment_size=3)
+            self.assertTrue(os.listdir(os.path.join(directory, AUDIT_DIR)))
+            self.assertEqual(list(store.audit_events), list(reopened.audit_events))
+            self.assertEqual(["consent_granted", "consent_revoked"], [e["event_type"] for e in reopened.query_audit(contact_id="u1")])
+            reopened.close()
+
+    def test_sqlite_query_audit(self) -> None:
+        store = SqliteStore()
+        store.record_audits([("consent_granted", "u1", None), ("consent_granted", "u2", {"source": "import"})])
+        now = datetime.utcnow()
+        self.assertEqual([{"source": "import"}], [e["details"] for e in store.query_audit(contact_id="u2")])
+        self.assertEqual(2, len(list(store.query_audit(now - timedelta(minutes=1), now + timedelta(minutes=1)))))
+        self.assertEqual([], list(store.query_audit(end=now - timedelta(minutes=1))))
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from whatsapp_bot.dedupe import BloomDedupeFilter, TTLDedupeCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TTLDedupeCacheTests(unittest.TestCase):
+    def test_hit_miss_and_ttl_expiry(self) -> None:
+        clock = FakeClock()
+        cache = TTLDedupeCache(ttl_seconds=10, clock=clock)
+        self.assertFalse(cache.check_and_add("m1"))
+        self.assertTrue(cache.check_and_add("m1"))
+        clock.now = 25
+        self.assertFalse(cache.check_and_add("m1"))
+        self.assertEqual((1, 2, 1), (cache.stats.hits, cache.stats.misses, cache.stats.evictions))
+
+    def test_size_is_bounded(self) -> None:
+        cache = TTLDedupeCache(max_entries=3, clock=FakeClock())
+        for i in range(10):
+            cache.check_and_add(f"m{i}")
+        self.assertEqual(3, len(cache))
+        self.assertEqual(7, cache.stats.evictions)
+        self.assertIn("m9", cache)
+        self.assertNotIn("m0", cache)
+
+
+class BloomDedupeFilterTests(unittest.TestCase):
+    def test_remembers_keys_for_one_generation(self) -> None:
+        clock = FakeClock()
+        bloom = BloomDedupeFilter(capacity=1000, false_positive_rate=1e-4, ttl_seconds=10, clock=clock)
+        self.assertFalse(bloom.check_and_add("m1"))
+        clock.now = 15
+        self.assertTrue(bloom.check_and_add("m1"))
+        clock.now = 50
+        self.assertFalse(bloom.check_and_add("m1"))
+
+    def test_false_positive_rate_is_close_to_target(self) -> None:
+        bloom = BloomDedupeFilter(capacity=2000, false_positive_rate=0.01, clock=FakeClock())
+        for i in range(1000):
+            bloom.check_and_add(f"seen-{i}")
+        false_hits = sum(bloom.check_and_add(f"new-{i}") for i in range(1000))
+        self.assertLess(false_hits, 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
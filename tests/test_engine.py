@@ -1,7 +1,7 @@
 from datetime import datetime
 import unittest
 
-from whatsapp_bot.engine import BotEngine
+from whatsapp_bot.engine import CLASSIFIERS, BotEngine, Transition, compile_transitions
 from whatsapp_bot.models import Conversation, InboundMessage
 
 
@@ -48,6 +48,49 @@ class BotEngineTests(unittest.TestCase):
         self.assertEqual("human", self.conv.owner)
         self.assertIn("weiter", out[0].content)
 
+    def test_unclear_answer_repeats_question(self) -> None:
+        self.engine.process_inbound(self.conv, self.inbound("m1", "ok"))
+        out, tasks = self.engine.process_inbound(self.conv, self.inbound("m2", "vielleicht"))
+        self.assertEqual("awaiting_ads", self.conv.state)
+        self.assertIn("Ja oder Nein", out[0].content)
+        self.assertEqual([], tasks)
+
+    def test_range_answer_is_not_concatenated(self) -> None:
+        self.engine.process_inbound(self.conv, self.inbound("m1", "ok"))
+        self.engine.process_inbound(self.conv, self.inbound("m2", "Ja klar"))
+        self.engine.process_inbound(self.conv, self.inbound("m3", "ca. 100-300"))
+        self.assertEqual("100-300", self.conv.monthly_leads_bucket)
+
+    def test_handover_phrase_inside_sentence(self) -> None:
+        self.engine.process_inbound(self.conv, self.inbound("m1", "ok"))
+        self.engine.process_inbound(self.conv, self.inbound("m2", "Kann ich bitte mit einem Berater sprechen?"))
+        self.assertEqual("handover", self.conv.status)
+
+    def test_interjection_and_negated_handover_do_not_hand_over(self) -> None:
+        self.engine.process_inbound(self.conv, self.inbound("m1", "ok"))
+        self.engine.process_inbound(self.conv, self.inbound("m2", "Mensch, ja klar!"))
+        self.assertEqual(("bot", "yes"), (self.conv.owner, self.conv.ads_running))
+        other = Conversation(conversation_id="c2", contact_id="u1")
+        self.engine.process_inbound(other, self.inbound("m3", "ok"))
+        self.engine.process_inbound(other, self.inbound("m4", "nein danke, kein mitarbeiter nötig"))
+        self.assertEqual(("bot", "disqualified"), (other.owner, other.status))
+
+    def test_negated_answer_is_no(self) -> None:
+        self.engine.process_inbound(self.conv, self.inbound("m1", "ok"))
+        self.engine.process_inbound(self.conv, self.inbound("m2", "Noch nicht, aber bald ja"))
+        self.assertEqual("disqualified", self.conv.status)
+
+    def test_closed_conversation_gets_no_reply(self) -> None:
+        self.conv.state = "closed"
+        out, tasks = self.engine.process_inbound(self.conv, self.inbound("m1", "hallo"))
+        self.assertEqual(([], []), (out, tasks))
+        self.assertIsNotNone(self.conv.service_window_expires_at)
+
+    def test_compile_rejects_duplicate_transitions(self) -> None:
+        rows = (Transition("awaiting_ads", "yes", "a"), Transition("awaiting_ads", "yes", "b"))
+        with self.assertRaisesRegex(ValueError, "Duplicate transition"):
+            compile_transitions(rows, CLASSIFIERS)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+import os
+import tempfile
+import unittest
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.eventlog import LOG_FILE, DurableStore, read_records
+from whatsapp_bot.models import Contact, ConversationState
+
+
+class DurableStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = DurableStore(self.tmp.name, flush_interval=0)
+        self.app = WhatsAppBotApp(store=self.store)
+        self.app.register_contact(Contact(contact_id="u1", whatsapp_e164="+491234", first_name="Max"))
+        self.app.register_contact(Contact(contact_id="u2", whatsapp_e164="+491235", first_name="Eva"))
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.tmp.cleanup()
+
+    def reopen(self) -> DurableStore:
+        self.store.close()
+        self.store = DurableStore(self.tmp.name, flush_interval=0)
+        return self.store
+
+    def test_replays_log_after_restart(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        self.app.receive_inbound("m2", "c1", "u1", "ja", base + timedelta(minutes=1))
+        self.app.receive_inbound("m3", "c2", "u2", "ok", base)
+        self.app.run_scheduler(base + timedelta(minutes=31))
+        self.app.revoke_consent("u2")
+
+        store = self.reopen()
+        conversation = store.get_conversation("c1")
+        self.assertIs(ConversationState.AWAITING_LEADS, conversation.state)
+        self.assertEqual("yes", conversation.ads_running)
+        self.assertFalse(store.get_contact("u2").consent_granted)
+        self.assertEqual([], store.tasks.pending_for("c2"))
+        self.assertEqual(["followup_24h", "followup_48h"], sorted(t.task_type for t in store.tasks.pending_for("c1")))
+        self.assertEqual("m2", store.last_inbound("u1").provider_message_id)
+        self.assertEqual("consent_revoked", store.audit_events[-1]["event_type"])
+        self.assertEqual(len(self.app.store.messages), len(store.messages))
+
+    def test_snapshot_truncates_log_and_tail_is_replayed(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        self.store.snapshot()
+        self.assertEqual(0, os.path.getsize(os.path.join(self.tmp.name, LOG_FILE)))
+        self.app.receive_inbound("m2", "c1", "u1", "nein", base + timedelta(minutes=1))
+
+        store = self.reopen()
+        conversation = store.get_conversation("c1")
+        self.assertEqual("closed", conversation.state)
+        self.assertEqual("disqualified", conversation.status)
+        self.assertEqual(["ok", "Top. Schaltest du aktuell Ads? (Ja/Nein)", "nein"], [m.content for m in store.messages[:3]])
+        self.assertIsNone(store.next_task_at())
+
+    def test_records_older_than_snapshot_are_skipped(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        log_path = os.path.join(self.tmp.name, LOG_FILE)
+        with open(log_path, "rb") as f:
+            before_snapshot = f.read()
+        self.store.snapshot()
+        # Simulate a crash between writing the snapshot and truncating the log.
+        with open(log_path, "ab") as f:
+            f.write(before_snapshot + b'{"op":"in","seq')
+
+        store = self.reopen()
+        self.assertEqual(2, len(store.messages))
+        self.assertEqual(3, len(store.tasks))
+
+    def test_transaction_records_are_written_together(self) -> None:
+        log_path = os.path.join(self.tmp.name, LOG_FILE)
+        before = len(list(read_records(log_path)))
+        with self.store.transaction():
+            self.store.create_or_get_conversation("c9", "u1")
+            self.store.record_audit("note", "u1")
+            self.assertEqual(before, len(list(read_records(log_path))))
+        self.assertEqual(before + 2, len(list(read_records(log_path))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.eventlog import DurableStore
+from whatsapp_bot.importer import normalize_e164, read_csv, read_file, read_jsonl
+from whatsapp_bot.sqlite_store import SqliteStore
+
+CSV = """contact_id,whatsapp_e164,first_name,timezone,consent_granted
+u1,+49 151 2345678,Max,Europe/Berlin,true
+u2,0044 20 7946 0958,Ann,Europe/London,yes
+u3,12345,Bad,,true
+u4,+12125550100,Joe,America/New_York,no
+,+491511111111,Nobody,,true
+u1,+491510000000,Maximilian,Europe/Berlin,1
+"""
+
+
+class NormalizeTests(unittest.TestCase):
+    def test_e164_validation(self) -> None:
+        self.assertEqual("+491512345678", normalize_e164("+49 (151) 234-5678"))
+        self.assertEqual("+442079460958", normalize_e164("0044 20 7946 0958"))
+        for bad in ("", "491512345678", "+0151234", "+1234567890123456"):
+            with self.assertRaises(ValueError):
+                normalize_e164(bad)
+
+
+class ImportTests(unittest.TestCase):
+    def check_import(self, app: WhatsAppBotApp) -> None:
+        reports = []
+        stats = app.import_contacts(read_csv(io.StringIO(CSV)), batch_size=2, progress=lambda s: reports.append(s.rows))
+        self.assertEqual((6, 4, 2), (stats.rows, stats.imported, stats.rejected))
+        self.assertEqual([3, 5], [row for row, _ in stats.errors])
+        self.assertEqual([2, 6], reports)
+        self.assertEqual("Maximilian", app.store.get_contact("u1").first_name)
+        self.assertEqual("+442079460958", app.store.get_contact("u2").whatsapp_e164)
+        self.assertFalse(app.store.get_contact("u4").consent_granted)
+        self.assertEqual(3, app.store.sizes()["audit_events"])
+
+        base = datetime(2026, 1, 1, 10, 0)
+        app.receive_inbound("m1", "c1", "u1", "ok", base)
+        revoked = app.revoke_consents(["u1\n", "u1", "missing", ""])
+        self.assertEqual((1, 1), (revoked.revoked, revoked.rejected))
+        self.assertFalse(app.store.get_contact("u1").consent_granted)
+        self.assertEqual([], app.run_scheduler(base + timedelta(days=3)))
+
+    def test_in_memory(self) -> None:
+        self.check_import(WhatsAppBotApp())
+
+    def test_sqlite(self) -> None:
+        store = SqliteStore()
+        self.check_import(WhatsAppBotApp(store=store))
+        store.close()
+
+    def test_durable_store_replays_import(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            store = DurableStore(directory)
+            self.check_import(WhatsAppBotApp(store=store))
+            store.close()
+            reopened = DurableStore(directory)
+            self.assertFalse(reopened.get_contact("u1").consent_granted)
+            self.assertEqual(store.sizes(), reopened.sizes())
+            reopened.close()
+
+    def test_missing_consent_column_imports_without_consent(self) -> None:
+        app = WhatsAppBotApp()
+        rows = read_csv(io.StringIO("contact_id,whatsapp_e164\nu1,+491512345678\n"))
+        self.assertEqual(1, app.import_contacts(rows).imported)
+        self.assertFalse(app.store.get_contact("u1").consent_granted)
+        self.assertEqual(0, app.store.sizes()["audit_events"])
+        base = datetime(2026, 1, 1, 10, 0)
+        app.receive_inbound("m1", "c1", "u1", "hallo", base)
+        self.assertEqual([], app.run_scheduler(base + timedelta(days=3)))
+
+    def test_malformed_jsonl_lines_are_rejected_per_row(self) -> None:
+        app = WhatsAppBotApp()
+        lines = [
+            '{"contact_id": "u1", "whatsapp_e164": "+491512345678"}',
+            "{bad json",
+            "[1, 2]",
+            '{"contact_id": "u2", "whatsapp_e164": "+491512345679"}',
+        ]
+        stats = app.import_contacts(read_jsonl(lines))
+        self.assertEqual((4, 2, 2), (stats.rows, stats.imported, stats.rejected))
+        self.assertEqual([2, 3], [row for row, _ in stats.errors])
+        self.assertTrue(stats.errors[0][1].startswith("invalid JSON"))
+        self.assertEqual("record must be an object", stats.errors[1][1])
+
+    def test_read_file_streams_jsonl(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "contacts.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"contact_id": "u1", "whatsapp_e164": "+491234", "consent_granted": True}) + "\n\n")
+            self.assertEqual(["u1"], [r["contact_id"] for r in read_file(path)])
+        self.assertEqual([], list(read_jsonl(["", "  "])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from whatsapp_bot.intents import (
+    HANDOVER,
+    NO,
+    UNSURE,
+    YES,
+    IntentMatcher,
+    extract_quantity,
+    extract_ranges,
+    first_of,
+    negated,
+)
+
+
+class IntentMatcherTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.matcher = IntentMatcher()
+
+    def intents(self, text: str) -> list[str]:
+        return [hit.intent for hit in self.matcher.scan(text)]
+
+    def test_whole_words_across_languages(self) -> None:
+        self.assertEqual([YES], self.intents("Ja klar!"))
+        self.assertEqual([NO], self.intents("nope"))
+        self.assertEqual([YES], self.intents("Oui"))
+        self.assertEqual([], self.intents("jain, neu hier"))
+        self.assertEqual([HANDOVER], self.intents("Bitte ruf mich an"))
+
+    def test_longest_match_shadows_contained_phrase(self) -> None:
+        self.assertEqual([UNSURE], self.intents("I don't know"))
+        self.assertEqual([UNSURE], self.intents("no idea"))
+        self.assertEqual([UNSURE], self.intents("ich weiß nicht"))
+
+    def test_first_of_picks_earliest_answer(self) -> None:
+        hits = self.matcher.scan("nee, doch ja")
+        self.assertEqual(NO, first_of(hits, (YES, NO)))
+        self.assertIsNone(first_of(hits, (HANDOVER,)))
+
+    def test_negation_before_hit_in_same_clause(self) -> None:
+        def handover_negated(text: str) -> list[bool]:
+            return [negated(text, hit) for hit in self.matcher.scan(text) if hit.intent == HANDOVER]
+
+        self.assertEqual([True], handover_negated("nein danke, kein mitarbeiter nötig"))
+        self.assertEqual([True], handover_negated("I don't want to talk to someone"))
+        self.assertEqual([False], handover_negated("nein, ruf mich an"))
+        self.assertEqual([False], handover_negated("Kann ich mit einem Berater sprechen?"))
+        self.assertEqual([], handover_negated("Mensch, ja klar!"))
+
+    def test_custom_vocabulary(self) -> None:
+        matcher = IntentMatcher({"price": ("preis", "kosten", "was kostet"), "yes": ("ja",)})
+        self.assertEqual(["price", "yes"], [h.intent for h in matcher.scan("Was kostet das? Ja")])
+
+
+class QuantityTests(unittest.TestCase):
+    def test_numbers_and_ranges(self) -> None:
+        self.assertEqual([(100.0, 300.0)], extract_ranges("ca. 100-300"))
+        self.assertEqual([(100.0, 300.0)], extract_ranges("zwischen 100 bis 300"))
+        self.assertEqual([(1000.0, 2000.0)], extract_ranges("1-2k"))
+        self.assertEqual([(1000.0, 1000.0)], extract_ranges("1.000 Leads"))
+        self.assertEqual([(2500.0, 2500.0)], extract_ranges("2,5 tsd"))
+        self.assertEqual([(150.0, 150.0), (3.0, 3.0)], extract_ranges("150 Leads, 3 Kunden"))
+
+    def test_quantity_is_range_midpoint(self) -> None:
+        self.assertEqual(200.0, extract_quantity("100-300"))
+        self.assertEqual(80.0, extract_quantity("80"))
+        self.assertIsNone(extract_quantity("keine Ahnung"))
+
+    def test_quantity_skips_time_spans_and_years(self) -> None:
+        self.assertEqual(400.0, extract_quantity("letzte 12 monate ca. 400"))
+        self.assertEqual(150.0, extract_quantity("seit 3 Jahren 150 Leads"))
+        self.assertEqual(50.0, extract_quantity("2024: etwa 50"))
+        self.assertEqual(50.0, extract_quantity("seit 2024 etwa 50 leads"))
+        self.assertEqual(80.0, extract_quantity("im jahr 2024 so 80"))
+        self.assertEqual(1500.0, extract_quantity("2024 1-2k"))
+        self.assertEqual(2000.0, extract_quantity("2000"))
+        self.assertIsNone(extract_quantity("die letzten 12 Monate"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+import unittest
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.metrics import Histogram, Metrics
+from whatsapp_bot.models import Contact
+
+
+class HistogramTests(unittest.TestCase):
+    def test_quantiles_interpolate_within_bucket(self) -> None:
+        histogram = Histogram((1.0, 2.0, 4.0))
+        for value in (0.5, 1.5, 1.5, 3.0):
+            histogram.observe(value)
+        self.assertEqual(4, histogram.count)
+        self.assertAlmostEqual(1.5, histogram.quantile(0.5))
+        self.assertEqual([("1.0", 1), ("2.0", 3), ("4.0", 4), ("+Inf", 4)], histogram.cumulative())
+
+    def test_overflow_bucket_reports_largest_bound(self) -> None:
+        histogram = Histogram((1.0,))
+        histogram.observe(10.0)
+        self.assertEqual(1.0, histogram.quantile(0.99))
+
+
+class AppMetricsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.metrics = Metrics()
+        self.app = WhatsAppBotApp(metrics=self.metrics)
+        self.app.register_contact(Contact(contact_id="u1", whatsapp_e164="+491234", first_name="Max"))
+
+    def test_stages_counters_and_store_sizes(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        self.app.run_scheduler(base + timedelta(hours=12, minutes=30))
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(2, snapshot["histograms"]["receive_inbound.total"]["count"])
+        self.assertEqual(2, snapshot["histograms"]["receive_inbound.process_inbound"]["count"])
+        self.assertEqual(1, snapshot["histograms"]["run_scheduler.policy"]["count"])
+        self.assertEqual(1, snapshot["counters"]["duplicates_dropped_total"])
+        self.assertEqual(1, snapshot["counters"]['policy_blocks_total{reason="outside_allowed_send_window"}'])
+        # Three follow-ups plus the nudge deferred out of quiet hours.
+        self.assertEqual(4, snapshot["counters"]["tasks_scheduled_total"])
+        self.assertEqual(1, snapshot["gauges"]["store_conversations"])
+
+    def test_deferred_task_counts_as_executed_once_sent(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        # 23:30 in Berlin: the nudge is popped and deferred to 07:00, not executed.
+        self.app.run_scheduler(base + timedelta(hours=12, minutes=30))
+        counters = self.metrics.snapshot()["counters"]
+        self.assertEqual((1, 0), (counters["tasks_popped_total"], counters["tasks_executed_total"]))
+        sent = self.app.run_scheduler(datetime(2026, 1, 2, 6, 0, 0))
+        self.assertEqual(["lead_nudge_v1"], [m.template_name for m in sent])
+        counters = self.metrics.snapshot()["counters"]
+        self.assertEqual((2, 1), (counters["tasks_popped_total"], counters["tasks_executed_total"]))
+
+    def test_sampling_times_every_nth_call(self) -> None:
+        metrics = Metrics(sample_every=2)
+        app = WhatsAppBotApp(metrics=metrics)
+        app.register_contact(Contact(contact_id="u1", whatsapp_e164="+491234", first_name="Max"))
+        for i in range(4):
+            app.receive_inbound(f"m{i}", "c1", "u1", "ok", datetime(2026, 1, 1, 10, 0, 0))
+        self.assertEqual(2, metrics.snapshot()["histograms"]["receive_inbound.total"]["count"])
+
+    def test_prometheus_text(self) -> None:
+        self.app.receive_inbound("m1", "c1", "u1", "ok", datetime(2026, 1, 1, 10, 0, 0))
+        text = self.metrics.render_prometheus()
+        self.assertIn("# TYPE whatsapp_bot_stage_seconds histogram", text)
+        self.assertIn('whatsapp_bot_stage_seconds_count{operation="receive_inbound",stage="total"} 1', text)
+        self.assertIn('whatsapp_bot_stage_seconds_bucket{operation="receive_inbound",stage="total",le="+Inf"} 1', text)
+        self.assertIn("# TYPE whatsapp_bot_tasks_scheduled_total counter", text)
+        self.assertIn("whatsapp_bot_store_messages 2", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+from datetime import datetime
+import os
+import pickle
+import tempfile
+import unittest
+
+from whatsapp_bot.eventlog import DurableStore
+from whatsapp_bot.models import (
+    EMPTY_PAYLOAD,
+    AdsRunning,
+    Contact,
+    Conversation,
+    ConversationState,
+    ConversationStatus,
+    InboundMessage,
+    LeadsBucket,
+    MessageType,
+    OutboundMessage,
+    Owner,
+    ScheduledTask,
+    TaskType,
+)
+from whatsapp_bot.sqlite_store import SqliteStore
+
+AT = datetime(2026, 1, 1, 10, 0, 0)
+
+
+class ModelTests(unittest.TestCase):
+    def test_choices_compare_and_hash_like_their_strings(self) -> None:
+        self.assertEqual("closed", ConversationState.CLOSED)
+        self.assertEqual("closed", str(ConversationState.CLOSED))
+        self.assertEqual({"100-300": 1}[LeadsBucket.FROM_100_TO_300], 1)
+        self.assertIs(TaskType.NUDGE_30M, TaskType("nudge_30m"))
+
+    def test_empty_payload_pickles_back_to_the_singleton(self) -> None:
+        self.assertIs(EMPTY_PAYLOAD, pickle.loads(pickle.dumps(EMPTY_PAYLOAD)))
+        task = pickle.loads(pickle.dumps(ScheduledTask("c1", TaskType.NUDGE_30M, AT, EMPTY_PAYLOAD)))
+        self.assertIs(EMPTY_PAYLOAD, task.payload)
+        self.assertEqual({}, dict(task.payload))
+
+    def test_slotted_models_reject_unknown_attributes(self) -> None:
+        models = (
+            Contact("u1", "+491234", "Max"),
+            Conversation("c1", "u1"),
+            InboundMessage("m1", "c1", "u1", "ok", AT),
+            OutboundMessage("c1", "u1", "Hallo"),
+            ScheduledTask("c1", TaskType.NUDGE_30M, AT),
+        )
+        for model in models:
+            with self.subTest(model=type(model).__name__):
+                self.assertFalse(hasattr(model, "__dict__"))
+                with self.assertRaises(AttributeError):
+                    model.stat = "closed"
+
+
+class ChoiceRoundTripTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def fill(self, store) -> None:
+        store.upsert_contact(Contact("u1", "+491234", "Max"))
+        conversation = store.create_or_get_conversation("c1", "u1")
+        conversation.state = ConversationState.CLOSED
+        conversation.status = ConversationStatus.QUALIFIED
+        conversation.owner = Owner.HUMAN
+        conversation.ads_running = AdsRunning.YES
+        conversation.monthly_leads_bucket = LeadsBucket.OVER_300
+        store.save_conversation(conversation)
+        store.save_message(OutboundMessage("c1", "u1", "Hi", MessageType.TEMPLATE, "lead_nudge_v1"))
+        store.schedule_tasks([ScheduledTask("c1", TaskType.REMINDER_5M, AT)])
+
+    def check(self, store) -> None:
+        conversation = store.get_conversation("c1")
+        expected = (
+            ConversationState.CLOSED,
+            ConversationStatus.QUALIFIED,
+            Owner.HUMAN,
+            AdsRunning.YES,
+            LeadsBucket.OVER_300,
+        )
+        actual = (
+            conversation.state,
+            conversation.status,
+            conversation.owner,
+            conversation.ads_running,
+            conversation.monthly_leads_bucket,
+        )
+        for member, value in zip(expected, actual):
+            self.assertIs(member, value)
+        self.assertEqual(("closed", "qualified", "human", "yes", "300+"), actual)
+        (task,) = store.due_tasks(AT)
+        self.assertIs(TaskType.REMINDER_5M, task.task_type)
+        self.assertEqual("reminder_5m", task.task_type)
+        self.assertIs(EMPTY_PAYLOAD, task.payload)
+
+    def test_sqlite_store(self) -> None:
+        path = os.path.join(self.tmp.name, "bot.db")
+        store = SqliteStore(path)
+        self.fill(store)
+        store.close()
+        store = SqliteStore(path)
+        self.addCleanup(store.close)
+        self.check(store)
+        (message,) = store.conversation_history("c1")[0]
+        self.assertIs(MessageType.TEMPLATE, message.message_type)
+
+    def test_durable_store(self) -> None:
+        store = DurableStore(self.tmp.name, flush_interval=0)
+        self.fill(store)
+        store.close()
+        store = DurableStore(self.tmp.name, flush_interval=0)
+        self.addCleanup(store.close)
+        self.check(store)
+        self.assertIs(MessageType.TEMPLATE, store.messages[0].message_type)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+import random
+import threading
+import unittest
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.models import Contact, OutboundMessage
+from whatsapp_bot.outbound import FakeTransport, OutboundDispatcher, SendResult, TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def message(contact_id: str, content: str = "hi") -> OutboundMessage:
+    return OutboundMessage(conversation_id=f"c-{contact_id}", contact_id=contact_id, content=content)
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_refills_at_rate_up_to_burst(self) -> None:
+        bucket = TokenBucket(rate=2, burst=2, now=0)
+        self.assertTrue(bucket.try_take(0))
+        self.assertTrue(bucket.try_take(0))
+        self.assertFalse(bucket.try_take(0))
+        self.assertAlmostEqual(0.5, bucket.wait_time(0))
+        self.assertTrue(bucket.try_take(0.5))
+
+
+class OutboundDispatcherTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.transport = FakeTransport()
+
+    def dispatcher(self, **kwargs) -> OutboundDispatcher:
+        kwargs.setdefault("clock", self.clock)
+        kwargs.setdefault("rng", random.Random(7))
+        return OutboundDispatcher(self.transport, **kwargs)
+
+    def test_sender_rate_limits_batches(self) -> None:
+        dispatcher = self.dispatcher(sender_rate=10, batch_size=50)
+        for i in range(25):
+            dispatcher.enqueue(message(f"u{i}"))
+        self.assertEqual(10, dispatcher.pump())
+        self.assertEqual(0, dispatcher.pump())
+        self.assertAlmostEqual(0.1, dispatcher.next_wakeup())
+        self.clock.now = 1.0
+        self.assertEqual(10, dispatcher.pump())
+        self.assertEqual(2, self.transport.calls)
+
+    def test_throttled_recipient_does_not_block_others(self) -> None:
+        dispatcher = self.dispatcher(recipient_rate=1 / 6)
+        dispatcher.enqueue(message("u1", "a"))
+        dispatcher.enqueue(message("u1", "b"))
+        dispatcher.enqueue(message("u2", "c"))
+        self.assertEqual(2, dispatcher.pump())
+        self.assertEqual(["a", "c"], [m.content for m in self.transport.sent])
+        self.clock.now = 6.0
+        self.assertEqual(1, dispatcher.pump())
+        self.assertEqual(1, dispatcher.stats.throttled)
+
+    def test_retryable_failures_back_off_then_dead_letter(self) -> None:
+        self.transport.fail = lambda msg, call: SendResult(False, retryable=True, error="429")
+        dispatcher = self.dispatcher(max_attempts=3, base_backoff=1.0, recipient_rate=100)
+        dispatcher.enqueue(message("u1"))
+        for _ in range(10):
+            dispatcher.pump()
+            self.clock.now += 5
+        self.assertEqual(2, dispatcher.stats.retried)
+        self.assertEqual(1, dispatcher.stats.failed)
+        self.assertEqual("429", dispatcher.dead_letters[0][1].error)
+        self.assertEqual(0, len(dispatcher))
+
+    def test_transport_exception_retries_the_whole_batch(self) -> None:
+        def flaky(msg: OutboundMessage, call: int) -> None:
+            if call == 1:
+                raise ConnectionError("reset")
+
+        self.transport.fail = flaky
+        dispatcher = self.dispatcher(base_backoff=1.0, recipient_rate=100)
+        dispatcher.enqueue(message("u1", "a"))
+        dispatcher.enqueue(message("u2", "b"))
+        with self.assertLogs("whatsapp_bot.outbound", "ERROR"):
+            self.assertEqual(0, dispatcher.pump())
+        self.assertEqual((2, 0, 2), (dispatcher.stats.retried, dispatcher.stats.failed, len(dispatcher)))
+        self.clock.now = 5.0
+        self.assertEqual(2, dispatcher.pump())
+        self.assertEqual(["a", "b"], sorted(m.content for m in self.transport.sent))
+
+    def test_missing_results_are_dead_lettered(self) -> None:
+        class ShortTransport(FakeTransport):
+            def send_batch(self, messages: list[OutboundMessage]) -> list[SendResult]:
+                return super().send_batch(messages)[:1]
+
+        dispatcher = OutboundDispatcher(ShortTransport(), clock=self.clock, rng=random.Random(7))
+        dispatcher.enqueue(message("u1", "a"))
+        dispatcher.enqueue(message("u2", "b"))
+        with self.assertLogs("whatsapp_bot.outbound", "ERROR"):
+            self.assertEqual(1, dispatcher.pump())
+        self.assertEqual(["b"], [m.content for m, _ in dispatcher.dead_letters])
+        self.assertEqual((1, 1, 0), (dispatcher.stats.sent, dispatcher.stats.failed, len(dispatcher)))
+
+    def test_background_loop_survives_transport_errors(self) -> None:
+        def flaky(msg: OutboundMessage, call: int) -> None:
+            if call == 1:
+                raise TimeoutError("provider timeout")
+
+        self.transport.fail = flaky
+        dispatcher = OutboundDispatcher(self.transport, sender_rate=1000, recipient_rate=1000, base_backoff=0.01)
+        dispatcher.enqueue(message("u1"))
+        stop = threading.Event()
+        worker = threading.Thread(target=dispatcher.run, args=(stop, 0.05))
+        with self.assertLogs("whatsapp_bot.outbound", "ERROR"):
+            worker.start()
+            for _ in range(100):
+                if self.transport.sent:
+                    break
+                stop.wait(0.01)
+        stop.set()
+        dispatcher.wake()
+        worker.join()
+        self.assertEqual(1, len(self.transport.sent))
+
+    def test_background_loop_delivers_scheduler_output(self) -> None:
+        dispatcher = OutboundDispatcher(self.transport, sender_rate=1000)
+        app = WhatsAppBotApp(dispatcher=dispatcher)
+        app.register_contact(Contact(contact_id="u1", whatsapp_e164="+491234", first_name="Max"))
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        app.receive_inbound("m1", "c1", "u1", "ok", base)
+        stop = threading.Event()
+        worker = threading.Thread(target=dispatcher.run, args=(stop, 0.05))
+        worker.start()
+        sent = app.run_scheduler(base + timedelta(minutes=31))
+        for _ in range(100):
+            if self.transport.sent:
+                break
+            stop.wait(0.01)
+        stop.set()
+        dispatcher.wake()
+        worker.join()
+        self.assertEqual(sent, self.transport.sent)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+from datetime import datetime
+import asyncio
+import threading
+import time
+import unittest
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.models import Contact, InboundMessage
+from whatsapp_bot.pipeline import AsyncIngestPipeline
+
+
+class AsyncIngestPipelineTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.app = WhatsAppBotApp()
+        for i in range(4):
+            self.app.register_contact(Contact(contact_id=f"u{i}", whatsapp_e164="+491234", first_name="Max"))
+        self.at = datetime(2026, 1, 1, 10, 0, 0)
+
+    async def test_conversations_stay_ordered_and_drain_on_close(self) -> None:
+        pipeline = AsyncIngestPipeline(self.app, workers=3, queue_size=2)
+        await pipeline.start()
+        futures = []
+        for step, text in enumerate(("ok", "ja", "150")):
+            for i in range(4):
+                futures.append(await pipeline.submit(InboundMessage(f"m{i}-{step}", f"c{i}", f"u{i}", text, self.at)))
+        await pipeline.close()
+        self.assertTrue(all(f.done() for f in futures))
+        for i in range(4):
+            self.assertEqual("qualified", self.app.store.conversations[f"c{i}"].status)
+
+    async def test_submit_waits_when_queue_is_full(self) -> None:
+        pipeline = AsyncIngestPipeline(self.app, workers=1, queue_size=1)
+        await pipeline.start()
+        await pipeline.submit(InboundMessage("m1", "c0", "u0", "ok", self.at))
+        blocked = asyncio.ensure_future(pipeline.submit(InboundMessage("m2", "c0", "u0", "ja", self.at)))
+        self.assertFalse(blocked.done())
+        await asyncio.wait_for(blocked, timeout=1)
+        await pipeline.close()
+
+    async def test_errors_are_returned_to_submitter(self) -> None:
+        async with AsyncIngestPipeline(self.app, workers=2) as pipeline:
+            with self.assertRaisesRegex(ValueError, "Unknown contact"):
+                await pipeline.process(InboundMessage("m1", "c9", "u9", "ok", self.at))
+
+            # The worker that surfaced the error keeps serving its shard.
+            self.assertEqual(1, len(await pipeline.process(InboundMessage("m2", "c1", "u1", "ok", self.at))))
+
+    async def test_app_runs_on_one_store_thread_off_the_event_loop(self) -> None:
+        threads = set()
+        receive = self.app.receive_inbound
+
+        def slow_receive(*args):
+            threads.add(threading.get_ident())
+            time.sleep(0.05)
+            return receive(*args)
+
+        self.app.receive_inbound = slow_receive
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticking = asyncio.ensure_future(ticker())
+        async with AsyncIngestPipeline(self.app, workers=4) as pipeline:
+            messages = [InboundMessage(f"m{i}", f"c{i}", f"u{i}", "ok", self.at) for i in range(4)]
+            await asyncio.gather(*(pipeline.process(m) for m in messages))
+        ticking.cancel()
+        self.assertEqual(1, len(threads))
+        self.assertNotIn(threading.get_ident(), threads)
+        # One shared app: four 50 ms calls run back to back while the loop keeps scheduling the ticker.
+        self.assertGreater(ticks, 10)
+
+    async def test_slow_shard_does_not_delay_other_shards(self) -> None:
+        apps = [WhatsAppBotApp(), WhatsAppBotApp()]
+        for app in apps:
+            app.register_contact(Contact(contact_id="u1", whatsapp_e164="+491234", first_name="Max"))
+        release = threading.Event()
+        receive = apps[1].receive_inbound
+
+        def blocked_receive(*args):
+            release.wait(5)
+            return receive(*args)
+
+        apps[1].receive_inbound = blocked_receive
+        async with AsyncIngestPipeline(apps) as pipeline:
+            self.assertEqual(2, pipeline.workers)
+            # "slow" hashes to shard 1 and "fast" to shard 0.
+            slow = await pipeline.submit(InboundMessage("m1", "slow", "u1", "ok", self.at))
+            fast = await asyncio.wait_for(pipeline.process(InboundMessage("m2", "fast", "u1", "ok", self.at)), 1)
+            self.assertEqual(1, len(fast))
+            self.assertFalse(slow.done())
+            release.set()
+            self.assertEqual(1, len(await slow))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+import unittest
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.models import Contact, Conversation
+from whatsapp_bot.policy import BLOCKED_OUTSIDE_WINDOW, SEND_ALLOWED, PolicyEngine, utc_offset
+
+
+class PolicyBatchTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.berlin = Contact("u1", "+491234", "Max", "Europe/Berlin")
+        self.new_york = Contact("u2", "+12125550100", "Ann", "America/New_York")
+        self.conversation = Conversation("c1", "u1")
+
+    def decide(self, now: datetime) -> list:
+        sends = [(self.conversation, contact, "template") for contact in (self.berlin, self.new_york)]
+        return PolicyEngine.evaluate_send_batch(sends, now)
+
+    def test_window_is_checked_in_contact_time_zone(self) -> None:
+        self.assertEqual([BLOCKED_OUTSIDE_WINDOW, BLOCKED_OUTSIDE_WINDOW], self.decide(datetime(2026, 1, 1, 5, 30)))
+        self.assertEqual([SEND_ALLOWED, BLOCKED_OUTSIDE_WINDOW], self.decide(datetime(2026, 1, 1, 11, 0)))
+        decisions = self.decide(datetime(2026, 1, 1, 12, 30))
+        self.assertIs(SEND_ALLOWED, decisions[0])
+        self.assertIs(SEND_ALLOWED, decisions[1])
+
+    def test_session_text_needs_open_service_window(self) -> None:
+        now = datetime(2026, 1, 1, 12, 0)
+        self.conversation.service_window_expires_at = now + timedelta(hours=1)
+        decisions = PolicyEngine.evaluate_send_batch([(self.conversation, self.berlin, "session_text")], now)
+        self.assertEqual([SEND_ALLOWED], decisions)
+        later = PolicyEngine.evaluate_send_batch([(self.conversation, self.berlin, "session_text")], now + timedelta(hours=2))
+        self.assertEqual("template_required_outside_24h", later[0].reason)
+
+    def test_unknown_time_zone_falls_back_to_utc(self) -> None:
+        self.assertEqual(timedelta(0), utc_offset("Mars/Olympus", datetime(2026, 7, 1, 12, 0)))
+        self.assertEqual(timedelta(hours=2), utc_offset("Europe/Berlin", datetime(2026, 7, 1, 12, 0)))
+
+    def test_next_allowed_send_at_crosses_dst_change(self) -> None:
+        # 23:30 CET on the night clocks move to CEST; the window opens 07:00 CEST = 05:00 UTC.
+        self.assertEqual(
+            datetime(2026, 3, 29, 5, 0), PolicyEngine.next_allowed_send_at(datetime(2026, 3, 28, 22, 30), "Europe/Berlin")
+        )
+        self.assertEqual(
+            datetime(2026, 1, 1, 6, 0), PolicyEngine.next_allowed_send_at(datetime(2026, 1, 1, 4, 0), "Europe/Berlin")
+        )
+
+
+class SchedulerDeferralTests(unittest.TestCase):
+    def test_quiet_hours_defer_task_to_local_morning(self) -> None:
+        app = WhatsAppBotApp()
+        app.register_contact(Contact("u2", "+12125550100", "Ann", "America/New_York"))
+        base = datetime(2026, 1, 1, 10, 0)
+        app.receive_inbound("m1", "c1", "u2", "ok", base)
+
+        self.assertEqual([], app.run_scheduler(base + timedelta(minutes=31)))
+        self.assertEqual(datetime(2026, 1, 1, 12, 0), app.store.next_task_at())
+        self.assertEqual("policy_deferred_send", app.store.audit_events[-1]["event_type"])
+
+        sent = app.run_scheduler(datetime(2026, 1, 1, 12, 0))
+        self.assertEqual(["lead_nudge_v1"], [m.template_name for m in sent])
+
+
+if __name__ == "__main__":
+    unittest.main()
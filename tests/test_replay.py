@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from whatsapp_bot.replay import REPLY, SCHEDULED, Replay, VirtualClock, main, make_app
+
+BASE = datetime(2026, 1, 5, 9, 0, 0)
+
+
+def inbound(message_id: str, conversation_id: str, contact_id: str, content: str, at: datetime) -> dict:
+    return {
+        "providerMessageId": message_id,
+        "conversationId": conversation_id,
+        "contactId": contact_id,
+        "content": content,
+        "receivedAt": at.isoformat() + "Z",
+    }
+
+
+class ReplayTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sent: list[tuple[datetime, str, str | None]] = []
+        self.replay = Replay(on_send=lambda at, source, m: self.sent.append((at, source, m.template_name)))
+
+    def test_scheduler_ticks_exactly_at_task_deadlines(self) -> None:
+        stats = self.replay.run([inbound("m1", "c1", "u1", "ok", BASE)])
+        scheduled = [(at, template) for at, source, template in self.sent if source == SCHEDULED]
+        self.assertEqual(
+            [
+                (BASE + timedelta(minutes=30), "lead_nudge_v1"),
+                (BASE + timedelta(hours=24), "lead_followup_24h_v1"),
+                (BASE + timedelta(hours=48), "lead_followup_48h_v1"),
+            ],
+            scheduled,
+        )
+        self.assertEqual((REPLY, 1, 3, 3), (self.sent[0][1], stats.replies, stats.scheduled_sent, stats.ticks))
+        self.assertEqual(BASE + timedelta(hours=48), self.replay.clock.now)
+        self.assertEqual(48 * 3600, stats.virtual_seconds)
+
+    def test_answer_before_deadline_cancels_pending_nudge(self) -> None:
+        self.replay.run(
+            [
+                inbound("m1", "c1", "u1", "ok", BASE),
+                inbound("m2", "c1", "u1", "ja", BASE + timedelta(minutes=10)),
+                inbound("m3", "c1", "u1", "150", BASE + timedelta(minutes=20)),
+            ]
+        )
+        templates = [template for _, source, template in self.sent if source == SCHEDULED]
+        self.assertNotIn("lead_nudge_v1", templates)
+        self.assertEqual(
+            ["appointment_reminder_22h_v1", "appointment_reminder_55m_v1", "appointment_reminder_5m_v1"], templates
+        )
+
+    def test_dedupe_expires_on_virtual_time(self) -> None:
+        ttl = self.replay.app.engine.dedupe.ttl_seconds
+        self.replay.run(
+            [
+                inbound("m1", "c1", "u1", "ok", BASE),
+                inbound("m1", "c1", "u1", "ok", BASE + timedelta(seconds=20)),
+                inbound("m1", "c2", "u1", "ok", BASE + timedelta(seconds=ttl + 60)),
+            ],
+            drain=False,
+        )
+        self.assertEqual(2, self.replay.stats.replies)
+        self.assertEqual(1, self.replay.app.engine.dedupe.stats.hits)
+
+    def test_contact_records_strict_mode_and_bad_rows(self) -> None:
+        clock = VirtualClock()
+        replay = Replay(make_app(clock), clock, register_unknown=False)
+        stats = replay.run(
+            [
+                {"type": "contact", "contactId": "u1", "whatsappE164": "+491234", "firstName": "Max"},
+                inbound("m1", "c1", "u1", "ok", BASE),
+                inbound("m2", "c2", "u2", "ok", BASE),
+                {"providerMessageId": "m3", "conversationId": "c1", "contactId": "u1"},
+                {"type": "revoke", "contactId": "u1", "at": "2026-01-05T09:10:00Z"},
+                inbound("m0", "c1", "u1", "ja", BASE - timedelta(hours=2)),
+            ]
+        )
+        self.assertEqual((1, 2, 1, 2, 1), (stats.contacts, stats.inbound, stats.revoked, stats.rejected, stats.late))
+        self.assertEqual([3, 4], [row for row, _ in stats.errors])
+        self.assertEqual(0, stats.scheduled_sent)
+
+    def test_malformed_records_are_rejected(self) -> None:
+        stats = self.replay.run(
+            [
+                ["not", "an", "object"],
+                "inbound",
+                {**inbound("m1", "c1", "u1", "ok", BASE), "receivedAt": 123},
+                {**inbound("m2", "c1", "u1", "ok", BASE), "contactId": ["u1"]},
+                inbound("m3", "c1", "u1", "ok", BASE),
+            ]
+        )
+        self.assertEqual((5, 4, 1), (stats.records, stats.rejected, stats.inbound))
+        self.assertEqual(
+            [(1, "record must be a JSON object"), (2, "record must be a JSON object"), (3, "invalid timestamp 123")],
+            stats.errors[:3],
+        )
+
+    def test_cli_writes_timeline_and_stats(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            events, timeline = os.path.join(directory, "events.jsonl"), os.path.join(directory, "sent.jsonl")
+            with open(events, "w", encoding="utf-8") as f:
+                f.write(json.dumps(inbound("m1", "c1", "u1", "ok", BASE)) + "\n{truncated\n")
+            out = io.StringIO()
+            with redirect_stdout(out):
+                main([events, "--timeline", timeline, "--until", "2026-01-06T09:00:00Z"])
+            with open(timeline, encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f]
+        self.assertEqual(["reply", "scheduled", "scheduled"], [r["source"] for r in rows])
+        self.assertEqual("2026-01-06T09:00:00Z", rows[-1]["at"])
+        self.assertTrue(rows[-1]["content"].startswith("Hi du,"))
+        stats = json.loads(out.getvalue())
+        self.assertEqual((2, 1), (stats["scheduledSent"], stats["rejected"]))
+        self.assertEqual(2, stats["errors"][0][0])
+        self.assertTrue(stats["errors"][0][1].startswith("invalid JSON"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+import http.client
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.metrics import Metrics
+from whatsapp_bot.models import Contact
+from whatsapp_bot.server import BotServer
+
+
+class BotServerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = datetime(2026, 1, 1, 10, 0, 0)
+        self.app = WhatsAppBotApp(metrics=Metrics())
+        self.server = BotServer(("127.0.0.1", 0), self.app, max_body=1024, scheduler_interval=None, clock=lambda: self.now)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+
+    def tearDown(self) -> None:
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, method: str, path: str, body=None, raw: bytes | None = None) -> tuple[int, dict]:
+        data = raw if raw is not None else (json.dumps(body).encode() if body is not None else None)
+        self.conn.request(method, path, body=data, headers={"Content-Type": "application/json"})
+        response = self.conn.getresponse()
+        payload = response.read()
+        if response.getheader("Connection") == "close":
+            self.conn.close()
+        return response.status, json.loads(payload)
+
+    def register(self) -> None:
+        status, payload = self.request("POST", "/contacts", {"contactId": "u1", "whatsappE164": "+491234", "firstName": "Max"})
+        self.assertEqual(201, status)
+        self.assertTrue(payload["contact"]["consentGranted"])
+
+    def test_funnel_over_one_keep_alive_connection(self) -> None:
+        self.assertEqual((200, {"ok": True}), self.request("GET", "/health"))
+        self.register()
+        inbound = {"providerMessageId": "m1", "conversationId": "c1", "contactId": "u1", "content": "ok"}
+        status, payload = self.request("POST", "/webhooks/whatsapp/inbound", inbound)
+        self.assertEqual(200, status)
+        self.assertEqual(["Top. Schaltest du aktuell Ads? (Ja/Nein)"], payload["outbound"])
+        self.assertEqual("awaiting_ads", payload["conversation"]["state"])
+        self.assertEqual("2026-01-02T10:00:00Z", payload["conversation"]["serviceWindowExpiresAt"])
+        self.assertEqual([], self.request("POST", "/webhooks/whatsapp/inbound", inbound)[1]["outbound"])
+
+        send = {"conversationId": "c1", "contactId": "u1", "messageType": "template", "templateName": "lead_nudge_v1"}
+        status, payload = self.request("POST", "/messages/send", send)
+        self.assertEqual((200, "template"), (status, payload["message"]["messageType"]))
+
+        self.now += timedelta(minutes=31)
+        status, payload = self.request("POST", "/scheduler/run")
+        self.assertEqual(["lead_nudge_v1"], [m["templateName"] for m in payload["sent"]])
+        self.assertEqual((200, {"ok": True}), self.request("POST", "/contacts/revoke-consent", {"contactId": "u1"}))
+
+    def test_client_errors(self) -> None:
+        self.assertEqual(
+            (400, {"error": "contactId, whatsappE164 and firstName are required"}),
+            self.request("POST", "/contacts", {"contactId": "u1"}),
+        )
+        self.assertEqual((400, {"error": "Invalid JSON body"}), self.request("POST", "/contacts", raw=b"{nope"))
+        self.assertEqual((400, {"error": "Unknown contact u9"}), self.request("POST", "/contacts/revoke-consent", {"contactId": "u9"}))
+        self.assertEqual(404, self.request("GET", "/nope")[0])
+        self.assertEqual(413, self.request("POST", "/contacts", raw=b"x" * 2048)[0])
+        # The oversized request closed its connection; a new one is opened transparently.
+        self.assertEqual(200, self.request("GET", "/health")[0])
+
+    def test_non_string_values_are_client_errors(self) -> None:
+        self.register()
+        inbound = {"providerMessageId": "m1", "conversationId": "c1", "contactId": "u1"}
+        self.assertEqual(
+            (400, {"error": "invalid timestamp 123"}),
+            self.request("POST", "/webhooks/whatsapp/inbound", {**inbound, "receivedAt": 123}),
+        )
+        self.assertEqual(
+            (400, {"error": "contactId must be a string"}),
+            self.request("POST", "/contacts/revoke-consent", {"contactId": ["u1"]}),
+        )
+        self.assertEqual(
+            (400, {"error": "content must be a string"}),
+            self.request("POST", "/webhooks/whatsapp/inbound", {**inbound, "content": {"text": "ok"}}),
+        )
+
+    def test_unexpected_errors_answer_500(self) -> None:
+        with mock.patch.object(self.app, "register_contact", side_effect=RuntimeError("boom")):
+            with self.assertLogs("whatsapp_bot.server", "ERROR"):
+                status, payload = self.request(
+                    "POST", "/contacts", {"contactId": "u1", "whatsappE164": "+491234", "firstName": "Max"}
+                )
+        self.assertEqual((500, {"error": "Internal server error"}), (status, payload))
+        self.assertEqual(200, self.request("GET", "/health")[0])
+
+    def test_metrics_endpoint(self) -> None:
+        self.register()
+        self.conn.request("GET", "/metrics")
+        response = self.conn.getresponse()
+        self.assertIn("whatsapp_bot_store_contacts 1", response.read().decode())
+
+
+class SchedulerThreadTests(unittest.TestCase):
+    def test_background_scheduler_sends_due_tasks(self) -> None:
+        now = datetime(2026, 1, 1, 10, 0, 0)
+        app = WhatsAppBotApp()
+        app.register_contact(Contact("u1", "+491234", "Max"))
+        app.receive_inbound("m1", "c1", "u1", "ok", now - timedelta(minutes=31))
+        server = BotServer(("127.0.0.1", 0), app, scheduler_interval=0.01, clock=lambda: now)
+        try:
+            deadline = time.monotonic() + 5
+            while app.store.task_stats.executed == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            server.server_close()
+        self.assertEqual(1, app.store.task_stats.executed)
+        self.assertEqual("lead_nudge_v1", app.store.messages[-1].template_name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+import unittest
+
+from whatsapp_bot.models import Contact, InboundMessage
+from whatsapp_bot.sharding import ShardedSupervisor
+
+
+class ShardedSupervisorTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.supervisor = ShardedSupervisor(shards=2)
+        cls.supervisor.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.supervisor.close()
+
+    def test_batch_is_routed_per_shard_and_reassembled(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        for i in range(6):
+            self.supervisor.register_contact(Contact(contact_id=f"u{i}", whatsapp_e164="+491234", first_name="Max"))
+        batch = [InboundMessage(f"m{i}", f"c{i}", f"u{i}", "ok", base) for i in range(6)]
+        batch += [InboundMessage(f"n{i}", f"c{i}", f"u{i}", "ja", base) for i in range(6)]
+        results = self.supervisor.receive_inbound_batch(batch)
+        self.assertEqual([f"c{i}" for i in range(6)] * 2, [out[0].conversation_id for out in results])
+        self.assertTrue(all("Leads" in out[0].content for out in results[6:]))
+        self.assertEqual({0, 1}, {self.supervisor.shard_for(f"c{i}") for i in range(6)})
+
+        self.supervisor.revoke_consent("u0")
+        sent = self.supervisor.run_scheduler(base + timedelta(minutes=31))
+        self.assertEqual({f"c{i}" for i in range(1, 6)}, {m.conversation_id for m in sent})
+
+    def test_shard_errors_are_raised_in_supervisor(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Unknown contact"):
+            self.supervisor.receive_inbound("x1", "c99", "nobody", "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+from datetime import datetime, timedelta
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.models import Contact, InboundMessage, ScheduledTask
+from whatsapp_bot.sqlite_store import SqliteStore
+
+
+class SqliteStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "bot.db")
+        self.store = SqliteStore(self.path)
+        self.app = WhatsAppBotApp(store=self.store)
+        self.app.register_contact(Contact(contact_id="u1", whatsapp_e164="+491234", first_name="Max"))
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_conversation_state_and_tasks_survive_reopen(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        self.app.receive_inbound("m2", "c1", "u1", "ja", base + timedelta(minutes=1))
+        self.store.close()
+
+        self.store = SqliteStore(self.path)
+        self.app = WhatsAppBotApp(store=self.store)
+        conversation = self.store.get_conversation("c1")
+        self.assertEqual("awaiting_leads", conversation.state)
+        self.assertEqual("yes", conversation.ads_running)
+        self.assertEqual(base + timedelta(minutes=30), self.store.next_task_at())
+        sent = self.app.run_scheduler(base + timedelta(hours=24, minutes=1))
+        self.assertEqual(["lead_nudge_v1", "lead_followup_24h_v1"], [m.template_name for m in sent])
+
+    def test_revoke_consent_and_cancel_tasks(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        self.assertEqual(1, self.store.cancel_tasks("c1", "nudge_30m"))
+        self.app.revoke_consent("u1")
+        self.assertFalse(self.store.get_contact("u1").consent_granted)
+        self.assertEqual(3, self.store.task_stats.cancelled)
+        self.assertEqual([], self.app.run_scheduler(base + timedelta(days=3)))
+        self.assertIsNone(self.store.next_task_at())
+
+    def test_failed_inbound_rolls_back(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with self.store.transaction():
+                self.store.create_or_get_conversation("c9", "u1")
+                raise RuntimeError("boom")
+        self.assertIsNone(self.store.get_conversation("c9"))
+
+    def test_receive_inbound_batch_persists_in_bulk(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        results = self.app.receive_inbound_batch(
+            [InboundMessage("m1", "c1", "u1", "ok", base), InboundMessage("m2", "c1", "u1", "ja", base)]
+        )
+        self.assertEqual([1, 1], [len(out) for out in results])
+        self.assertEqual("awaiting_leads", self.store.get_conversation("c1").state)
+        count = self.store.conn.execute("SELECT COUNT(*) FROM messages WHERE conversation_id = 'c1'").fetchone()[0]
+        self.assertEqual(4, count)
+
+    def test_rescheduling_upserts_by_conversation_and_type(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        pending = self.store.sizes()["pending_tasks"]
+        self.store.schedule_tasks([ScheduledTask("c1", "nudge_30m", base + timedelta(hours=2))] * 2)
+        self.assertEqual(pending, self.store.sizes()["pending_tasks"])
+        self.assertEqual(2, self.store.task_stats.duplicates_collapsed)
+        due = self.store.due_tasks(base + timedelta(hours=1))
+        self.assertNotIn("nudge_30m", [t.task_type for t in due])
+
+    def test_conversation_history_and_last_inbound(self) -> None:
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        self.app.receive_inbound("m1", "c1", "u1", "ok", base)
+        self.app.receive_inbound("m2", "c1", "u1", "ja", base + timedelta(minutes=1))
+        page, cursor = self.store.conversation_history("c1", limit=3)
+        self.assertEqual(["Top. Schaltest du aktuell Ads? (Ja/Nein)", "ja"], [m.content for m in page[:2]])
+        self.assertEqual("session_text", page[2].message_type)
+        older, cursor = self.store.conversation_history("c1", cursor=cursor, limit=3)
+        self.assertEqual(["ok"], [m.content for m in older])
+        self.assertIsNone(cursor)
+        last = self.store.last_inbound("u1")
+        self.assertEqual(("m2", base + timedelta(minutes=1)), (last.provider_message_id, last.received_at))
+
+
+class TaskLeaseTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "bot.db")
+        self.stores = [SqliteStore(self.path), SqliteStore(self.path)]
+        self.apps = [WhatsAppBotApp(store=store) for store in self.stores]
+        self.base = datetime(2026, 1, 1, 10, 0, 0)
+        for i in range(4):
+            self.apps[0].register_contact(Contact(contact_id=f"u{i}", whatsapp_e164=f"+49123{i}", first_name="Max"))
+            self.apps[0].receive_inbound(f"m{i}", f"c{i}", f"u{i}", "ok", self.base)
+
+    def tearDown(self) -> None:
+        for store in self.stores:
+            store.close()
+        self.tmp.cleanup()
+
+    def test_workers_claim_disjoint_batches(self) -> None:
+        now = self.base + timedelta(minutes=31)
+        first = self.stores[0].claim_due_tasks("w1", now, limit=3)
+        second = self.stores[1].claim_due_tasks("w2", now, limit=3)
+        self.assertEqual(3, len(first))
+        self.assertEqual(1, len(second))
+        self.assertEqual(4, len({t.task_id for t in first + second}))
+        self.assertEqual([], self.stores[1].claim_due_tasks("w2", now))
+
+    def test_expired_lease_is_reclaimed_and_stale_ack_refused(self) -> None:
+        now = self.base + timedelta(minutes=31)
+        claimed = self.stores[0].claim_due_tasks("w1", now, lease_seconds=60)
+        self.assertEqual(4, len(claimed))
+        self.assertEqual([], self.stores[1].claim_due_tasks("w2", now + timedelta(seconds=30)))
+        self.assertEqual(now + timedelta(seconds=60), self.stores[1].next_task_at())
+        reclaimed = self.stores[1].claim_due_tasks("w2", now + timedelta(seconds=61))
+        self.assertEqual({t.task_id for t in claimed}, {t.task_id for t in reclaimed})
+        self.assertFalse(self.stores[0].ack_task(claimed[0].task_id, "w1"))
+        self.assertTrue(self.stores[1].ack_task(claimed[0].task_id, "w2"))
+
+    def test_leased_scheduler_sends_each_task_once(self) -> None:
+        now = self.base + timedelta(minutes=31)
+        sent = self.apps[0].run_scheduler_leased("w1", now, limit=2) + self.apps[1].run_scheduler_leased("w2", now)
+        self.assertEqual(["c0", "c1", "c2", "c3"], sorted(m.conversation_id for m in sent))
+        self.assertEqual([], self.apps[0].run_scheduler_leased("w1", now))
+        self.assertEqual(self.base + timedelta(hours=24), self.stores[0].next_task_at())
+
+    def test_quiet_hours_release_task_to_morning(self) -> None:
+        night = datetime(2026, 1, 1, 22, 30)
+        sent = self.apps[0].run_scheduler_leased("w1", night)
+        self.assertEqual([], sent)
+        self.assertEqual(datetime(2026, 1, 2, 6, 0), self.stores[0].next_task_at())
+        self.assertEqual([], self.stores[1].claim_due_tasks("w2", night))
+
+    def test_old_database_gains_lease_columns(self) -> None:
+        path = os.path.join(self.tmp.name, "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, conversation_id TEXT NOT NULL, "
+            "task_type TEXT NOT NULL, run_at TEXT NOT NULL, payload TEXT NOT NULL)"
+        )
+        conn.close()
+        store = SqliteStore(path)
+        columns = {row[1] for row in store.conn.execute("PRAGMA table_info(tasks)")}
+        store.close()
+        self.assertTrue({"lease_owner", "lease_expires_at"} <= columns)
+
+    def test_old_database_duplicates_collapse_to_newest(self) -> None:
+        path = os.path.join(self.tmp.name, "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, conversation_id TEXT NOT NULL, "
+            "task_type TEXT NOT NULL, run_at TEXT NOT NULL, payload TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX tasks_conversation_idx ON tasks (conversation_id, task_type)")
+        conn.executemany(
+            "INSERT INTO tasks (conversation_id, task_type, run_at, payload) VALUES ('c1', 'nudge_30m', ?, '{}')",
+            [("2026-01-01T10:30:00",), ("2026-01-01T11:30:00",)],
+        )
+        conn.commit()
+        conn.close()
+        store = SqliteStore(path)
+        self.assertEqual(datetime(2026, 1, 1, 11, 30), store.next_task_at())
+        self.assertEqual(1, store.sizes()["pending_tasks"])
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+import threading
+import unittest
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.models import Contact, ScheduledTask
+from whatsapp_bot.taskqueue import TaskQueue
+
+
+class TaskQueueTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.base = datetime(2026, 1, 1, 10, 0, 0)
+        self.queue = TaskQueue()
+
+    def task(self, conv: str, task_type: str, minutes: int) -> ScheduledTask:
+        return ScheduledTask(conv, task_type, self.base + timedelta(minutes=minutes))
+
+    def test_pop_due_returns_tasks_in_run_at_order(self) -> None:
+        self.queue.push_many([self.task("c1", "b", 20), self.task("c2", "a", 10), self.task("c1", "c", 90)])
+        due = self.queue.pop_due(self.base + timedelta(minutes=30))
+        self.assertEqual(["a", "b"], [t.task_type for t in due])
+        self.assertEqual(1, len(self.queue))
+        self.assertEqual(self.base + timedelta(minutes=90), self.queue.next_run_at())
+
+    def test_cancel_by_conversation_and_type(self) -> None:
+        self.queue.push_many([self.task("c1", "nudge_30m", 30), self.task("c1", "followup_24h", 60), self.task("c2", "nudge_30m", 45)])
+        self.assertEqual(1, self.queue.cancel("c1", "nudge_30m"))
+        self.assertEqual(self.base + timedelta(minutes=45), self.queue.next_run_at())
+        self.assertEqual(1, self.queue.cancel("c1"))
+        self.assertEqual(0, self.queue.cancel("c1"))
+        due = self.queue.pop_due(self.base + timedelta(days=1))
+        self.assertEqual([("c2", "nudge_30m")], [(t.conversation_id, t.task_type) for t in due])
+        self.assertIsNone(self.queue.next_run_at())
+
+    def test_rescheduling_same_type_replaces_pending_task(self) -> None:
+        self.queue.push(self.task("c1", "nudge_30m", 30))
+        self.queue.push(self.task("c1", "nudge_30m", 60))
+        self.queue.push_many([self.task("c2", "nudge_30m", 10), self.task("c2", "nudge_30m", 20), self.task("c1", "followup_24h", 5)])
+        self.assertEqual(3, len(self.queue))
+        self.assertEqual(2, self.queue.stats.duplicates_collapsed)
+        due = self.queue.pop_due(self.base + timedelta(minutes=45))
+        self.assertEqual([("c1", 5), ("c2", 20)], [(t.conversation_id, t.run_at.minute) for t in due])
+        self.assertEqual(self.base + timedelta(minutes=60), self.queue.next_run_at())
+
+    def test_reschedule_later_moves_next_run_at(self) -> None:
+        self.queue.push(self.task("c1", "nudge_30m", 30))
+        self.queue.push(self.task("c1", "nudge_30m", 60))
+        self.assertEqual(1, len(self.queue))
+        self.assertEqual(self.base + timedelta(minutes=60), self.queue.next_run_at())
+        self.assertEqual([], self.queue.pop_due(self.base + timedelta(minutes=45)))
+
+
+class SchedulerLoopTests(unittest.TestCase):
+    def test_loop_runs_due_tasks_and_stops(self) -> None:
+        app = WhatsAppBotApp()
+        app.register_contact(Contact(contact_id="u1", whatsapp_e164="+491234", first_name="Max"))
+        base = datetime(2026, 1, 1, 10, 0, 0)
+        app.receive_inbound("m1", "c1", "u1", "ok", base)
+        stop = threading.Event()
+        ticks: list[datetime] = []
+
+        def clock() -> datetime:
+            ticks.append(base + timedelta(hours=49))
+            if len(ticks) > 2:
+                stop.set()
+            return ticks[-1]
+
+        app.run_scheduler_loop(stop, max_idle=0.0, clock=clock)
+        self.assertEqual(0, len(app.store.tasks))
+        self.assertIsNone(app.next_scheduler_deadline())
+
+
+if __name__ == "__main__":
+    unittest.main()
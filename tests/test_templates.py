@@ -0,0 +1,33 @@
+import unittest
+
+from whatsapp_bot.templates import RenderCache, get_template, render_many, render_template
+
+
+class TemplateTests(unittest.TestCase):
+    def test_compiled_render_matches_str_format(self) -> None:
+        text = render_template("appointment_reminder_55m_v1", link="https://x.test", first_name="Max")
+        self.assertEqual("In 55 Minuten geht's los 👍 Hier ist nochmal dein Link: https://x.test", text)
+        self.assertEqual(frozenset({"link"}), get_template("appointment_reminder_55m_v1").placeholders)
+
+    def test_constant_template_returns_shared_string(self) -> None:
+        texts = render_many("appointment_reminder_5m_v1", [{}, {"first_name": "Max"}])
+        self.assertIs(texts[0], texts[1])
+        self.assertIs(texts[0], render_template("appointment_reminder_5m_v1"))
+
+    def test_missing_variable_and_unknown_template(self) -> None:
+        with self.assertRaisesRegex(ValueError, "first_name"):
+            render_template("lead_welcome_v1")
+        with self.assertRaisesRegex(ValueError, "Unknown template"):
+            render_template("nope")
+
+    def test_render_cache_is_bounded_lru(self) -> None:
+        cache = RenderCache(maxsize=2)
+        first = cache.render("lead_welcome_v1", {"first_name": "Max"})
+        self.assertIs(first, cache.render("lead_welcome_v1", {"first_name": "Max", "time": "ignored"}))
+        cache.render("lead_welcome_v1", {"first_name": "Eva"})
+        cache.render("lead_welcome_v1", {"first_name": "Ida"})
+        self.assertEqual((1, 3, 2), (cache.hits, cache.misses, len(cache)))
+
+
+if __name__ == "__main__":
+    unittest.main()
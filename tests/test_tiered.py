@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+import unittest
+
+from whatsapp_bot.app import WhatsAppBotApp
+from whatsapp_bot.models import Contact, ConversationState
+from whatsapp_bot.tiered import TieredStore
+
+BASE = datetime(2026, 1, 1, 10, 0, 0)
+
+
+class TieredStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.store = TieredStore(max_idle=timedelta(days=7), settled_idle=timedelta(hours=1))
+        self.addCleanup(self.store.close)
+        self.app = WhatsAppBotApp(store=self.store)
+        for i in range(3):
+            self.app.register_contact(Contact(f"u{i}", f"+49123{i}", "Max"))
+
+    def qualify(self, conversation_id: str, contact_id: str, at: datetime) -> None:
+        for n, text in enumerate(("ok", "ja", "150")):
+            self.app.receive_inbound(f"{conversation_id}-{n}", conversation_id, contact_id, text, at)
+
+    def test_settled_conversations_move_to_cold_after_reminders(self) -> None:
+        self.qualify("c0", "u0", BASE)
+        self.app.receive_inbound("c1-0", "c1", "u1", "ok", BASE)
+        self.assertEqual(ConversationState.CLOSED, self.store.conversations["c0"].state)
+        # Pending reminders keep c0 resident; c1 is active with follow-ups.
+        self.assertEqual(0, self.store.evict(BASE + timedelta(hours=2)))
+        self.app.run_scheduler(BASE + timedelta(days=4))
+        self.store.evict(BASE + timedelta(days=4))
+        self.assertEqual(["c0"], list(self.store.cold_conversation_ids()))
+        self.assertNotIn("c0", self.store.conversations)
+        self.assertTrue(all(m.conversation_id != "c0" for m in self.store.messages))
+        sizes = self.store.sizes()
+        self.assertEqual((1, 1), (sizes["conversations"], sizes["cold_conversations"]))
+
+    def test_rehydrates_when_contact_writes_again(self) -> None:
+        self.qualify("c0", "u0", BASE)
+        self.app.receive_inbound("c1-0", "c1", "u1", "ok", BASE)
+        self.app.run_scheduler(BASE + timedelta(days=4))
+        self.store.evict(BASE + timedelta(days=4))
+        history_before = [m.content for m in self.store.last_messages("c1", 10)]
+        self.assertEqual("150", self.store.last_inbound("u0").content)
+
+        later = BASE + timedelta(days=5)
+        self.app.receive_inbound("c0-3", "c0", "u0", "hallo?", later)
+        conversation = self.store.conversations["c0"]
+        self.assertEqual(ConversationState.CLOSED, conversation.state)
+        contents = [m.content for m in self.store.last_messages("c0", 10)]
+        self.assertEqual(["ok", "ja", "150", "hallo?"], [c for c in contents if c in ("ok", "ja", "150", "hallo?")])
+        self.assertEqual("hallo?", self.store.last_inbound("u0").content)
+        self.assertEqual(history_before, [m.content for m in self.store.last_messages("c1", 10)])
+        self.assertEqual(0, self.store.sizes()["cold_conversations"])
+        self.assertEqual(1, self.store.rehydrated)
+
+    def test_idle_limit_and_resident_budget(self) -> None:
+        store = TieredStore(max_idle=timedelta(days=1), settled_idle=None, max_resident=1)
+        self.addCleanup(store.close)
+        for i in range(3):
+            conversation = store.create_or_get_conversation(f"c{i}", f"u{i}")
+            conversation.refresh_service_window(BASE + timedelta(hours=i))
+        # Only the budget applies before a day has passed: the two oldest go.
+        self.assertEqual(2, store.evict(BASE + timedelta(hours=3)))
+        self.assertEqual(["c2"], list(store.conversations))
+        self.assertEqual(1, store.evict(BASE + timedelta(days=4)))
+        self.assertIsNotNone(store.get_conversation("c0"))
+        self.assertEqual({"c0"}, store.conversations_by_contact["u0"])
+
+    def test_due_tasks_evicts_at_most_every_interval(self) -> None:
+        store = TieredStore(max_idle=timedelta(0), evict_interval=timedelta(minutes=5))
+        self.addCleanup(store.close)
+        store.create_or_get_conversation("c0", "u0")
+        store.due_tasks(BASE)
+        store.create_or_get_conversation("c1", "u1")
+        store.due_tasks(BASE + timedelta(minutes=1))
+        self.assertIn("c1", store.conversations)
+        store.due_tasks(BASE + timedelta(minutes=5))
+        self.assertEqual({"c0", "c1"}, set(store.cold_conversation_ids()))
+
+
+if __name__ == "__main__":
+    unittest.main()
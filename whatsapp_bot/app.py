@@ -1,25 +1,92 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import logging
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass, field, replace
 from datetime import datetime
+from typing import Callable, ContextManager, Iterable, Mapping, Sequence
 
+from . import importer
 from .engine import BotEngine
-from .models import Contact, InboundMessage, OutboundMessage
-from .policy import PolicyEngine
-from .store import InMemoryStore
-from .templates import render_template
+from .importer import DEFAULT_BATCH_SIZE, ImportStats, Progress
+from .metrics import COUNTER, Metrics, StageTimer
+from .models import Contact, Conversation, InboundMessage, MessageType, OutboundMessage, ScheduledTask, TaskType
+from .outbound import OutboundDispatcher
+from .policy import BLOCKED_OUTSIDE_WINDOW, PolicyEngine, SendDecision
+from .store import InMemoryStore, Store
+from .templates import CompiledTemplate, RenderCache, get_template, render_many
+
+logger = logging.getLogger(__name__)
+
+TASK_TEMPLATES: dict[str, str] = {
+    TaskType.NUDGE_30M: "lead_nudge_v1",
+    TaskType.FOLLOWUP_24H: "lead_followup_24h_v1",
+    TaskType.FOLLOWUP_48H: "lead_followup_48h_v1",
+    TaskType.REMINDER_22H: "appointment_reminder_22h_v1",
+    TaskType.REMINDER_55M: "appointment_reminder_55m_v1",
+    TaskType.REMINDER_5M: "appointment_reminder_5m_v1",
+}
+TASK_VARIABLE_DEFAULTS = {"time": "10:00", "link": "https://example.com/call"}
+# Placeholders a task template may use: the contact's name plus payload keys that have a default.
+TASK_VARIABLES = frozenset(("first_name", *TASK_VARIABLE_DEFAULTS))
+
+
+def _check_task_templates() -> None:
+    """Fail at import when a task template uses a placeholder no task can fill."""
+    for template in TASK_TEMPLATES.values():
+        unknown = get_template(template).placeholders - TASK_VARIABLES
+        if unknown:
+            raise ValueError(f"Template {template} uses unknown placeholders: {', '.join(sorted(unknown))}")
+
+
+_check_task_templates()
 
 
 @dataclass
 class WhatsAppBotApp:
-    store: InMemoryStore = field(default_factory=InMemoryStore)
+    store: Store = field(default_factory=InMemoryStore)
     engine: BotEngine = field(default_factory=BotEngine)
+    dispatcher: OutboundDispatcher | None = None
+    render_cache: RenderCache | None = None
+    metrics: Metrics | None = None
+
+    def __post_init__(self) -> None:
+        if self.metrics is not None:
+            self._register_collectors(self.metrics)
+
+    def _register_collectors(self, metrics: Metrics) -> None:
+        store, dedupe = self.store, self.engine.dedupe
+
+        def counters() -> dict[str, float]:
+            stats = store.task_stats
+            return {
+                "duplicates_dropped_total": dedupe.stats.hits,
+                "tasks_scheduled_total": stats.scheduled,
+                "tasks_popped_total": stats.popped,
+                "tasks_executed_total": stats.executed,
+                "tasks_cancelled_total": stats.cancelled,
+            }
+
+        metrics.register_collector(counters, COUNTER)
+        metrics.register_collector(lambda: {f"store_{name}": n for name, n in store.sizes().items()})
 
     def register_contact(self, contact: Contact) -> Contact:
         saved = self.store.upsert_contact(contact)
         self.store.record_audit("consent_granted", contact.contact_id)
         return saved
 
+    def import_contacts(
+        self, records: Iterable[Mapping], batch_size: int = DEFAULT_BATCH_SIZE, progress: Progress | None = None
+    ) -> ImportStats:
+        """Bulk ``register_contact`` for CRM exports; see ``importer.import_contacts``."""
+        return importer.import_contacts(self.store, records, batch_size, progress)
+
+    def revoke_consents(
+        self, contact_ids: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE, progress: Progress | None = None
+    ) -> ImportStats:
+        return importer.revoke_contacts(self.store, contact_ids, batch_size, progress)
+
     def receive_inbound(
         self,
         provider_message_id: str,
@@ -28,6 +95,7 @@ class WhatsAppBotApp:
         content: str,
         received_at: datetime | None = None,
     ) -> list[OutboundMessage]:
+        timer = self.metrics.timer("receive_inbound") if self.metrics is not None else None
         contact = self.store.get_contact(contact_id)
         if not contact:
             raise ValueError(f"Unknown contact {contact_id}")
@@ -39,20 +107,88 @@ class WhatsAppBotApp:
             content=content,
             received_at=received_at or datetime.utcnow(),
         )
-        conversation = self.store.create_or_get_conversation(conversation_id, contact_id)
-        self.store.save_message(inbound)
-        outbound, tasks = self.engine.process_inbound(conversation, inbound)
-        for msg in outbound:
-            self.store.save_message(msg)
-        self.store.schedule_tasks(tasks)
+        with self.store.transaction():
+            conversation = self.store.create_or_get_conversation(conversation_id, contact_id)
+            if timer:
+                timer.lap("lookup")
+            self.store.save_message(inbound)
+            if timer:
+                timer.lap("save_inbound")
+            settled = self.engine.is_settled(conversation)
+            outbound, tasks = self.engine.process_inbound(conversation, inbound)
+            if timer:
+                timer.lap("process_inbound")
+            if not settled and self.engine.is_settled(conversation):
+                self.store.cancel_tasks(conversation_id)
+            self.store.save_conversation(conversation)
+            if timer:
+                timer.lap("save_conversation")
+            for msg in outbound:
+                self.store.save_message(msg)
+            if timer:
+                timer.lap("save_outbound")
+            self.store.schedule_tasks(tasks)
+            if timer:
+                timer.lap("schedule_tasks")
+        if timer:
+            timer.done()
         return outbound
 
+    def receive_inbound_batch(self, messages: Sequence[InboundMessage]) -> list[list[OutboundMessage]]:
+        """Process a webhook burst; returns the outbound messages for each input, in input order.
+
+        Messages are grouped by conversation and handled in arrival order within each
+        conversation. Contacts and conversations are fetched once, and all writes go to
+        the store as bulk operations in a single transaction.
+        """
+        timer = self.metrics.timer("receive_inbound_batch") if self.metrics is not None else None
+        contacts = self.store.get_contacts({m.contact_id for m in messages})
+        for message in messages:
+            if message.contact_id not in contacts:
+                raise ValueError(f"Unknown contact {message.contact_id}")
+
+        positions: dict[str, list[int]] = {}
+        for index, message in enumerate(messages):
+            positions.setdefault(message.conversation_id, []).append(index)
+
+        results: list[list[OutboundMessage]] = [[] for _ in messages]
+        to_save: list[InboundMessage | OutboundMessage] = []
+        tasks: list[ScheduledTask] = []
+        with self.store.transaction():
+            conversations = self.store.get_or_create_conversations(
+                {conversation_id: messages[indexes[0]].contact_id for conversation_id, indexes in positions.items()}
+            )
+            for conversation_id, indexes in positions.items():
+                conversation = conversations[conversation_id]
+                conversation_tasks: list[ScheduledTask] = []
+                for index in indexes:
+                    inbound = messages[index]
+                    settled = self.engine.is_settled(conversation)
+                    outbound, new_tasks = self.engine.process_inbound(conversation, inbound)
+                    if not settled and self.engine.is_settled(conversation):
+                        self.store.cancel_tasks(conversation_id)
+                        conversation_tasks.clear()
+                    to_save.append(inbound)
+                    to_save.extend(outbound)
+                    conversation_tasks.extend(new_tasks)
+                    results[index] = outbound
+                tasks.extend(conversation_tasks)
+            if timer:
+                timer.lap("process_inbound")
+            self.store.save_conversations(conversations.values())
+            self.store.save_messages(to_save)
+            self.store.schedule_tasks(tasks)
+        if timer:
+            timer.lap("save")
+            timer.done()
+        return results
+
     def send_manual_message(
         self,
         conversation_id: str,
         contact_id: str,
         content: str,
-        message_type: str = "session_text",
+        message_type: str = MessageType.SESSION_TEXT,
         now: datetime | None = None,
         template_name: str | None = None,
     ) -> OutboundMessage:
@@ -64,9 +200,9 @@ class WhatsAppBotApp:
             raise ValueError("consent_revoked")
 
         conversation = self.store.create_or_get_conversation(conversation_id, contact_id)
-        decision = PolicyEngine.evaluate_send(conversation, now, message_type)
+        decision = PolicyEngine.evaluate_send(conversation, now, message_type, contact.timezone)
         if not decision.allowed:
-            self.store.record_audit("policy_blocked_send", contact_id, {"reason": decision.reason})
+            self._record_block(contact, decision)
             raise ValueError(decision.reason)
 
         outbound = OutboundMessage(
@@ -77,54 +213,220 @@ class WhatsAppBotApp:
             template_name=template_name,
         )
         self.store.save_message(outbound)
+        if self.dispatcher is not None:
+            self.dispatcher.enqueue(outbound)
         return outbound
 
     def run_scheduler(self, now: datetime | None = None) -> list[OutboundMessage]:
         now = now or datetime.utcnow()
+        with self.store.transaction():
+            return self._run_due_tasks(now)
+
+    def _run_due_tasks(self, now: datetime) -> list[OutboundMessage]:
+        timer = self.metrics.timer("run_scheduler") if self.metrics is not None else None
         due = self.store.due_tasks(now)
+        if timer:
+            timer.lap("due_tasks")
         sent: list[OutboundMessage] = []
-        for task in due:
-            conversation = self.store.create_or_get_conversation(task.conversation_id, self.store.conversations[task.conversation_id].contact_id)
-            contact = self.store.get_contact(conversation.contact_id)
-            if not contact or not contact.consent_granted:
+        deferred: list[ScheduledTask] = []
+        sends: list[tuple[ScheduledTask, Contact, str]] = []
+        for task, contact, template, decision in self._plan_sends(due, now, timer):
+            if decision is None:
                 continue
-
-            template = self._task_to_template(task.task_type)
-            if not template:
+            if decision is BLOCKED_OUTSIDE_WINDOW:
+                # Quiet hours only delay a follow-up; it goes out when the contact's window opens.
+                run_at = PolicyEngine.next_allowed_send_at(now, contact.timezone)
+                deferred.append(replace(task, run_at=run_at))
+                self._record_block(contact, decision, run_at)
                 continue
-            content = render_template(
-                template,
-                first_name=contact.first_name,
-                time=task.payload.get("time", "10:00"),
-                link=task.payload.get("link", "https://example.com/call"),
-            )
-            decision = PolicyEngine.evaluate_send(conversation, now, "template")
             if not decision.allowed:
-                self.store.record_audit("policy_blocked_send", contact.contact_id, {"reason": decision.reason})
+                self._record_block(contact, decision)
                 continue
+            sends.append((task, contact, template))
+        for outbound in self._task_messages(sends):
+            self.store.save_message(outbound)
+            if self.dispatcher is not None:
+                self.dispatcher.enqueue(outbound)
+            sent.append(outbound)
+        if deferred:
+            self.store.schedule_tasks(deferred)
+        self.store.task_stats.executed += len(sent)
+        if timer:
+            timer.lap("send")
+            timer.done()
+        return sent
 
-            outbound = OutboundMessage(
+    def run_scheduler_leased(
+        self,
+        worker_id: str,
+        now: datetime | None = None,
+        limit: int = 100,
+        lease_seconds: float = 60.0,
+    ) -> list[OutboundMessage]:
+        """One scheduler tick for one of several workers sharing a store with task leases.
+
+        Claims up to ``limit`` due tasks under a lease and acknowledges each in the
+        same transaction that records its message, so a worker that crashes mid-tick
+        leaves its unacknowledged tasks to be reclaimed once the lease expires, and a
+        worker whose lease was taken over skips the task instead of sending it twice.
+        Messages reach the dispatcher only after their transaction commits.
+        """
+        store = self.store
+        if not hasattr(store, "claim_due_tasks"):
+            raise TypeError(f"{type(store).__name__} does not support task leases")
+        now = now or datetime.utcnow()
+        timer = self.metrics.timer("run_scheduler_leased") if self.metrics is not None else None
+        claimed = store.claim_due_tasks(worker_id, now, limit, lease_seconds)
+        if timer:
+            timer.lap("claim")
+        sent: list[OutboundMessage] = []
+        plans = self._plan_sends(claimed, now, timer)
+        # Render every sendable task in one batch; a task whose ack fails just drops its text.
+        sends = [
+            (task, contact, template)
+            for task, contact, template, decision in plans
+            if decision is not None and decision is not BLOCKED_OUTSIDE_WINDOW and decision.allowed
+        ]
+        rendered = {task.task_id: outbound for (task, _, _), outbound in zip(sends, self._task_messages(sends))}
+        for task, contact, template, decision in plans:
+            outbound = None
+            with store.transaction():
+                if decision is BLOCKED_OUTSIDE_WINDOW:
+                    run_at = PolicyEngine.next_allowed_send_at(now, contact.timezone)
+                    if store.release_task(task.task_id, worker_id, run_at):
+                        self._record_block(contact, decision, run_at)
+                    continue
+                if not store.ack_task(task.task_id, worker_id):
+                    # Lease expired and another worker claimed the task.
+                    continue
+                if decision is None:
+                    continue
+                if not decision.allowed:
+                    self._record_block(contact, decision)
+                    continue
+                outbound = rendered[task.task_id]
+                store.save_message(outbound)
+            if self.dispatcher is not None:
+                self.dispatcher.enqueue(outbound)
+            sent.append(outbound)
+        self.store.task_stats.executed += len(sent)
+        if timer:
+            timer.lap("send")
+            timer.done()
+        return sent
+
+    def _plan_sends(
+        self, tasks: list[ScheduledTask], now: datetime, timer: StageTimer | None
+    ) -> list[tuple[ScheduledTask, Contact | None, str | None, SendDecision | None]]:
+        """Pair each task with its contact, template and policy decision.
+
+        The decision is None for tasks that can never be sent: the conversation is
+        gone, consent was revoked, or the task type has no template.
+        """
+        plans: list[tuple[ScheduledTask, Contact | None, str | None, SendDecision | None]] = []
+        sendable: list[tuple[Conversation, Contact, str]] = []
+        for task in tasks:
+            conversation = self.store.get_conversation(task.conversation_id)
+            contact = self.store.get_contact(conversation.contact_id) if conversation else None
+            template = self._task_to_template(task.task_type)
+            if conversation and contact and contact.consent_granted and template:
+                sendable.append((conversation, contact, MessageType.TEMPLATE))
+            else:
+                contact = template = None
+            plans.append((task, contact, template, None))
+        if timer:
+            timer.lap("lookup")
+
+        decisions = iter(PolicyEngine.evaluate_send_batch(sendable, now))
+        plans = [(task, contact, template, next(decisions) if template else None) for task, contact, template, _ in plans]
+        if timer:
+            timer.lap("policy")
+        return plans
+
+    def _record_block(self, contact: Contact, decision: SendDecision, deferred_to: datetime | None = None) -> None:
+        if self.metrics is not None:
+            self.metrics.inc("policy_blocks_total", reason=decision.reason)
+        if deferred_to is None:
+            self.store.record_audit("policy_blocked_send", contact.contact_id, {"reason": decision.reason})
+        else:
+            self.store.record_audit(
+                "policy_deferred_send",
+                contact.contact_id,
+                {"reason": decision.reason, "run_at": deferred_to.isoformat()},
+            )
+
+    def _task_messages(self, sends: list[tuple[ScheduledTask, Contact, str]]) -> list[OutboundMessage]:
+        """Template messages for ``sends``, rendered with one ``render_many`` call per template."""
+        by_template: dict[str, list[int]] = {}
+        for i, (_, _, template) in enumerate(sends):
+            by_template.setdefault(template, []).append(i)
+        texts: list[str] = [""] * len(sends)
+        for template, indexes in by_template.items():
+            compiled = get_template(template)
+            variables = [self._task_variables(compiled, *sends[i][:2]) for i in indexes]
+            if self.render_cache is not None:
+                rendered = [self.render_cache.render(template, v) for v in variables]
+            else:
+                rendered = render_many(template, variables)
+            for i, text in zip(indexes, rendered):
+                texts[i] = text
+        return [
+            OutboundMessage(
                 conversation_id=task.conversation_id,
                 contact_id=contact.contact_id,
-                content=content,
-                message_type="template",
+                content=text,
+                message_type=MessageType.TEMPLATE,
                 template_name=template,
             )
-            self.store.save_message(outbound)
-            sent.append(outbound)
-        return sent
+            for (task, contact, template), text in zip(sends, texts)
+        ]
+
+    def next_scheduler_deadline(self) -> datetime | None:
+        return self.store.next_task_at()
+
+    def run_scheduler_loop(
+        self,
+        stop: threading.Event,
+        max_idle: float = 60.0,
+        clock: Callable[[], datetime] = datetime.utcnow,
+        lock: ContextManager | None = None,
+    ) -> None:
+        """Run scheduler ticks until ``stop`` is set, sleeping until the next deadline.
+
+        ``max_idle`` caps each sleep so tasks scheduled while waiting are picked up.
+        Pass the ``lock`` that serializes other callers of this app to tick under it.
+        A failing tick is logged and retried after ``max_idle``; it does not end the loop.
+        """
+        lock = lock if lock is not None else nullcontext()
+        while not stop.is_set():
+            try:
+                with lock:
+                    self.run_scheduler(clock())
+                    deadline = self.next_scheduler_deadline()
+            except Exception:
+                logger.exception("scheduler tick failed")
+                deadline = None
+            timeout = max_idle
+            if deadline is not None:
+                timeout = min(max_idle, max(0.0, (deadline - clock()).total_seconds()))
+            stop.wait(timeout)
 
     def revoke_consent(self, contact_id: str) -> None:
         self.store.revoke_consent(contact_id)
 
+    @staticmethod
+    def _task_variables(compiled: CompiledTemplate, task: ScheduledTask, contact: Contact) -> dict[str, str]:
+        # A placeholder with neither a payload value nor a default stays unset, so rendering raises.
+        variables: dict[str, str] = {}
+        for placeholder in compiled.fields:
+            if placeholder == "first_name":
+                variables[placeholder] = contact.first_name
+            elif placeholder in task.payload:
+                variables[placeholder] = task.payload[placeholder]
+            elif placeholder in TASK_VARIABLE_DEFAULTS:
+                variables[placeholder] = TASK_VARIABLE_DEFAULTS[placeholder]
+        return variables
+
     @staticmethod
     def _task_to_template(task_type: str) -> str | None:
-        mapping = {
-            "nudge_30m": "lead_nudge_v1",
-            "followup_24h": "lead_followup_24h_v1",
-            "followup_48h": "lead_followup_48h_v1",
-            "reminder_22h": "appointment_reminder_22h_v1",
-            "reminder_55m": "appointment_reminder_55m_v1",
-            "reminder_5m": "appointment_reminder_5m_v1",
-        }
-        return mapping.get(task_type)
+        return TASK_TEMPLATES.get(task_type)
@@ -0,0 +1,383 @@
+"""Columnar audit trail with compressed, rolled segments.
+
+New events go into a hot segment of typed columns: an event-type code, a
+contact code, the timestamp in epoch microseconds, and a JSON details blob
+(None when empty). Once ``segment_size`` events have accumulated, the hot
+segment is sealed. A sealed segment is self-contained: its own type and
+contact tables plus the column bytes, zlib-compressed. It is written to
+``directory``, or kept as bytes when no directory is given. Only the bounds
+of each sealed segment and a Bloom filter over its contact ids stay in RAM,
+read from the segment header on open. The filter is capped at 64 KiB, so a
+sealed segment costs at most that much RAM however many contacts it holds.
+Time-range queries skip segments by those bounds. Per-contact queries skip
+segments the filter rules out, and confirm a match against the decoded
+contact table, because the filter lets a few percent of absent contacts
+through.
+
+``AuditLog`` is also a read-only sequence of the event dicts
+``InMemoryStore.audit_events`` used to hold, so ``len``, indexing and iteration
+keep working.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Callable, Iterator
+
+DEFAULT_SEGMENT_SIZE = 65536
+SEGMENT_SUFFIX = ".seg"
+_HEADER_LENGTH = struct.Struct(">I")
+_EPOCH = datetime(1970, 1, 1)
+
+# Per-segment contact filter: about 1% false positives at 10 bits and 7 probes per contact,
+# rising to about 2.5% when a full segment of distinct contacts hits the size cap.
+_BLOOM_BITS_PER_CONTACT = 10
+_BLOOM_PROBES = 7
+_BLOOM_MAX_BYTES = 64 * 1024
+
+# Positional row used by the event log: [index, event_type, contact_id, details, created_us].
+AuditRow = list
+
+
+def to_micros(value: datetime) -> int:
+    """Epoch microseconds of a naive UTC datetime, the convention used across the stores."""
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _event(event_type: str, contact_id: str, details: str | None, micros: int) -> dict:
+    return {
+        "event_type": event_type,
+        "contact_id": contact_id,
+        "details": json.loads(details) if details else {},
+        "created_at": (_EPOCH + timedelta(microseconds=micros)).isoformat(),
+    }
+
+
+def _little_endian(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _bloom_probes(contact_id: str, bits: int) -> Iterator[int]:
+    digest = hashlib.blake2b(contact_id.encode(), digest_size=16).digest()
+    h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+    return ((h1 + i * h2) % bits for i in range(_BLOOM_PROBES))
+
+
+def _bloom(contact_ids: list[str]) -> bytes:
+    """Bloom filter over ``contact_ids``, capped at ``_BLOOM_MAX_BYTES`` whatever the segment holds."""
+    size = min(_BLOOM_MAX_BYTES, max(8, -(-len(contact_ids) * _BLOOM_BITS_PER_CONTACT // 8)))
+    filter_ = bytearray(size)
+    for contact_id in contact_ids:
+        for bit in _bloom_probes(contact_id, size * 8):
+            filter_[bit >> 3] |= 1 << (bit & 7)
+    return bytes(filter_)
+
+
+def _bloom_may_contain(filter_: bytes, contact_id: str) -> bool:
+    return all(filter_[bit >> 3] & (1 << (bit & 7)) for bit in _bloom_probes(contact_id, len(filter_) * 8))
+
+
+class _Columns:
+    """One segment's events; codes index into ``type_names`` and ``contact_ids``."""
+
+    __slots__ = ("type_names", "contact_ids", "types", "contacts", "times", "details")
+
+    def __init__(self) -> None:
+        self.type_names: list[str] = []
+        self.contact_ids: list[str] = []
+        self.types = array("H")
+        self.contacts = array("I")
+        self.times = array("q")
+        self.details: list[str | None] = []
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def event(self, i: int) -> dict:
+        return _event(self.type_names[self.types[i]], self.contact_ids[self.contacts[i]], self.details[i], self.times[i])
+
+    def row(self, i: int) -> list:
+        details = self.details[i]
+        return [
+            self.type_names[self.types[i]],
+            self.contact_ids[self.contacts[i]],
+            json.loads(details) if details else None,
+            self.times[i],
+        ]
+
+    def select(self, start: int | None, end: int | None, contact: int | None) -> Iterator[dict]:
+        times, contacts = self.times, self.contacts
+        for i in range(len(times)):
+            if contact is not None and contacts[i] != contact:
+                continue
+            if (start is not None and times[i] < start) or (end is not None and times[i] >= end):
+                continue
+            yield self.event(i)
+
+    def encode(self, bloom: bytes) -> bytes:
+        times = self.times
+        header = {
+            "count": len(times),
+            "start": min(times),
+            "end": max(times),
+            "types": self.type_names,
+            "contacts": self.contact_ids,
+            "bloom": base64.b64encode(bloom).decode(),
+        }
+        head = zlib.compress(json.dumps(header, separators=(",", ":")).encode())
+        body = b"".join(
+            (
+                _little_endian(self.types),
+                _little_endian(self.contacts),
+                _little_endian(times),
+                json.dumps(self.details, separators=(",", ":")).encode(),
+            )
+        )
+        return _HEADER_LENGTH.pack(len(head)) + head + zlib.compress(body)
+
+    @classmethod
+    def decode(cls, blob: bytes) -> _Columns:
+        header, body_at = _decode_header(blob)
+        n = header["count"]
+        body = zlib.decompress(blob[body_at:])
+        columns = cls()
+        columns.type_names = header["types"]
+        columns.contact_ids = header["contacts"]
+        columns.types = _from_little_endian("H", body[: 2 * n])
+        columns.contacts = _from_little_endian("I", body[2 * n : 6 * n])
+        columns.times = _from_little_endian("q", body[6 * n : 14 * n])
+        columns.details = json.loads(body[14 * n :])
+        return columns
+
+
+def _decode_header(blob: bytes) -> tuple[dict, int]:
+    (length,) = _HEADER_LENGTH.unpack_from(blob)
+    end = _HEADER_LENGTH.size + length
+    return json.loads(zlib.decompress(blob[_HEADER_LENGTH.size : end])), end
+
+
+class _Segment:
+    """Bounds and contact filter of a sealed segment; the events live in ``path`` or ``blob``."""
+
+    __slots__ = ("first", "count", "start", "end", "bloom", "path", "blob")
+
+    def __init__(
+        self,
+        first: int,
+        count: int,
+        start: int,
+        end: int,
+        bloom: bytes,
+        path: str | None,
+        blob: bytes | None,
+    ) -> None:
+        self.first = first
+        self.count = count
+        self.start = start
+        self.end = end
+        self.bloom = bloom
+        self.path = path
+        self.blob = blob
+
+    def may_contain(self, contact_id: str) -> bool:
+        """False only if ``contact_id`` has no event here; True may be a false positive."""
+        return _bloom_may_contain(self.bloom, contact_id)
+
+    def read(self) -> bytes:
+        if self.blob is not None:
+            return self.blob
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class AuditLog(Sequence):
+    """Append-only audit events, hot in typed columns and sealed into compressed segments."""
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if segment_size < 1:
+            raise ValueError("segment_size must be >= 1")
+        self.directory = directory
+        self.segment_size = segment_size
+        self.clock = clock
+        self.segments: list[_Segment] = []
+        self._firsts: list[int] = []
+        self._sealed = 0
+        self._hot = _Columns()
+        self._type_codes: dict[str, int] = {}
+        self._contact_codes: dict[str, int] = {}
+        # One decoded sealed segment, for sequential indexing into cold history.
+        self._cached: tuple[int, _Columns] | None = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._open_segments()
+
+    def _open_segments(self) -> None:
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX))
+        for name in names:
+            path = os.path.join(self.directory, name)
+            with open(path, "rb") as f:
+                (length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+                header = json.loads(zlib.decompress(f.read(length)))
+            # Segments written before the filter existed get one built from their contact table.
+            bloom = base64.b64decode(header["bloom"]) if "bloom" in header else _bloom(header["contacts"])
+            bounds = header["count"], header["start"], header["end"], bloom
+            self._add_segment(_Segment(self._sealed, *bounds, path, None))
+
+    def _add_segment(self, segment: _Segment) -> None:
+        self.segments.append(segment)
+        self._firsts.append(segment.first)
+        self._sealed += segment.count
+
+    # -- writing ----------------------------------------------------------
+
+    def append(self, event_type: str, contact_id: str, details: dict | None = None, micros: int | None = None) -> None:
+        hot = self._hot
+        code = self._type_codes.get(event_type)
+        if code is None:
+            code = self._type_codes[event_type] = len(hot.type_names)
+            hot.type_names.append(event_type)
+        hot.types.append(code)
+        code = self._contact_codes.get(contact_id)
+        if code is None:
+            code = self._contact_codes[contact_id] = len(hot.contact_ids)
+            hot.contact_ids.append(contact_id)
+        hot.contacts.append(code)
+        hot.details.append(json.dumps(details, separators=(",", ":")) if details else None)
+        times = hot.times
+        times.append(int(self.clock() * 1_000_000) if micros is None else micros)
+        if len(times) >= self.segment_size:
+            self.seal()
+
+    def restore(self, row: AuditRow) -> None:
+        """Re-append a logged ``row`` unless its index is already held (e.g. in a sealed segment)."""
+        index, event_type, contact_id, details, micros = row
+        if index >= len(self):
+            self.append(event_type, contact_id, details, micros)
+
+    def seal(self) -> None:
+        """Compress the hot segment and start a new one."""
+        hot = self._hot
+        if not len(hot):
+            return
+        bloom = _bloom(hot.contact_ids)
+        blob = hot.encode(bloom)
+        first = self._sealed
+        path = None
+        if self.directory is not None:
+            path = os.path.join(self.directory, f"audit-{first:012d}{SEGMENT_SUFFIX}")
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            blob = None
+        self._add_segment(_Segment(first, len(hot), min(hot.times), max(hot.times), bloom, path, blob))
+        self._hot = _Columns()
+        self._type_codes = {}
+        self._contact_codes = {}
+
+    # -- reading ----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._sealed + len(self._hot)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        columns, i = self._locate(index)
+        return columns.event(i)
+
+    def _locate(self, index: int) -> tuple[_Columns, int]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("audit index out of range")
+        if index >= self._sealed:
+            return self._hot, index - self._sealed
+        number = bisect_right(self._firsts, index) - 1
+        return self._columns(number), index - self.segments[number].first
+
+    def __iter__(self) -> Iterator[dict]:
+        for number in range(len(self.segments)):
+            columns = self._columns(number)
+            for i in range(len(columns)):
+                yield columns.event(i)
+        hot = self._hot
+        for i in range(len(hot)):
+            yield hot.event(i)
+
+    def row(self, index: int) -> AuditRow:
+        """Positional form of event ``index`` for the event log and snapshots."""
+        if index < 0:
+            index += len(self)
+        columns, i = self._locate(index)
+        return [index, *columns.row(i)]
+
+    def hot_rows(self) -> Iterator[AuditRow]:
+        """Rows not yet sealed; sealed segments persist themselves when a directory is set."""
+        start = self._sealed if self.directory is not None else 0
+        return (self.row(i) for i in range(start, len(self)))
+
+    def query(
+        self, start: datetime | None = None, end: datetime | None = None, contact_id: str | None = None
+    ) -> Iterator[dict]:
+        """Events with ``start <= created_at < end`` (naive UTC), optionally for one contact, oldest first."""
+        lo = to_micros(start) if start is not None else None
+        hi = to_micros(end) if end is not None else None
+        for number, segment in enumerate(self.segments):
+            if (lo is not None and segment.end < lo) or (hi is not None and segment.start >= hi):
+                continue
+            if contact_id is not None and not segment.may_contain(contact_id):
+                continue
+            columns = self._columns(number)
+            code = None
+            if contact_id is not None:
+                # The filter can pass a contact the segment does not hold.
+                if contact_id not in columns.contact_ids:
+                    continue
+                code = columns.contact_ids.index(contact_id)
+            yield from columns.select(lo, hi, code)
+        hot = self._hot
+        if contact_id is not None:
+            code = self._contact_codes.get(contact_id)
+            if code is None:
+                return
+        else:
+            code = None
+        yield from hot.select(lo, hi, code)
+
+    def _columns(self, number: int) -> _Columns:
+        cached = self._cached
+        if cached is not None and cached[0] == number:
+            return cached[1]
+        columns = _Columns.decode(self.segments[number].read())
+        self._cached = (number, columns)
+        return columns
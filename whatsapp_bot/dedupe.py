@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Protocol
+
+# Meta retries undelivered webhooks for up to seven days.
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+@dataclass
+class DedupeStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class DedupeCache(Protocol):
+    stats: DedupeStats
+
+    def check_and_add(self, key: str) -> bool:
+        """Return True if ``key`` was already seen, otherwise remember it."""
+
+
+class TTLDedupeCache:
+    """Exact LRU dedupe set bounded by entry count and time-to-live."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = 1_000_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = DedupeStats()
+        # key -> expiry; kept in expiry order because hits are moved to the end.
+        self._entries: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        expiry = self._entries.get(key)
+        return expiry is not None and expiry > self.clock()
+
+    def check_and_add(self, key: str) -> bool:
+        now = self.clock()
+        self._expire(now)
+        entries = self._entries
+        if key in entries:
+            entries[key] = now + self.ttl_seconds
+            entries.move_to_end(key)
+            self.stats.hits += 1
+            return True
+        entries[key] = now + self.ttl_seconds
+        self.stats.misses += 1
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.stats.evictions += 1
+        return False
+
+    def _expire(self, now: float) -> None:
+        entries = self._entries
+        while entries:
+            key, expiry = next(iter(entries.items()))
+            if expiry > now:
+                return
+            del entries[key]
+            self.stats.evictions += 1
+
+
+class BloomDedupeFilter:
+    """Compact probabilistic dedupe built from two rotating Bloom filters.
+
+    Each generation covers ``ttl_seconds``; a key is remembered for at least one
+    and at most two generations. ``capacity`` is the expected number of distinct
+    keys per generation and ``false_positive_rate`` the target rate at that load.
+    A false positive drops a genuinely new message, so keep the rate small.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1_000_000,
+        false_positive_rate: float = 1e-6,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+        self.num_bits = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.stats = DedupeStats()
+        self._current = bytearray((self.num_bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._current_count = 0
+        self._previous_count = 0
+        self._rotate_at = clock() + ttl_seconds
+
+    def check_and_add(self, key: str) -> bool:
+        now = self.clock()
+        if now >= self._rotate_at:
+            self._rotate(now)
+        positions = self._positions(key)
+        current = self._current
+        if all(current[p >> 3] & (1 << (p & 7)) for p in positions):
+            self.stats.hits += 1
+            return True
+        previous = self._previous
+        seen_before = all(previous[p >> 3] & (1 << (p & 7)) for p in positions)
+        for p in positions:
+            current[p >> 3] |= 1 << (p & 7)
+        self._current_count += 1
+        if seen_before:
+            self.stats.hits += 1
+            return True
+        self.stats.misses += 1
+        return False
+
+    def _positions(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def _rotate(self, now: float) -> None:
+        self.stats.evictions += self._previous_count
+        if now >= self._rotate_at + self.ttl_seconds:
+            # Idle for more than a full generation: both filters are stale.
+            self.stats.evictions += self._current_count
+            self._previous = bytearray(len(self._current))
+            self._previous_count = 0
+        else:
+            self._previous = self._current
+            self._previous_count = self._current_count
+        self._current = bytearray(len(self._previous))
+        self._current_count = 0
+        self._rotate_at = now + self.ttl_seconds
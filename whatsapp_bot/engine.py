@@ -2,127 +2,123 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime, time, timedelta
-
-from .models import Conversation, InboundMessage, OutboundMessage, ScheduledTask
+from typing import Callable
+
+from .dedupe import DedupeCache, TTLDedupeCache
+from .intents import HANDOVER, NO, UNSURE, YES, Hit, IntentMatcher, extract_quantity, first_of, negated
+from .models import (
+    AdsRunning,
+    Conversation,
+    ConversationState,
+    ConversationStatus,
+    InboundMessage,
+    LeadsBucket,
+    OutboundMessage,
+    Owner,
+    ScheduledTask,
+    TaskType,
+)
+
+REPLY_HANDOVER = "Klar, ich gebe direkt an einen Kollegen weiter 👌"
+REPLY_ASK_ADS = "Top. Schaltest du aktuell Ads? (Ja/Nein)"
+REPLY_NO_ADS = "Danke für deine Offenheit 🙌 Aktuell passt es noch nicht ideal. Wenn sich das ändert, melde dich gerne wieder."
+REPLY_ASK_LEADS = "Wie viele Leads generierst du ungefähr pro Monat?"
+REPLY_REPEAT_ADS = "Kannst du mit Ja oder Nein antworten? Schaltest du aktuell Ads?"
+REPLY_TOO_FEW_LEADS = "Danke dir 🙏 Unter 100 Leads/Monat ist unser Setup meist noch zu früh. Ich kann dir gern später nochmal schreiben."
+REPLY_QUALIFIED = "Perfekt, das klingt passend ✅ Ich schicke dir jetzt einen Terminvorschlag."
+REPLY_REPEAT_LEADS = "Kannst du eine grobe Zahl nennen (z. B. 80, 150, 400)?"
+
+FOLLOWUP_OFFSETS = (
+    (TaskType.NUDGE_30M, timedelta(minutes=30)),
+    (TaskType.FOLLOWUP_24H, timedelta(hours=24)),
+    (TaskType.FOLLOWUP_48H, timedelta(hours=48)),
+)
+MEETING_OFFSET = timedelta(days=3)
+REMINDER_LEADS = (
+    (TaskType.REMINDER_22H, timedelta(hours=22)),
+    (TaskType.REMINDER_55M, timedelta(minutes=55)),
+    (TaskType.REMINDER_5M, timedelta(minutes=5)),
+)
+
+# Input symbol for transitions that accept any message in their state.
+ANY = "*"
+
+# Classifiers see the lowercased text and the intent hits already found in it.
+Classifier = Callable[[str, list[Hit]], str]
+TaskPlanner = Callable[[Conversation, datetime], list[ScheduledTask]]
+
+
+@dataclass(frozen=True)
+class Transition:
+    """One row of the flow table: in ``state``, input ``symbol`` replies and moves on."""
+
+    state: str
+    symbol: str
+    reply: str
+    next_state: str | None = None
+    updates: tuple[tuple[str, str], ...] = ()
+    schedule: TaskPlanner | None = None
+
+
+@dataclass(frozen=True)
+class StateNode:
+    """Compiled dispatch entry for one state."""
+
+    classify: Classifier | None
+    record_as: str | None
+    transitions: dict[str, Transition]
+    fallback: Transition | None
 
 
 @dataclass
 class BotEngine:
     """Rule-based MVP flow engine for WhatsApp qualification bot."""
 
-    processed_ids: set[str] = field(default_factory=set)
+    dedupe: DedupeCache = field(default_factory=TTLDedupeCache)
+    dispatch: dict[str, StateNode] = field(default_factory=lambda: DISPATCH)
+    intents: IntentMatcher = field(default_factory=lambda: DEFAULT_INTENTS)
 
     def process_inbound(
         self,
         conversation: Conversation,
         inbound: InboundMessage,
     ) -> tuple[list[OutboundMessage], list[ScheduledTask]]:
-        if inbound.provider_message_id in self.processed_ids:
+        if self.dedupe.check_and_add(inbound.provider_message_id):
             return [], []
-        self.processed_ids.add(inbound.provider_message_id)
         conversation.refresh_service_window(inbound.received_at)
 
         text = inbound.content.strip().lower()
-        out: list[OutboundMessage] = []
-        tasks: list[ScheduledTask] = []
-
-        if text in {"mitarbeiter", "berater", "anrufen"}:
-            conversation.owner = "human"
-            conversation.status = "handover"
-            out.append(
-                OutboundMessage(
-                    conversation_id=conversation.conversation_id,
-                    contact_id=conversation.contact_id,
-                    content="Klar, ich gebe direkt an einen Kollegen weiter 👌",
-                )
-            )
-            return out, tasks
-
-        if conversation.state == "awaiting_consent_ack":
-            out.append(
-                OutboundMessage(
-                    conversation_id=conversation.conversation_id,
-                    contact_id=conversation.contact_id,
-                    content="Top. Schaltest du aktuell Ads? (Ja/Nein)",
-                )
-            )
-            conversation.state = "awaiting_ads"
-            tasks.extend(self._default_followups(conversation, inbound.received_at))
-            return out, tasks
-
-        if conversation.state == "awaiting_ads":
-            if text.startswith("n"):
-                conversation.ads_running = "no"
-                conversation.status = "disqualified"
-                conversation.state = "closed"
-                out.append(
-                    OutboundMessage(
-                        conversation_id=conversation.conversation_id,
-                        contact_id=conversation.contact_id,
-                        content="Danke für deine Offenheit 🙌 Aktuell passt es noch nicht ideal. Wenn sich das ändert, melde dich gerne wieder.",
-                    )
-                )
-                return out, tasks
-            if text.startswith("j"):
-                conversation.ads_running = "yes"
-                conversation.state = "awaiting_leads"
-                out.append(
-                    OutboundMessage(
-                        conversation_id=conversation.conversation_id,
-                        contact_id=conversation.contact_id,
-                        content="Wie viele Leads generierst du ungefähr pro Monat?",
-                    )
-                )
-                return out, tasks
-
-            out.append(
-                OutboundMessage(
-                    conversation_id=conversation.conversation_id,
-                    contact_id=conversation.contact_id,
-                    content="Kannst du mit Ja oder Nein antworten? Schaltest du aktuell Ads?",
-                )
-            )
-            return out, tasks
-
-        if conversation.state == "awaiting_leads":
-            bucket = self._parse_lead_bucket(text)
-            conversation.monthly_leads_bucket = bucket
-            if bucket == "<100":
-                conversation.status = "disqualified"
-                conversation.state = "closed"
-                out.append(
-                    OutboundMessage(
-                        conversation_id=conversation.conversation_id,
-                        contact_id=conversation.contact_id,
-                        content="Danke dir 🙏 Unter 100 Leads/Monat ist unser Setup meist noch zu früh. Ich kann dir gern später nochmal schreiben.",
-                    )
-                )
-                return out, tasks
-
-            if bucket in {"100-300", "300+"}:
-                conversation.status = "qualified"
-                conversation.state = "closed"
-                out.append(
-                    OutboundMessage(
-                        conversation_id=conversation.conversation_id,
-                        contact_id=conversation.contact_id,
-                        content="Perfekt, das klingt passend ✅ Ich schicke dir jetzt einen Terminvorschlag.",
-                    )
-                )
-                tasks.extend(self._appointment_reminders(conversation, inbound.received_at))
-                return out, tasks
-
-            out.append(
-                OutboundMessage(
-                    conversation_id=conversation.conversation_id,
-                    contact_id=conversation.contact_id,
-                    content="Kannst du eine grobe Zahl nennen (z. B. 80, 150, 400)?",
-                )
-            )
-            return out, tasks
+        # One scan serves both the handover check and the state's classifier.
+        hits = self.intents.scan(text)
+        if any(hit.intent == HANDOVER and not negated(text, hit) for hit in hits):
+            conversation.owner = Owner.HUMAN
+            conversation.status = ConversationStatus.HANDOVER
+            return [OutboundMessage(conversation.conversation_id, conversation.contact_id, REPLY_HANDOVER)], []
+
+        node = self.dispatch.get(conversation.state)
+        if node is None:
+            # Closed (or unknown) state: nothing left to ask.
+            return [], []
 
+        symbol = node.classify(text, hits) if node.classify else ANY
+        if node.record_as:
+            setattr(conversation, node.record_as, symbol)
+        transition = node.transitions.get(symbol, node.fallback)
+        if transition is None:
+            return [], []
+        for attribute, value in transition.updates:
+            setattr(conversation, attribute, value)
+        if transition.next_state:
+            conversation.state = transition.next_state
+        out = [OutboundMessage(conversation.conversation_id, conversation.contact_id, transition.reply)]
+        tasks = transition.schedule(conversation, inbound.received_at) if transition.schedule else []
         return out, tasks
 
+    @staticmethod
+    def is_settled(conversation: Conversation) -> bool:
+        """Closed or handed to a human; earlier follow-ups no longer apply."""
+        return conversation.state == ConversationState.CLOSED or conversation.owner == Owner.HUMAN
+
     @staticmethod
     def can_send_session_message(conversation: Conversation, now: datetime) -> bool:
         expiry = conversation.service_window_expires_at
@@ -134,31 +130,120 @@ class BotEngine:
         return time(7, 0) <= now.time() <= time(23, 0)
 
     @staticmethod
-    def _parse_lead_bucket(text: str) -> str:
-        digits = "".join(ch for ch in text if ch.isdigit())
-        if not digits:
-            return "unknown"
-        value = int(digits)
+    def _classify_yes_no(text: str, hits: list[Hit]) -> str:
+        # The earliest answer wins: "noch nicht, aber bald ja" is a no.
+        return _YES_NO.get(first_of(hits, _YES_NO), AdsRunning.UNKNOWN)
+
+    @staticmethod
+    def _parse_lead_bucket(text: str, hits: list[Hit]) -> str:
+        value = extract_quantity(text)
+        if value is None:
+            return LeadsBucket.UNKNOWN
         if value < 100:
-            return "<100"
+            return LeadsBucket.UNDER_100
         if value <= 300:
-            return "100-300"
-        return "300+"
+            return LeadsBucket.FROM_100_TO_300
+        return LeadsBucket.OVER_300
 
     @staticmethod
     def _default_followups(conversation: Conversation, base: datetime) -> list[ScheduledTask]:
-        return [
-            ScheduledTask(conversation.conversation_id, "nudge_30m", base + timedelta(minutes=30)),
-            ScheduledTask(conversation.conversation_id, "followup_24h", base + timedelta(hours=24)),
-            ScheduledTask(conversation.conversation_id, "followup_48h", base + timedelta(hours=48)),
-        ]
+        conversation_id = conversation.conversation_id
+        return [ScheduledTask(conversation_id, task_type, base + offset) for task_type, offset in FOLLOWUP_OFFSETS]
 
     @staticmethod
     def _appointment_reminders(conversation: Conversation, base: datetime) -> list[ScheduledTask]:
         # demo: assumes meeting at +3 days
-        meeting = base + timedelta(days=3)
-        return [
-            ScheduledTask(conversation.conversation_id, "reminder_22h", meeting - timedelta(hours=22)),
-            ScheduledTask(conversation.conversation_id, "reminder_55m", meeting - timedelta(minutes=55)),
-            ScheduledTask(conversation.conversation_id, "reminder_5m", meeting - timedelta(minutes=5)),
-        ]
+        meeting = base + MEETING_OFFSET
+        conversation_id = conversation.conversation_id
+        return [ScheduledTask(conversation_id, task_type, meeting - lead) for task_type, lead in REMINDER_LEADS]
+
+
+_YES_NO = {YES: AdsRunning.YES, NO: AdsRunning.NO, UNSURE: AdsRunning.UNKNOWN}
+
+DEFAULT_INTENTS = IntentMatcher()
+
+# Per-state input classifier and the conversation field the symbol is recorded in.
+CLASSIFIERS: dict[str, tuple[Classifier, str | None]] = {
+    ConversationState.AWAITING_ADS: (BotEngine._classify_yes_no, None),
+    ConversationState.AWAITING_LEADS: (BotEngine._parse_lead_bucket, "monthly_leads_bucket"),
+}
+
+_QUALIFIED = (("status", ConversationStatus.QUALIFIED),)
+
+TRANSITIONS: tuple[Transition, ...] = (
+    Transition(
+        ConversationState.AWAITING_CONSENT_ACK,
+        ANY,
+        REPLY_ASK_ADS,
+        ConversationState.AWAITING_ADS,
+        schedule=BotEngine._default_followups,
+    ),
+    Transition(
+        ConversationState.AWAITING_ADS,
+        AdsRunning.NO,
+        REPLY_NO_ADS,
+        ConversationState.CLOSED,
+        updates=(("ads_running", AdsRunning.NO), ("status", ConversationStatus.DISQUALIFIED)),
+    ),
+    Transition(
+        ConversationState.AWAITING_ADS,
+        AdsRunning.YES,
+        REPLY_ASK_LEADS,
+        ConversationState.AWAITING_LEADS,
+        updates=(("ads_running", AdsRunning.YES),),
+    ),
+    Transition(ConversationState.AWAITING_ADS, ANY, REPLY_REPEAT_ADS),
+    Transition(
+        ConversationState.AWAITING_LEADS,
+        LeadsBucket.UNDER_100,
+        REPLY_TOO_FEW_LEADS,
+        ConversationState.CLOSED,
+        updates=(("status", ConversationStatus.DISQUALIFIED),),
+    ),
+    Transition(
+        ConversationState.AWAITING_LEADS,
+        LeadsBucket.FROM_100_TO_300,
+        REPLY_QUALIFIED,
+        ConversationState.CLOSED,
+        updates=_QUALIFIED,
+        schedule=BotEngine._appointment_reminders,
+    ),
+    Transition(
+        ConversationState.AWAITING_LEADS,
+        LeadsBucket.OVER_300,
+        REPLY_QUALIFIED,
+        ConversationState.CLOSED,
+        updates=_QUALIFIED,
+        schedule=BotEngine._appointment_reminders,
+    ),
+    Transition(ConversationState.AWAITING_LEADS, ANY, REPLY_REPEAT_LEADS),
+)
+
+
+def compile_transitions(
+    transitions: tuple[Transition, ...],
+    classifiers: dict[str, tuple[Classifier, str | None]],
+) -> dict[str, StateNode]:
+    """Build the state -> node dispatch dict used by ``BotEngine.process_inbound``."""
+    by_state: dict[str, list[Transition]] = {}
+    for transition in transitions:
+        by_state.setdefault(transition.state, []).append(transition)
+    dispatch: dict[str, StateNode] = {}
+    for state, rows in by_state.items():
+        classify, record_as = classifiers.get(state, (None, None))
+        table: dict[str, Transition] = {}
+        fallback: Transition | None = None
+        for row in rows:
+            if row.symbol == ANY:
+                fallback = row
+            elif row.symbol in table:
+                raise ValueError(f"Duplicate transition for {state}/{row.symbol}")
+            else:
+                table[row.symbol] = row
+        if table and classify is None:
+            raise ValueError(f"State {state} has symbol transitions but no classifier")
+        dispatch[state] = StateNode(classify, record_as, table, fallback)
+    return dispatch
+
+
+DISPATCH = compile_transitions(TRANSITIONS, CLASSIFIERS)
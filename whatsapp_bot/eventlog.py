@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import gc
+import json
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from .audit import DEFAULT_SEGMENT_SIZE, AuditLog
+from .models import Contact, Conversation, InboundMessage, OutboundMessage, ScheduledTask
+from .rows import (
+    contact_from_row,
+    contact_row,
+    conversation_from_row,
+    conversation_row,
+    decode_datetime,
+    encode,
+    message_from_row,
+    message_row,
+    task_from_row,
+    task_row,
+)
+from .store import InMemoryStore
+
+LOG_FILE = "events.log"
+SNAPSHOT_FILE = "snapshot.jsonl"
+AUDIT_DIR = "audit"
+# Rows per snapshot line; one json decode call handles a whole chunk in C.
+SNAPSHOT_CHUNK = 10_000
+
+
+class EventLog:
+    """Append-only JSONL log with group commit.
+
+    ``append`` only buffers the record dicts; a background thread encodes and
+    writes the buffer every ``flush_interval`` seconds, so callers never wait
+    on serialization or disk I/O. Records still in the buffer are lost on a
+    crash, which bounds data loss to one interval. Records must not be mutated
+    after they are appended.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.05, fsync: bool = False) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._file = open(path, "ab")
+        self._buffer: list[dict] = []
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        if flush_interval > 0:
+            self._thread = threading.Thread(target=self._run, name="eventlog-flusher", daemon=True)
+            self._thread.start()
+
+    def append(self, records: Iterable[dict]) -> None:
+        with self._lock:
+            self._buffer.extend(records)
+        if self.flush_interval <= 0:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._io_lock:
+            with self._lock:
+                records, self._buffer = self._buffer, []
+            if not records:
+                return
+            self._file.write("".join([encode(r) + "\n" for r in records]).encode("utf-8"))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def truncate(self) -> None:
+        """Drop every buffered and written record; only safe right after a snapshot."""
+        with self._io_lock:
+            with self._lock:
+                self._buffer = []
+            self._file.truncate(0)
+            self._file.seek(0)
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
+        self._file.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """Stream records from a JSONL file through a read-only memory map.
+
+    A torn final line from a crash mid-write is ignored.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        readline = mm.readline
+        decode = json.JSONDecoder().decode
+        while True:
+            line = readline()
+            if not line.endswith(b"\n"):
+                return
+            yield decode(line.decode("utf-8"))
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    # Snapshots and recovery churn through millions of container objects;
+    # generational collections triggered along the way only rescan live state.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class DurableStore(InMemoryStore):
+    """``InMemoryStore`` that logs every mutation and restarts from snapshot + log tail.
+
+    Log records are ``{"seq", "op", "row"}`` dicts. ``snapshot`` writes the full
+    state as chunked positional rows tagged with the last sequence number and
+    then truncates the log; on startup the snapshot is read through a memory
+    map and only log records newer than it are replayed. Records produced
+    inside ``transaction`` reach the log together when the outermost block
+    exits. ``snapshot_every`` takes a snapshot at the end of a transaction once
+    that many records were logged since the previous one; the snapshot is
+    written synchronously, so size it for a quiet moment or call ``snapshot``
+    from a maintenance job instead. Audit events are kept in an ``AuditLog``
+    under ``audit/``; its sealed segments are never part of the snapshot.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        flush_interval: float = 0.05,
+        fsync: bool = False,
+        snapshot_every: int | None = None,
+        audit_segment_size: int = DEFAULT_SEGMENT_SIZE,
+    ) -> None:
+        super().__init__()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        # Sealed audit segments persist themselves; the snapshot carries only the hot rows.
+        self.audit = AuditLog(os.path.join(directory, AUDIT_DIR), audit_segment_size)
+        self.snapshot_every = snapshot_every
+        self._seq = 0
+        self._since_snapshot = 0
+        self._depth = 0
+        self._muted = 0
+        self._pending: list[dict] = []
+        with _gc_paused():
+            self._recover()
+        self.log = EventLog(os.path.join(directory, LOG_FILE), flush_interval, fsync)
+
+    # -- mutation logging -------------------------------------------------
+
+    def _emit(self, op: str, row: object) -> None:
+        self._seq += 1
+        self._since_snapshot += 1
+        record = {"seq": self._seq, "op": op, "row": row}
+        if self._depth:
+            self._pending.append(record)
+        else:
+            self.log.append((record,))
+
+    @contextmanager
+    def _mute(self) -> Iterator[None]:
+        self._muted += 1
+        try:
+            yield
+        finally:
+            self._muted -= 1
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                pending, self._pending = self._pending, []
+                if pending:
+                    self.log.append(pending)
+                if self.snapshot_every and self._since_snapshot >= self.snapshot_every:
+                    self.snapshot()
+
+    def upsert_contact(self, contact: Contact) -> Contact:
+        self._emit("contact", contact_row(contact))
+        return super().upsert_contact(contact)
+
+    def upsert_contacts(self, contacts: Iterable[Contact]) -> None:
+        with self.transaction():
+            for contact in contacts:
+                self.upsert_contact(contact)
+
+    def create_or_get_conversation(self, conversation_id: str, contact_id: str) -> Conversation:
+        created = conversation_id not in self.conversations
+        conversation = super().create_or_get_conversation(conversation_id, contact_id)
+        if created:
+            self._emit("conversation", conversation_row(conversation))
+        return conversation
+
+    def save_conversation(self, conversation: Conversation) -> None:
+        self._emit("conversation", conversation_row(conversation))
+        super().save_conversation(conversation)
+
+    def save_conversations(self, conversations: Iterable[Conversation]) -> None:
+        for conversation in conversations:
+            self.save_conversation(conversation)
+
+    def save_message(self, message: InboundMessage | OutboundMessage) -> None:
+        self._emit("message", message_row(message))
+        super().save_message(message)
+
+    def schedule_tasks(self, tasks: list[ScheduledTask]) -> None:
+        for task in tasks:
+            self._emit("task", task_row(task))
+        super().schedule_tasks(tasks)
+
+    def due_tasks(self, now: datetime) -> list[ScheduledTask]:
+        due = super().due_tasks(now)
+        if due:
+            self._emit("due", now)
+        return due
+
+    def cancel_tasks(self, conversation_id: str, task_type: str | None = None) -> int:
+        cancelled = super().cancel_tasks(conversation_id, task_type)
+        if cancelled:
+            self._emit("cancel", [conversation_id, task_type])
+        return cancelled
+
+    def cancel_contact_tasks(self, contact_id: str) -> int:
+        cancelled = super().cancel_contact_tasks(contact_id)
+        if cancelled and not self._muted:
+            self._emit("cancel_contact", contact_id)
+        return cancelled
+
+    def record_audit(self, event_type: str, contact_id: str, details: dict | None = None) -> None:
+        super().record_audit(event_type, contact_id, details)
+        if not self._muted:
+            self._emit("audit", self.audit.row(-1))
+
+    def record_audits(self, events: Iterable[tuple[str, str, dict | None]]) -> None:
+        start = len(self.audit)
+        super().record_audits(events)
+        if not self._muted:
+            with self.transaction():
+                for index in range(start, len(self.audit)):
+                    self._emit("audit", self.audit.row(index))
+
+    def revoke_consent(self, contact_id: str) -> None:
+        if contact_id not in self.contacts:
+            return
+        # Logged as one record so replay cancels and audits exactly as here.
+        with self._mute():
+            super().revoke_consent(contact_id)
+        self._emit("revoke", [contact_id, self.audit.row(-1)])
+
+    # -- snapshot and recovery --------------------------------------------
+
+    def snapshot(self) -> None:
+        """Write the full state as a compact snapshot and truncate the log."""
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp = path + ".tmp"
+        with _gc_paused(), open(tmp, "w", encoding="utf-8") as f:
+            f.write(encode({"seq": self._seq}) + "\n")
+            for table, rows in (
+                ("contacts", map(contact_row, self.contacts.values())),
+                ("conversations", map(conversation_row, self.conversations.values())),
+                ("messages", map(message_row, self.messages)),
+                ("tasks", map(task_row, self.tasks)),
+                ("audit", self.audit.hot_rows()),
+            ):
+                while chunk := [row for _, row in zip(range(SNAPSHOT_CHUNK), rows)]:
+                    f.write(encode({"table": table, "rows": chunk}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        # Every logged record, buffered or written, is covered by the snapshot.
+        self.log.truncate()
+        self._since_snapshot = 0
+
+    def close(self) -> None:
+        self.log.close()
+
+    def _recover(self) -> None:
+        snapshot_seq = 0
+        for chunk in read_records(os.path.join(self.directory, SNAPSHOT_FILE)):
+            if "seq" in chunk:
+                snapshot_seq = chunk["seq"]
+            else:
+                self._load_rows(chunk["table"], chunk["rows"])
+        self._seq = snapshot_seq
+        for record in read_records(os.path.join(self.directory, LOG_FILE)):
+            if record["seq"] > snapshot_seq:
+                self._replay(record["op"], record["row"])
+                self._seq = record["seq"]
+
+    # Recovery calls the InMemoryStore methods directly so nothing is logged twice.
+
+    def _load_rows(self, table: str, rows: list) -> None:
+        if table == "contacts":
+            self.contacts.update((row[0], contact_from_row(row)) for row in rows)
+        elif table == "conversations":
+            by_contact = self.conversations_by_contact
+            for row in rows:
+                self.conversations[row[0]] = conversation_from_row(row)
+                by_contact.setdefault(row[1], set()).add(row[0])
+        elif table == "messages":
+            # Same bookkeeping as InMemoryStore.save_message, unrolled for bulk loads.
+            messages, index, last_inbound = self.messages, self.message_index, self.last_inbound_index
+            offset = len(messages)
+            for row in rows:
+                messages.append(message_from_row(row))
+                index.setdefault(row[1], []).append(offset)
+                if row[0] == 0:
+                    last_inbound[row[2]] = offset
+                offset += 1
+        elif table == "tasks":
+            self.tasks.push_many(map(task_from_row, rows))
+        elif table == "audit":
+            for row in rows:
+                self.audit.restore(row)
+        else:
+            raise ValueError(f"Unknown snapshot table: {table}")
+
+    def _replay(self, op: str, row) -> None:
+        if op == "contact":
+            InMemoryStore.upsert_contact(self, contact_from_row(row))
+        elif op == "conversation":
+            InMemoryStore.create_or_get_conversation(self, row[0], row[1])
+            InMemoryStore.save_conversation(self, conversation_from_row(row))
+        elif op == "message":
+            InMemoryStore.save_message(self, message_from_row(row))
+        elif op == "task":
+            InMemoryStore.schedule_tasks(self, [task_from_row(row)])
+        elif op == "due":
+            InMemoryStore.due_tasks(self, decode_datetime(row))
+        elif op == "cancel":
+            InMemoryStore.cancel_tasks(self, row[0], row[1])
+        elif op == "cancel_contact":
+            InMemoryStore.cancel_contact_tasks(self, row)
+        elif op == "audit":
+            self.audit.restore(row)
+        elif op == "revoke":
+            with self._mute():
+                InMemoryStore._revoke(self, row[0])
+            self.audit.restore(row[1])
+        else:
+            raise ValueError(f"Unknown event log record: {op}")
@@ -0,0 +1,192 @@
+"""Streaming bulk import of contacts and consent revocations.
+
+Records are read lazily from CSV or JSONL line iterators and written in
+batches, so memory stays bounded by ``batch_size`` whatever the file size.
+Each batch is one store transaction holding the contact upserts and their
+audit records. Consent is opt-in: a row without a ``consent_granted`` value
+imports as not consented.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Mapping, NamedTuple
+
+from .models import Contact
+from .store import Store
+
+E164 = re.compile(r"^\+[1-9]\d{1,14}$")
+DEFAULT_BATCH_SIZE = 1000
+# Rejected rows kept for the report; the rest are only counted.
+MAX_ERRORS = 100
+
+_TRUE = frozenset(("1", "true", "yes", "y", "ja"))
+_FALSE = frozenset(("0", "false", "no", "n", "nein", ""))
+
+Progress = Callable[["ImportStats"], None]
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    imported: int = 0
+    revoked: int = 0
+    rejected: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def reject(self, row: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((row, reason))
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[dict[str, str]]:
+    """Rows of a CSV export with a header line, as dicts."""
+    return csv.DictReader(lines)
+
+
+class MalformedRecord(NamedTuple):
+    """Stands in for a line ``read_jsonl`` could not decode, so consumers can reject it by row."""
+
+    reason: str
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterator[dict | MalformedRecord]:
+    """One JSON object per non-blank line; undecodable lines come out as ``MalformedRecord``."""
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield MalformedRecord(f"invalid JSON: {exc.msg}")
+
+
+def read_file(path: str) -> Iterator[dict | MalformedRecord]:
+    """Stream records from ``path``; ``.jsonl``/``.ndjson`` are JSON lines, anything else CSV."""
+    reader = read_jsonl if path.endswith((".jsonl", ".ndjson")) else read_csv
+    with open(path, encoding="utf-8", newline="") as f:
+        yield from reader(f)
+
+
+def normalize_e164(value: str) -> str:
+    """Strip formatting characters and a ``00`` prefix; raises ValueError unless the result is E.164."""
+    number = re.sub(r"[\s\-().]", "", value or "")
+    if number.startswith("00"):
+        number = "+" + number[2:]
+    if not E164.match(number):
+        raise ValueError(f"invalid E.164 number {value!r}")
+    return number
+
+
+def _consent(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"invalid consent flag {value!r}")
+
+
+def contact_from_record(record: Mapping) -> Contact:
+    """Build a Contact from an import row; raises ValueError for unusable rows."""
+    if isinstance(record, MalformedRecord):
+        raise ValueError(record.reason)
+    if not isinstance(record, Mapping):
+        raise ValueError("record must be an object")
+    contact_id = str(record.get("contact_id") or "").strip()
+    if not contact_id:
+        raise ValueError("missing contact_id")
+    return Contact(
+        contact_id=contact_id,
+        whatsapp_e164=normalize_e164(str(record.get("whatsapp_e164") or "")),
+        first_name=str(record.get("first_name") or "").strip(),
+        timezone=str(record.get("timezone") or "").strip() or "Europe/Berlin",
+        consent_granted=_consent(record.get("consent_granted", False)),
+    )
+
+
+def import_contacts(
+    store: Store,
+    records: Iterable[Mapping],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Progress | None = None,
+) -> ImportStats:
+    """Validate and upsert contacts in batches, auditing granted consent like ``register_contact``.
+
+    Invalid rows are counted and skipped; ``progress`` is called after every batch.
+    """
+    stats = ImportStats()
+    batch: dict[str, Contact] = {}
+    for row, record in enumerate(records, 1):
+        stats.rows = row
+        try:
+            contact = contact_from_record(record)
+        except ValueError as exc:
+            stats.reject(row, str(exc))
+            continue
+        # A later row for the same contact wins, as it would with one call per row.
+        batch[contact.contact_id] = contact
+        if len(batch) >= batch_size:
+            _write_contacts(store, batch, stats, progress)
+    if batch:
+        _write_contacts(store, batch, stats, progress)
+    return stats
+
+
+def _write_contacts(store: Store, batch: dict[str, Contact], stats: ImportStats, progress: Progress | None) -> None:
+    contacts = list(batch.values())
+    batch.clear()
+    with store.transaction():
+        store.upsert_contacts(contacts)
+        store.record_audits(("consent_granted", c.contact_id, None) for c in contacts if c.consent_granted)
+    stats.imported += len(contacts)
+    if progress is not None:
+        progress(stats)
+
+
+def revoke_contacts(
+    store: Store,
+    contact_ids: Iterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Progress | None = None,
+) -> ImportStats:
+    """Revoke consent for a stream of contact ids (blank lines skipped), one transaction per batch.
+
+    Unknown ids are counted as rejected.
+    """
+    stats = ImportStats()
+    batch: list[str] = []
+    for row, contact_id in enumerate(contact_ids, 1):
+        stats.rows = row
+        contact_id = contact_id.strip()
+        if contact_id:
+            batch.append(contact_id)
+        if len(batch) >= batch_size:
+            _revoke_batch(store, batch, stats, progress)
+    if batch:
+        _revoke_batch(store, batch, stats, progress)
+    return stats
+
+
+def _revoke_batch(store: Store, batch: list[str], stats: ImportStats, progress: Progress | None) -> None:
+    revoked = store.revoke_consents(batch)
+    stats.revoked += revoked
+    stats.rejected += len(set(batch)) - revoked
+    batch.clear()
+    if progress is not None:
+        progress(stats)
@@ -0,0 +1,205 @@
+"""Keyword intents and quantities in free-text replies.
+
+``IntentMatcher`` compiles an intent -> phrases vocabulary into one
+Aho-Corasick automaton. A scan is a single pass over the message, so its
+cost depends on the message length and the number of hits, not on the
+vocabulary size. Phrases match whole words only. Overlapping hits resolve
+leftmost-longest: "keine ahnung" shadows a "keine" inside it, and "i don't
+know" shadows "don't". ``negated`` tells whether a hit is denied by a
+negation shortly before it ("kein mitarbeiter nötig").
+
+``extract_ranges`` is the matching single-pass reader for numbers. It
+understands thousands separators ("1.000", "1,000"), decimals ("2,5"),
+k/tsd suffixes and ranges ("100-300", "100 bis 300").
+"""
+from __future__ import annotations
+
+import re
+from collections import deque
+from typing import Iterable, Iterator, Mapping, NamedTuple
+
+HANDOVER, YES, NO, UNSURE = "handover", "yes", "no", "unsure"
+
+# German first, then the languages leads most often answer in.
+DEFAULT_VOCABULARY: dict[str, tuple[str, ...]] = {
+    # No bare "mensch", "kollege", "human" or "agent": they turn up as interjections and in passing.
+    HANDOVER: (
+        "mitarbeiter", "berater", "anrufen", "ruf mich an", "rückruf", "echter mensch", "echten menschen",
+        "mit einem menschen", "mit einem kollegen", "persönlich sprechen", "telefonieren",
+        "call me", "real person", "real human", "a human", "human agent", "live agent", "representative",
+        "speak to someone", "talk to someone",
+        "asesor", "llámame", "conseiller", "appelez-moi", "consulente", "chiamami", "temsilci", "beni ara",
+    ),
+    YES: (
+        "ja", "jaa", "jo", "jap", "jep", "jup", "klar", "ja klar", "sicher", "genau", "natürlich", "aktuell ja",
+        "yes", "yeah", "yep", "yup", "sure", "of course", "si", "sí", "oui", "evet", "👍",
+    ),
+    NO: (
+        "nein", "nee", "nö", "noe", "ne", "noch nicht", "leider nicht", "gar nicht", "nicht wirklich",
+        "aktuell nicht", "momentan nicht", "derzeit nicht", "keine ads",
+        "no", "nope", "not yet", "not really", "don't", "do not", "non", "hayır", "hayir", "👎",
+    ),
+    UNSURE: (
+        "vielleicht", "weiß nicht", "weiss nicht", "keine ahnung", "unsicher", "mal sehen",
+        "maybe", "not sure", "no idea", "i don't know", "quizás", "peut-être", "forse", "belki",
+    ),
+}  # fmt: skip
+
+# Words that deny a hit when they come up to NEGATION_WINDOW words before it in the same clause.
+NEGATIONS = frozenset((
+    "kein", "keine", "keinen", "keinem", "keiner", "nicht", "nie", "ohne",
+    "no", "not", "don't", "dont", "never", "without",
+))  # fmt: skip
+NEGATION_WINDOW = 3
+_CLAUSE_END = re.compile(r"[.,;:!?\n]")
+_WORD = re.compile(r"[\w']+")
+
+
+class Hit(NamedTuple):
+    start: int
+    end: int
+    intent: str
+
+
+class IntentMatcher:
+    """Aho-Corasick automaton over a phrase vocabulary, compiled once and shared."""
+
+    def __init__(self, vocabulary: Mapping[str, Iterable[str]] = DEFAULT_VOCABULARY) -> None:
+        goto: list[dict[str, int]] = [{}]
+        # Per state: (phrase length, intent, needs a word boundary before, needs one after).
+        outputs: list[list[tuple[int, str, bool, bool]]] = [[]]
+        for intent, phrases in vocabulary.items():
+            for phrase in phrases:
+                phrase = _normalize(phrase)
+                if not phrase:
+                    continue
+                state = 0
+                for ch in phrase:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = goto[state][ch] = len(goto)
+                        goto.append({})
+                        outputs.append([])
+                    state = nxt
+                outputs[state].append((len(phrase), intent, phrase[0].isalnum(), phrase[-1].isalnum()))
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                # Merge suffix outputs once here instead of walking dictionary links per hit.
+                outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    def scan(self, text: str) -> list[Hit]:
+        """Non-overlapping whole-word hits, leftmost-longest, in text order.
+
+        Offsets index the casefolded text, which can be longer than ``text`` ("ß" -> "ss").
+        """
+        text = _normalize(text)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found: list[tuple[int, int, str]] = []
+        state = 0
+        n = len(text)
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                end = i + 1
+                for length, intent, word_start, word_end in outputs[state]:
+                    start = end - length
+                    if word_start and start > 0 and text[start - 1].isalnum():
+                        continue
+                    if word_end and end < n and text[end].isalnum():
+                        continue
+                    found.append((start, -length, intent))
+        # Sorted by start, longest first, then greedily kept when not overlapping.
+        found.sort()
+        chosen: list[Hit] = []
+        reached = 0
+        for start, negative_length, intent in found:
+            if start >= reached:
+                reached = start - negative_length
+                chosen.append(Hit(start, reached, intent))
+        return chosen
+
+
+def first_of(hits: Iterable[Hit], intents: Iterable[str]) -> str | None:
+    """Intent of the earliest hit among ``intents``."""
+    wanted = frozenset(intents)
+    for hit in hits:
+        if hit.intent in wanted:
+            return hit.intent
+    return None
+
+
+def negated(text: str, hit: Hit) -> bool:
+    """Whether a negation within ``NEGATION_WINDOW`` words before ``hit``, in its clause, denies it."""
+    clause = _CLAUSE_END.split(_normalize(text)[: hit.start])[-1]
+    return any(word in NEGATIONS for word in _WORD.findall(clause)[-NEGATION_WINDOW:])
+
+
+def _normalize(text: str) -> str:
+    return text.casefold().replace("’", "'")
+
+
+_NUMBER = r"(\d{1,3}(?:[.,']\d{3})+(?!\d)|\d+(?:[.,]\d+)?)\s*(k\b|tsd\b\.?|tausend\b|thousand\b)?"
+_QUANTITY = re.compile(rf"{_NUMBER}(?:\s*(?:-|–|—|bis|to|a|à)\s*{_NUMBER})?", re.IGNORECASE)
+_TIME_UNIT = re.compile(
+    r"\s*(?:tage?n?|wochen?|monate?n?|monats|jahre?n?|stunden?|std|minuten|min|"
+    r"days?|weeks?|months?|years?|hours?|minutes?|mins?)\b",
+    re.IGNORECASE,
+)
+_YEAR = re.compile(r"(?:19|20)\d\d")
+
+
+def _number(digits: str) -> float:
+    if re.fullmatch(r"\d{1,3}(?:[.,']\d{3})+", digits):
+        return float(re.sub(r"\D", "", digits))
+    return float(digits.replace(",", "."))
+
+
+def _matched_ranges(text: str) -> Iterator[tuple[re.Match, float, float]]:
+    for match in _QUANTITY.finditer(text):
+        low_digits, low_unit, high_digits, high_unit = match.groups()
+        low = _number(low_digits) * (1000 if low_unit else 1)
+        if high_digits is None:
+            yield match, low, low
+            continue
+        high = _number(high_digits) * (1000 if high_unit else 1)
+        if high_unit and not low_unit and low * 1000 <= high:
+            # "1-2k" means 1000-2000.
+            low *= 1000
+        yield match, min(low, high), max(low, high)
+
+
+def extract_ranges(text: str) -> list[tuple[float, float]]:
+    """Every number or range in ``text`` as ``(low, high)``; single numbers have ``low == high``."""
+    return [(low, high) for _, low, high in _matched_ranges(text)]
+
+
+def extract_quantity(text: str) -> float | None:
+    """The first count in ``text``; a range counts as its midpoint.
+
+    Spans of time ("12 monate") are skipped, and so are bare years ("2024")
+    unless nothing else is left.
+    """
+    year = None
+    for match, low, high in _matched_ranges(text):
+        if _TIME_UNIT.match(text, match.end()):
+            continue
+        # A bare year is one number without a range or unit; group 1 holds its digits.
+        if match.group(3) is None and match.group(2) is None and _YEAR.fullmatch(match.group(1)):
+            year = year if year is not None else low
+            continue
+        return (low + high) / 2
+    return year
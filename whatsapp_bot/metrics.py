@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from typing import Callable
+
+# Upper bounds in seconds; in-process stages live in the microsecond range.
+DEFAULT_BUCKETS = (
+    5e-6, 10e-6, 25e-6, 50e-6, 100e-6, 250e-6, 500e-6,
+    1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3, 100e-3, 250e-3, 1.0,
+)  # fmt: skip
+
+COUNTER, GAUGE = "counter", "gauge"
+
+Labels = tuple[tuple[str, str], ...]
+Collector = Callable[[], dict[str, float]]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; ``counts[i]`` holds observations in bucket ``i`` only."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                return lower + (self.bounds[i] - lower) * (rank - seen) / n
+            seen += n
+            lower = self.bounds[i] if i < len(self.bounds) else lower
+        return self.bounds[-1]
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        total = 0
+        out = []
+        for bound, n in zip(self.bounds, self.counts):
+            total += n
+            out.append((repr(bound), total))
+        out.append(("+Inf", self.count))
+        return out
+
+
+class StageTimer:
+    """Records the time since the previous lap under ``(operation, stage)``."""
+
+    __slots__ = ("metrics", "operation", "clock", "stages", "started", "last")
+
+    def __init__(self, metrics: Metrics, operation: str) -> None:
+        self.metrics = metrics
+        self.operation = operation
+        self.clock = metrics.clock
+        self.stages = metrics.stages_for(operation)
+        self.started = self.last = self.clock()
+
+    def lap(self, stage: str) -> None:
+        now = self.clock()
+        histogram = self.stages.get(stage) or self.metrics.histogram(self.operation, stage)
+        # Histogram.observe inlined; laps sit on the request path.
+        elapsed = now - self.last
+        histogram.counts[bisect_left(histogram.bounds, elapsed)] += 1
+        histogram.sum += elapsed
+        histogram.count += 1
+        self.last = now
+
+    def done(self) -> None:
+        histogram = self.stages.get("total") or self.metrics.histogram(self.operation, "total")
+        histogram.observe(self.clock() - self.started)
+
+
+class Metrics:
+    """In-process counters, gauges and per-stage latency histograms.
+
+    Instrumented code holds ``Metrics | None`` and skips all work when it is
+    None, so disabled instrumentation costs one comparison per stage. Each
+    lap costs about a microsecond in CPython; ``sample_every=n`` times only
+    every n-th call (histogram counts are then sampled counts) while counters
+    stay exact. Store
+    sizes and other values that already live elsewhere are read lazily by
+    collectors at export time. Not thread-safe; share one instance only under
+    the same lock that serializes calls into the app.
+    """
+
+    def __init__(
+        self,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        clock: Callable[[], float] = time.perf_counter,
+        sample_every: int = 1,
+    ) -> None:
+        if sample_every < 1:
+            raise ValueError("sample_every must be >= 1")
+        self.buckets = buckets
+        self.clock = clock
+        self.sample_every = sample_every
+        self._calls = 0
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+        self._stages: dict[str, dict[str, Histogram]] = {}
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.gauges: dict[tuple[str, Labels], float] = {}
+        self.collectors: list[tuple[str, Collector]] = []
+
+    def timer(self, operation: str) -> StageTimer | None:
+        """Stage timer for one call, or None when this call is not sampled."""
+        if self.sample_every > 1:
+            self._calls += 1
+            if self._calls % self.sample_every:
+                return None
+        return StageTimer(self, operation)
+
+    def stages_for(self, operation: str) -> dict[str, Histogram]:
+        stages = self._stages.get(operation)
+        if stages is None:
+            stages = self._stages[operation] = {}
+        return stages
+
+    def histogram(self, operation: str, stage: str) -> Histogram:
+        histogram = self.histograms.get((operation, stage))
+        if histogram is None:
+            histogram = self.histograms[(operation, stage)] = Histogram(self.buckets)
+            self.stages_for(operation)[stage] = histogram
+        return histogram
+
+    def observe(self, operation: str, stage: str, seconds: float) -> None:
+        self.histogram(operation, stage).observe(seconds)
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def register_collector(self, collector: Collector, kind: str = GAUGE) -> None:
+        """Add a callable whose ``{name: value}`` result is exported as counters or gauges."""
+        if kind not in (COUNTER, GAUGE):
+            raise ValueError(f"Unknown metric kind {kind}")
+        self.collectors.append((kind, collector))
+
+    def _collected(self) -> dict[str, dict[tuple[str, Labels], float]]:
+        values = {COUNTER: dict(self.counters), GAUGE: dict(self.gauges)}
+        for kind, collector in self.collectors:
+            for name, value in collector().items():
+                values[kind][(name, ())] = value
+        return values
+
+    def snapshot(self) -> dict:
+        """Plain-dict view for logs, tests and JSON endpoints."""
+        collected = self._collected()
+        return {
+            "counters": {_series(name, labels): value for (name, labels), value in sorted(collected[COUNTER].items())},
+            "gauges": {_series(name, labels): value for (name, labels), value in sorted(collected[GAUGE].items())},
+            "histograms": {
+                f"{operation}.{stage}": {
+                    "count": h.count,
+                    "sum": h.sum,
+                    "p50": h.quantile(0.5),
+                    "p99": h.quantile(0.99),
+                }
+                for (operation, stage), h in sorted(self.histograms.items())
+            },
+        }
+
+    def render_prometheus(self, prefix: str = "whatsapp_bot") -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+        collected = self._collected()
+        for kind in (COUNTER, GAUGE):
+            by_name: dict[str, list[tuple[Labels, float]]] = {}
+            for (name, labels), value in collected[kind].items():
+                by_name.setdefault(name, []).append((labels, value))
+            for name in sorted(by_name):
+                lines.append(f"# TYPE {prefix}_{name} {kind}")
+                for labels, value in sorted(by_name[name]):
+                    lines.append(f"{prefix}_{_series(name, labels)} {_number(value)}")
+        if self.histograms:
+            metric = f"{prefix}_stage_seconds"
+            lines.append(f"# HELP {metric} Latency of each stage of an app operation.")
+            lines.append(f"# TYPE {metric} histogram")
+            for (operation, stage), h in sorted(self.histograms.items()):
+                labels = f'operation="{operation}",stage="{stage}"'
+                for bound, total in h.cumulative():
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {total}')
+                lines.append(f"{metric}_sum{{{labels}}} {_number(h.sum)}")
+                lines.append(f"{metric}_count{{{labels}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _series(name: str, labels: Labels) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return f"{name}{{{rendered}}}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
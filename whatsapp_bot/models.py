@@ -1,10 +1,98 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from enum import Enum
 
 
-@dataclass
+class Choice(str, Enum):
+    """Closed set of string values.
+
+    Members compare and hash equal to their plain string value, so code and
+    stores may keep using literals, while every model field holding a member
+    points at one shared object instead of a per-row string.
+    """
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class ConversationState(Choice):
+    AWAITING_CONSENT_ACK = "awaiting_consent_ack"
+    AWAITING_ADS = "awaiting_ads"
+    AWAITING_LEADS = "awaiting_leads"
+    CLOSED = "closed"
+
+
+class ConversationStatus(Choice):
+    OPEN = "open"
+    HANDOVER = "handover"
+    DISQUALIFIED = "disqualified"
+    QUALIFIED = "qualified"
+
+
+class Owner(Choice):
+    BOT = "bot"
+    HUMAN = "human"
+
+
+class AdsRunning(Choice):
+    UNKNOWN = "unknown"
+    YES = "yes"
+    NO = "no"
+
+
+class LeadsBucket(Choice):
+    UNKNOWN = "unknown"
+    UNDER_100 = "<100"
+    FROM_100_TO_300 = "100-300"
+    OVER_300 = "300+"
+
+
+class MessageType(Choice):
+    SESSION_TEXT = "session_text"
+    TEMPLATE = "template"
+
+
+class TaskType(Choice):
+    NUDGE_30M = "nudge_30m"
+    FOLLOWUP_24H = "followup_24h"
+    FOLLOWUP_48H = "followup_48h"
+    REMINDER_22H = "reminder_22h"
+    REMINDER_55M = "reminder_55m"
+    REMINDER_5M = "reminder_5m"
+
+
+class _EmptyPayload(Mapping):
+    """Immutable empty mapping shared by every task without a payload."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> str:
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(())
+
+    def __len__(self) -> int:
+        return 0
+
+    def __hash__(self) -> int:
+        return 0
+
+    def __repr__(self) -> str:
+        return "{}"
+
+    def __reduce__(self) -> str:
+        return "EMPTY_PAYLOAD"
+
+
+EMPTY_PAYLOAD: Mapping[str, str] = _EmptyPayload()
+SERVICE_WINDOW = timedelta(hours=24)
+
+
+@dataclass(slots=True)
 class Contact:
     contact_id: str
     whatsapp_e164: str
@@ -13,22 +101,22 @@ class Contact:
     consent_granted: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class Conversation:
     conversation_id: str
     contact_id: str
-    state: str = "awaiting_consent_ack"
-    status: str = "open"
+    state: str = ConversationState.AWAITING_CONSENT_ACK
+    status: str = ConversationStatus.OPEN
     service_window_expires_at: datetime | None = None
-    owner: str = "bot"
-    ads_running: str = "unknown"
-    monthly_leads_bucket: str = "unknown"
+    owner: str = Owner.BOT
+    ads_running: str = AdsRunning.UNKNOWN
+    monthly_leads_bucket: str = LeadsBucket.UNKNOWN
 
     def refresh_service_window(self, inbound_at: datetime) -> None:
-        self.service_window_expires_at = inbound_at + timedelta(hours=24)
+        self.service_window_expires_at = inbound_at + SERVICE_WINDOW
 
 
-@dataclass
+@dataclass(slots=True)
 class InboundMessage:
     provider_message_id: str
     conversation_id: str
@@ -37,18 +125,20 @@ class InboundMessage:
     received_at: datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class OutboundMessage:
     conversation_id: str
     contact_id: str
     content: str
-    message_type: str = "session_text"
+    message_type: str = MessageType.SESSION_TEXT
     template_name: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ScheduledTask:
     conversation_id: str
     task_type: str
     run_at: datetime
-    payload: dict = field(default_factory=dict)
+    payload: Mapping[str, str] = EMPTY_PAYLOAD
+    # Row id in stores that hand out task leases; None for in-memory tasks.
+    task_id: int | None = None
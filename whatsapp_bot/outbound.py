@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Protocol
+
+from .models import OutboundMessage
+
+logger = logging.getLogger(__name__)
+
+# Cloud API default business-number throughput and per-recipient pair limit.
+DEFAULT_SENDER_RATE = 80.0
+DEFAULT_RECIPIENT_RATE = 1 / 6
+# Absorbs float drift in refills so a bucket never reports a sub-nanosecond wait.
+_EPSILON = 1e-9
+
+
+class TokenBucket:
+    """Classic token bucket; ``rate`` tokens per second up to ``burst``."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be positive")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated_at:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def try_take(self, now: float, amount: float = 1.0) -> bool:
+        self._refill(now)
+        if self.tokens + _EPSILON >= amount:
+            self.tokens = max(0.0, self.tokens - amount)
+            return True
+        return False
+
+    def wait_time(self, now: float, amount: float = 1.0) -> float:
+        self._refill(now)
+        deficit = amount - self.tokens
+        return deficit / self.rate if deficit > _EPSILON else 0.0
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+@dataclass(frozen=True)
+class SendResult:
+    ok: bool
+    retryable: bool = False
+    error: str | None = None
+
+
+SEND_OK = SendResult(True)
+# Stands in for results a transport failed to return; delivery is unknown, so no retry.
+NO_RESULT = SendResult(False, error="no result from transport")
+
+
+class Transport(Protocol):
+    """Provider client; returns one result per message, in order."""
+
+    def send_batch(self, messages: list[OutboundMessage]) -> list[SendResult]: ...
+
+
+@dataclass
+class FakeTransport:
+    """In-process provider for tests and benchmarks; records every accepted message."""
+
+    fail: Callable[[OutboundMessage, int], SendResult | None] | None = None
+    sent: list[OutboundMessage] = field(default_factory=list)
+    calls: int = 0
+
+    def send_batch(self, messages: list[OutboundMessage]) -> list[SendResult]:
+        self.calls += 1
+        results: list[SendResult] = []
+        for message in messages:
+            failure = self.fail(message, self.calls) if self.fail else None
+            if failure is None:
+                self.sent.append(message)
+                results.append(SEND_OK)
+            else:
+                results.append(failure)
+        return results
+
+
+@dataclass
+class DispatchStats:
+    enqueued: int = 0
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    throttled: int = 0
+
+
+class OutboundDispatcher:
+    """Rate-limited outbound queue for one business sender number.
+
+    Messages are sent in enqueue order, in batches of up to ``batch_size``, as
+    long as the sender bucket and the recipient's own bucket allow. Messages for
+    a throttled recipient wait without blocking the rest of the queue. Retryable
+    failures come back after exponential backoff with full jitter; others, and
+    messages past ``max_attempts``, go to ``dead_letters``. A transport that
+    raises fails the whole batch retryably; messages it returns no result for
+    are dead-lettered.
+    """
+
+    def __init__(
+        self,
+        transport: Transport,
+        sender_rate: float = DEFAULT_SENDER_RATE,
+        sender_burst: float | None = None,
+        recipient_rate: float = DEFAULT_RECIPIENT_RATE,
+        recipient_burst: float = 1.0,
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: random.Random | None = None,
+    ) -> None:
+        now = clock()
+        self.transport = transport
+        self.sender_bucket = TokenBucket(sender_rate, sender_burst or sender_rate, now)
+        self.recipient_rate = recipient_rate
+        self.recipient_burst = recipient_burst
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.stats = DispatchStats()
+        self.dead_letters: list[tuple[OutboundMessage, SendResult]] = []
+        # Ready queue holds (message, attempts); retries wait in a heap keyed on due time.
+        self._ready: deque[tuple[OutboundMessage, int]] = deque()
+        self._retries: list[tuple[float, int, OutboundMessage, int]] = []
+        self._recipients: dict[str, TokenBucket] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._ready) + len(self._retries)
+
+    def enqueue(self, message: OutboundMessage) -> None:
+        with self._lock:
+            self._ready.append((message, 0))
+            self.stats.enqueued += 1
+        self._wakeup.set()
+
+    def pump(self, now: float | None = None) -> int:
+        """Send whatever the rate limits allow right now; returns messages accepted."""
+        now = self.clock() if now is None else now
+        batch = self._take_batch(now)
+        if not batch:
+            return 0
+        try:
+            results = self.transport.send_batch([message for message, _ in batch])
+        except Exception as exc:
+            # Nothing is known to have gone out: retry the whole batch rather than lose it.
+            logger.exception("transport failed sending %d messages", len(batch))
+            results = [SendResult(False, retryable=True, error=repr(exc))] * len(batch)
+        if len(results) < len(batch):
+            logger.error("transport returned %d results for %d messages", len(results), len(batch))
+            results = [*results, *[NO_RESULT] * (len(batch) - len(results))]
+        accepted = 0
+        with self._lock:
+            for (message, attempts), result in zip(batch, results):
+                if result.ok:
+                    accepted += 1
+                elif result.retryable and attempts + 1 < self.max_attempts:
+                    delay = self.rng.uniform(0, min(self.max_backoff, self.base_backoff * 2**attempts))
+                    heapq.heappush(self._retries, (now + delay, next(self._seq), message, attempts + 1))
+                    self.stats.retried += 1
+                else:
+                    self.dead_letters.append((message, result))
+                    self.stats.failed += 1
+            self.stats.sent += accepted
+        return accepted
+
+    def next_wakeup(self, now: float | None = None) -> float | None:
+        """Seconds until ``pump`` can make progress, or None when idle."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            waits = []
+            if self._ready:
+                wait = self.sender_bucket.wait_time(now)
+                bucket = self._recipients.get(self._ready[0][0].contact_id)
+                if bucket:
+                    wait = max(wait, bucket.wait_time(now))
+                waits.append(wait)
+            if self._retries:
+                waits.append(max(0.0, self._retries[0][0] - now))
+        return min(waits) if waits else None
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def run(self, stop: threading.Event, max_idle: float = 1.0) -> None:
+        """Dispatch loop for a background thread; set ``stop`` and call ``wake`` to end it."""
+        while not stop.is_set():
+            self._wakeup.clear()
+            if self.pump():
+                continue
+            wait = self.next_wakeup()
+            self._wakeup.wait(max_idle if wait is None else min(max_idle, max(wait, 0.001)))
+
+    def _take_batch(self, now: float) -> list[tuple[OutboundMessage, int]]:
+        with self._lock:
+            retries = self._retries
+            while retries and retries[0][0] <= now:
+                _, _, message, attempts = heapq.heappop(retries)
+                self._ready.appendleft((message, attempts))
+
+            batch: list[tuple[OutboundMessage, int]] = []
+            skipped: list[tuple[OutboundMessage, int]] = []
+            ready = self._ready
+            # Bound the look-ahead past throttled recipients.
+            budget = self.batch_size * 4
+            while ready and len(batch) < self.batch_size and budget > 0:
+                budget -= 1
+                item = ready[0]
+                bucket = self._recipient_bucket(item[0].contact_id, now)
+                if bucket.wait_time(now) > 0:
+                    skipped.append(ready.popleft())
+                    self.stats.throttled += 1
+                    continue
+                if not self.sender_bucket.try_take(now):
+                    break
+                bucket.try_take(now)
+                batch.append(ready.popleft())
+            ready.extendleft(reversed(skipped))
+            if len(self._recipients) > 4 * (len(ready) + 1024):
+                self._prune_recipients(now)
+            return batch
+
+    def _recipient_bucket(self, contact_id: str, now: float) -> TokenBucket:
+        bucket = self._recipients.get(contact_id)
+        if bucket is None:
+            bucket = TokenBucket(self.recipient_rate, self.recipient_burst, now)
+            self._recipients[contact_id] = bucket
+        return bucket
+
+    def _prune_recipients(self, now: float) -> None:
+        # A full bucket behaves exactly like a fresh one, so it can be dropped.
+        self._recipients = {cid: b for cid, b in self._recipients.items() if not b.is_full(now)}
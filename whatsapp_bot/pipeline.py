@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Sequence
+
+from .app import WhatsAppBotApp
+from .models import InboundMessage, OutboundMessage
+
+_STOP = object()
+
+
+def shard_for(conversation_id: str, shards: int) -> int:
+    """Stable shard index for a conversation, identical across processes."""
+    return zlib.crc32(conversation_id.encode("utf-8")) % shards
+
+
+class AsyncIngestPipeline:
+    """asyncio front end for ``WhatsAppBotApp.receive_inbound``.
+
+    Inbound messages are sharded by ``conversation_id`` onto bounded per-worker
+    queues, so each conversation is processed strictly in order. ``submit``
+    waits when the target queue is full, which pushes backpressure to the
+    webhook handler.
+
+    App calls run off the event loop on one store thread per app, and an app,
+    its store and its dedupe cache are only ever used from that thread, so none
+    of them needs to be thread-safe. Pass a single app and every shard shares
+    its thread: conversations are queued independently but their store calls
+    run one at a time. Pass one app per shard (each with its own store shard,
+    like ``ShardedSupervisor`` workers) and shards run concurrently, so a slow
+    store write stalls only the conversations of its own shard. Contacts must
+    then be registered with every app.
+    """
+
+    def __init__(
+        self,
+        app: WhatsAppBotApp | Sequence[WhatsAppBotApp],
+        workers: int = 8,
+        queue_size: int = 1024,
+    ) -> None:
+        apps = [app] * workers if isinstance(app, WhatsAppBotApp) else list(app)
+        if not apps:
+            raise ValueError("workers must be positive")
+        self.apps = apps
+        self.workers = len(apps)
+        self.queue_size = queue_size
+        self._executors: list[ThreadPoolExecutor] = []
+        self._queues: list[asyncio.Queue] = []
+        self._tasks: list[asyncio.Task] = []
+        self._closing = False
+
+    @property
+    def app(self) -> WhatsAppBotApp:
+        """The app of shard 0; the only app when the pipeline was given one."""
+        return self.apps[0]
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks) and not self._closing
+
+    def pending(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    async def start(self) -> None:
+        if self._tasks:
+            raise RuntimeError("pipeline already started")
+        self._closing = False
+        threads: dict[int, ThreadPoolExecutor] = {}
+        for app in self.apps:
+            if id(app) not in threads:
+                threads[id(app)] = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-store")
+        self._executors = [threads[id(app)] for app in self.apps]
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.apps]
+        self._tasks = [asyncio.create_task(self._worker(shard)) for shard in range(self.workers)]
+
+    async def submit(self, inbound: InboundMessage) -> asyncio.Future[list[OutboundMessage]]:
+        """Enqueue ``inbound`` and return a future for its outbound messages."""
+        if not self.running:
+            raise RuntimeError("pipeline is not running")
+        future: asyncio.Future[list[OutboundMessage]] = asyncio.get_running_loop().create_future()
+        await self._queues[shard_for(inbound.conversation_id, self.workers)].put((inbound, future))
+        return future
+
+    async def process(self, inbound: InboundMessage) -> list[OutboundMessage]:
+        return await (await self.submit(inbound))
+
+    async def close(self) -> None:
+        """Stop accepting messages, drain every queue and wait for the workers."""
+        if not self._tasks:
+            return
+        self._closing = True
+        for queue in self._queues:
+            await queue.put(_STOP)
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+        self._queues = []
+        for executor in set(self._executors):
+            executor.shutdown()
+        self._executors = []
+
+    async def __aenter__(self) -> AsyncIngestPipeline:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def _worker(self, shard: int) -> None:
+        loop = asyncio.get_running_loop()
+        queue, executor, app = self._queues[shard], self._executors[shard], self.apps[shard]
+        while True:
+            item = await queue.get()
+            if item is _STOP:
+                return
+            inbound, future = item
+            call = loop.run_in_executor(executor, _receive, app, inbound)
+            # Wait rather than await: the exception then reaches the submitter without
+            # this worker's frame in its traceback, so clearing it cannot close the worker.
+            await asyncio.wait((call,))
+            if future.done():
+                continue
+            exc = call.exception()
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(call.result())
+
+
+def _receive(app: WhatsAppBotApp, inbound: InboundMessage) -> list[OutboundMessage]:
+    return app.receive_inbound(
+        inbound.provider_message_id,
+        inbound.conversation_id,
+        inbound.contact_id,
+        inbound.content,
+        inbound.received_at,
+    )
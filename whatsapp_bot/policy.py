@@ -1,9 +1,19 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, time
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from .models import Conversation
+from .models import Contact, Conversation, MessageType
+
+SEND_WINDOW_START = time(7, 0)
+SEND_WINDOW_END = time(23, 0)
+# Every real-world DST transition falls on a quarter hour, so an offset looked
+# up at the start of a quarter-hour bucket holds for the whole bucket.
+_OFFSET_BUCKET_SECONDS = 15 * 60
+_EPOCH = datetime(1970, 1, 1)
 
 
 @dataclass(frozen=True)
@@ -12,27 +22,96 @@ class SendDecision:
     reason: str
 
 
+SEND_ALLOWED = SendDecision(True, "ok")
+BLOCKED_OUTSIDE_WINDOW = SendDecision(False, "outside_allowed_send_window")
+BLOCKED_TEMPLATE_REQUIRED = SendDecision(False, "template_required_outside_24h")
+
+
+@lru_cache(maxsize=None)
+def _zone(name: str) -> ZoneInfo | timezone:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+@lru_cache(maxsize=4096)
+def _bucket_offset(name: str, bucket: int) -> timedelta:
+    at = datetime.fromtimestamp(bucket * _OFFSET_BUCKET_SECONDS, timezone.utc)
+    return at.astimezone(_zone(name)).utcoffset() or timedelta(0)
+
+
+def utc_offset(name: str, now: datetime) -> timedelta:
+    """UTC offset of time zone ``name`` at naive-UTC ``now``; unknown zones count as UTC."""
+    bucket = int((now - _EPOCH).total_seconds()) // _OFFSET_BUCKET_SECONDS
+    return _bucket_offset(name, bucket)
+
+
 class PolicyEngine:
     """Enforces WhatsApp send guardrails for MVP."""
 
     @staticmethod
     def in_allowed_send_window(now: datetime) -> bool:
-        return time(7, 0) <= now.time() <= time(23, 0)
+        return SEND_WINDOW_START <= now.time() <= SEND_WINDOW_END
 
     @staticmethod
     def evaluate_send(
         conversation: Conversation,
         now: datetime,
         message_type: str,
+        timezone_name: str | None = None,
     ) -> SendDecision:
-        if not PolicyEngine.in_allowed_send_window(now):
-            return SendDecision(False, "outside_allowed_send_window")
+        """Decide one send; with ``timezone_name``, ``now`` is naive UTC and the
+        window is checked in that zone, otherwise ``now`` is taken as local time."""
+        local = now + utc_offset(timezone_name, now) if timezone_name else now
+        if not PolicyEngine.in_allowed_send_window(local):
+            return BLOCKED_OUTSIDE_WINDOW
 
-        if message_type == "template":
-            return SendDecision(True, "ok")
+        if message_type == MessageType.TEMPLATE:
+            return SEND_ALLOWED
 
         expiry = conversation.service_window_expires_at
         if expiry and now <= expiry:
-            return SendDecision(True, "ok")
+            return SEND_ALLOWED
+
+        return BLOCKED_TEMPLATE_REQUIRED
 
-        return SendDecision(False, "template_required_outside_24h")
+    @staticmethod
+    def evaluate_send_batch(
+        sends: Iterable[tuple[Conversation, Contact, str]],
+        now: datetime,
+    ) -> list[SendDecision]:
+        """Decide a whole scheduler tick at naive-UTC ``now`` in one pass.
+
+        Each contact's send window is checked in ``Contact.timezone``. The
+        local clock time is worked out once per distinct time zone in the batch.
+        """
+        in_window: dict[str, bool] = {}
+        decisions: list[SendDecision] = []
+        for conversation, contact, message_type in sends:
+            tz = contact.timezone
+            allowed = in_window.get(tz)
+            if allowed is None:
+                local = (now + utc_offset(tz, now)).time()
+                allowed = in_window[tz] = SEND_WINDOW_START <= local <= SEND_WINDOW_END
+            if not allowed:
+                decisions.append(BLOCKED_OUTSIDE_WINDOW)
+            elif message_type == MessageType.TEMPLATE:
+                decisions.append(SEND_ALLOWED)
+            else:
+                expiry = conversation.service_window_expires_at
+                decisions.append(SEND_ALLOWED if expiry and now <= expiry else BLOCKED_TEMPLATE_REQUIRED)
+        return decisions
+
+    @staticmethod
+    def next_allowed_send_at(now: datetime, timezone_name: str) -> datetime:
+        """Earliest naive-UTC time at or after ``now`` inside the ``timezone_name`` send window."""
+        zone = _zone(timezone_name)
+        local = now.replace(tzinfo=timezone.utc).astimezone(zone)
+        if SEND_WINDOW_START <= local.time() <= SEND_WINDOW_END:
+            return now
+        day = local.date()
+        if local.time() > SEND_WINDOW_END:
+            day += timedelta(days=1)
+        opens = datetime.combine(day, SEND_WINDOW_START, tzinfo=zone)
+        return opens.astimezone(timezone.utc).replace(tzinfo=None)
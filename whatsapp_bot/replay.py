@@ -0,0 +1,322 @@
+"""Replay recorded webhook traffic through ``WhatsAppBotApp`` under a virtual clock.
+
+Records are JSON objects in the server's camelCase shape, one per line, in
+time order:
+
+- ``{"type": "inbound", "providerMessageId", "conversationId", "contactId", "content", "receivedAt"}``.
+  ``type`` may be omitted for inbound webhooks.
+- ``{"type": "contact", "contactId", "whatsappE164", "firstName", "timezone", "at"}``
+- ``{"type": "revoke", "contactId", "at"}``
+
+``Replay`` never sleeps and never polls. Before each record it runs the
+scheduler at every pending ``run_at`` up to the record's timestamp, with the
+virtual clock set exactly to that ``run_at``. Once the records are exhausted,
+``drain`` keeps ticking until no tasks are left. The app's dedupe cache should
+read the same clock, so provider redeliveries expire by recorded time rather
+than by wall time. ``make_app`` wires that up.
+
+Every message the app sends reaches ``on_send`` with its virtual send time.
+``ReplayStats`` counts the work and reports wall-clock throughput and the
+replay speedup over recorded time.
+
+Run from the repository root::
+
+    python -m whatsapp_bot.replay events.jsonl --timeline sent.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterable, Mapping
+
+from .app import WhatsAppBotApp
+from .dedupe import TTLDedupeCache
+from .engine import BotEngine
+from .importer import MAX_ERRORS, MalformedRecord, read_jsonl
+from .models import Contact, OutboundMessage
+from .rows import parse_timestamp
+from .server import contact_from_json, message_to_json
+from .store import InMemoryStore, Store
+
+INBOUND, CONTACT, REVOKE = "inbound", "contact", "revoke"
+# Source of a sent message in the timeline.
+REPLY, SCHEDULED = "reply", "scheduled"
+
+_EPOCH = datetime(1970, 1, 1)
+# First name of contacts registered on the fly; templates greet them as "Hey du, ...".
+UNKNOWN_FIRST_NAME = "du"
+
+OnSend = Callable[[datetime, str, OutboundMessage], None]
+
+
+class VirtualClock:
+    """Settable time source: ``clock()`` gives naive UTC, ``clock.seconds()`` epoch seconds."""
+
+    def __init__(self, now: datetime = _EPOCH) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def seconds(self) -> float:
+        return (self.now - _EPOCH).total_seconds()
+
+    def advance(self, to: datetime) -> None:
+        """Move forward to ``to``; the clock never runs backwards."""
+        if to > self.now:
+            self.now = to
+
+
+def make_app(clock: VirtualClock, store: Store | None = None) -> WhatsAppBotApp:
+    """A ``WhatsAppBotApp`` whose dedupe TTL runs on ``clock``."""
+    engine = BotEngine(dedupe=TTLDedupeCache(clock=clock.seconds))
+    return WhatsAppBotApp(store=store if store is not None else InMemoryStore(), engine=engine)
+
+
+@dataclass
+class ReplayStats:
+    records: int = 0
+    inbound: int = 0
+    contacts: int = 0
+    revoked: int = 0
+    # Records timestamped before the clock; replayed at their own time without rewinding.
+    late: int = 0
+    rejected: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+    replies: int = 0
+    scheduled_sent: int = 0
+    ticks: int = 0
+    sent_by_template: dict[str, int] = field(default_factory=dict)
+    peak_sent_per_minute: int = 0
+    first_at: datetime | None = None
+    last_at: datetime | None = None
+    started: float = field(default_factory=time.perf_counter)
+    wall_seconds: float = 0.0
+
+    @property
+    def virtual_seconds(self) -> float:
+        if self.first_at is None or self.last_at is None:
+            return 0.0
+        return (self.last_at - self.first_at).total_seconds()
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @property
+    def speedup(self) -> float:
+        """Recorded seconds replayed per wall-clock second."""
+        return self.virtual_seconds / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def reject(self, row: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((row, reason))
+
+    def to_dict(self) -> dict:
+        return {
+            "records": self.records,
+            "inbound": self.inbound,
+            "contacts": self.contacts,
+            "revoked": self.revoked,
+            "late": self.late,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "replies": self.replies,
+            "scheduledSent": self.scheduled_sent,
+            "schedulerTicks": self.ticks,
+            "sentByTemplate": self.sent_by_template,
+            "peakSentPerMinute": self.peak_sent_per_minute,
+            "firstAt": self.first_at.isoformat() if self.first_at else None,
+            "lastAt": self.last_at.isoformat() if self.last_at else None,
+            "virtualSeconds": round(self.virtual_seconds, 3),
+            "wallSeconds": round(self.wall_seconds, 3),
+            "recordsPerSecond": round(self.records_per_second, 1),
+            "speedup": round(self.speedup, 1),
+        }
+
+
+class Replay:
+    """Feeds records to an app in virtual time; see the module docstring for the record shapes.
+
+    Contacts that write without a prior ``contact`` record are registered on the
+    fly, named ``UNKNOWN_FIRST_NAME``, when ``register_unknown`` is set, because
+    webhook recordings rarely carry the CRM side. Otherwise their messages are
+    rejected like the live app rejects them.
+    """
+
+    def __init__(
+        self,
+        app: WhatsAppBotApp | None = None,
+        clock: VirtualClock | None = None,
+        on_send: OnSend | None = None,
+        register_unknown: bool = True,
+    ) -> None:
+        self.clock = clock if clock is not None else VirtualClock()
+        self.app = app if app is not None else make_app(self.clock)
+        self.on_send = on_send
+        self.register_unknown = register_unknown
+        self.stats = ReplayStats()
+        self._minute: datetime | None = None
+        self._sent_this_minute = 0
+
+    def run(
+        self, records: Iterable[Mapping | MalformedRecord], until: datetime | None = None, drain: bool = True
+    ) -> ReplayStats:
+        """Replay every record, then tick through pending tasks up to ``until``.
+
+        With ``drain`` False the replay stops at the last record instead.
+        """
+        for row, record in enumerate(records, 1):
+            self.feed(record, row)
+        return self.drain(until if drain else self.clock.now)
+
+    def feed(self, record: Mapping | MalformedRecord, row: int = 0) -> None:
+        stats = self.stats
+        stats.records += 1
+        if not isinstance(record, Mapping):
+            # read_jsonl passes undecodable lines through as MalformedRecord.
+            stats.reject(row, record.reason if isinstance(record, MalformedRecord) else "record must be a JSON object")
+            return
+        try:
+            kind = record.get("type") or INBOUND
+            at = parse_timestamp(record.get("receivedAt" if kind == INBOUND else "at"))
+            if at is None and kind == INBOUND:
+                raise ValueError("receivedAt is required")
+        except ValueError as exc:
+            stats.reject(row, str(exc))
+            return
+        if at is None:
+            # Untimed contact and revoke records apply at the current virtual time.
+            at = self.clock.now
+        else:
+            self.advance_to(at)
+            if at < self.clock.now:
+                stats.late += 1
+            if stats.first_at is None:
+                stats.first_at = at
+            self._touch(at)
+        try:
+            if kind == INBOUND:
+                self._inbound(record, at)
+            elif kind == CONTACT:
+                self.app.register_contact(contact_from_json(record))
+                stats.contacts += 1
+            elif kind == REVOKE:
+                self.app.revoke_consent(str(record.get("contactId") or ""))
+                stats.revoked += 1
+            else:
+                raise ValueError(f"unknown record type {kind!r}")
+        except ValueError as exc:
+            stats.reject(row, str(exc))
+
+    def _inbound(self, record: Mapping, at: datetime) -> None:
+        contact_id = record.get("contactId")
+        message_id = record.get("providerMessageId")
+        conversation_id = record.get("conversationId")
+        if not all(isinstance(value, str) and value for value in (contact_id, message_id, conversation_id)):
+            raise ValueError("providerMessageId, conversationId and contactId must be non-empty strings")
+        app = self.app
+        if self.register_unknown and app.store.get_contact(contact_id) is None:
+            app.register_contact(Contact(contact_id, "", UNKNOWN_FIRST_NAME))
+        sent = app.receive_inbound(message_id, conversation_id, contact_id, str(record.get("content") or ""), at)
+        self.stats.inbound += 1
+        self.stats.replies += len(sent)
+        for message in sent:
+            self._sent(at, REPLY, message)
+
+    def advance_to(self, at: datetime | None) -> None:
+        """Run a scheduler tick at every task deadline up to ``at``, then set the clock to ``at``.
+
+        With ``at`` None, ticks continue until no tasks are pending.
+        """
+        app, clock, stats = self.app, self.clock, self.stats
+        deadline = app.next_scheduler_deadline()
+        while deadline is not None and (at is None or deadline <= at):
+            clock.advance(deadline)
+            now = clock.now
+            sent = app.run_scheduler(now)
+            stats.ticks += 1
+            stats.scheduled_sent += len(sent)
+            for message in sent:
+                self._sent(now, SCHEDULED, message)
+            self._touch(now)
+            deadline = app.next_scheduler_deadline()
+            if deadline is not None and deadline <= now:
+                # run_scheduler pops everything due at ``now``; a repeat means a task was rescheduled into the past.
+                raise RuntimeError(f"scheduler did not advance past {now.isoformat()}")
+        if at is not None:
+            clock.advance(at)
+
+    def drain(self, until: datetime | None = None) -> ReplayStats:
+        """Tick through pending tasks up to ``until`` (all of them when None) and finish the stats."""
+        self.advance_to(until)
+        self.stats.wall_seconds = time.perf_counter() - self.stats.started
+        return self.stats
+
+    def _touch(self, at: datetime) -> None:
+        stats = self.stats
+        if stats.last_at is None or at > stats.last_at:
+            stats.last_at = at
+
+    def _sent(self, at: datetime, source: str, message: OutboundMessage) -> None:
+        stats = self.stats
+        if message.template_name:
+            stats.sent_by_template[message.template_name] = stats.sent_by_template.get(message.template_name, 0) + 1
+        minute = at.replace(second=0, microsecond=0)
+        if minute != self._minute:
+            self._minute, self._sent_this_minute = minute, 0
+        self._sent_this_minute += 1
+        if self._sent_this_minute > stats.peak_sent_per_minute:
+            stats.peak_sent_per_minute = self._sent_this_minute
+        if self.on_send is not None:
+            self.on_send(at, source, message)
+
+
+def timeline_row(at: datetime, source: str, message: OutboundMessage) -> dict:
+    """JSON form of one sent message for ``--timeline`` output."""
+    return {"at": at.isoformat() + "Z", "source": source, **message_to_json(message)}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded webhooks through WhatsAppBotApp in virtual time.")
+    parser.add_argument("events", help="JSONL file of recorded records, oldest first")
+    parser.add_argument("--timeline", help="write every sent message here as JSON lines")
+    parser.add_argument("--db", help="SQLite database file; in-memory store when omitted")
+    parser.add_argument("--until", help="stop ticking at this ISO timestamp; default drains all pending tasks")
+    parser.add_argument("--no-drain", action="store_true", help="stop at the last record")
+    parser.add_argument(
+        "--strict-contacts", action="store_true", help="reject messages from contacts without a contact record"
+    )
+    args = parser.parse_args(argv)
+
+    clock = VirtualClock()
+    store = None
+    if args.db:
+        from .sqlite_store import SqliteStore
+
+        store = SqliteStore(args.db)
+    timeline = open(args.timeline, "w", encoding="utf-8") if args.timeline else None
+    on_send = None
+    if timeline is not None:
+
+        def on_send(at: datetime, source: str, message: OutboundMessage) -> None:
+            timeline.write(json.dumps(timeline_row(at, source, message), ensure_ascii=False) + "\n")
+
+    replay = Replay(make_app(clock, store), clock, on_send, register_unknown=not args.strict_contacts)
+    try:
+        with open(args.events, encoding="utf-8") as f:
+            replay.run(read_jsonl(f), parse_timestamp(args.until), drain=not args.no_drain)
+    finally:
+        if timeline is not None:
+            timeline.close()
+    json.dump(replay.stats.to_dict(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
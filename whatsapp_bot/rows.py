@@ -0,0 +1,144 @@
+"""Positional row layouts of the model dataclasses and their compact JSON encoding.
+
+The event log and its snapshots store contacts, conversations, messages and
+tasks as these lists rather than dicts, and ``TieredStore`` packs its cold
+conversations the same way. ``*_row`` builds a row, ``*_from_row`` rebuilds
+the model; choice fields come back as the shared enum members.
+``parse_timestamp`` reads the ISO 8601 timestamps clients send, and
+``sortable_timestamp`` writes the fixed-width form ``SqliteStore`` indexes.
+"""
+from __future__ import annotations
+
+import json
+import sys
+from datetime import datetime, timezone
+
+from .models import (
+    AdsRunning,
+    Choice,
+    Contact,
+    Conversation,
+    ConversationState,
+    ConversationStatus,
+    InboundMessage,
+    LeadsBucket,
+    MessageType,
+    OutboundMessage,
+    Owner,
+    ScheduledTask,
+    TaskType,
+)
+
+
+def _json_default(value: object) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+# Compact JSON with datetimes as ISO strings; ``decode_datetime`` reads them back.
+encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=_json_default).encode
+
+
+def sortable_timestamp(value: datetime | None) -> str | None:
+    """Fixed-width ISO text, so lexicographic order equals time order (SQL comparisons)."""
+    return value.isoformat(sep=" ", timespec="microseconds") if value else None
+
+
+def decode_datetime(value: str | None) -> datetime | None:
+    """Inverse of ``encode`` for a datetime field; None and "" stay None."""
+    return datetime.fromisoformat(value) if value else None
+
+
+def parse_timestamp(value: object) -> datetime | None:
+    """ISO 8601 timestamp (``Z`` or offset allowed) as the naive UTC the app works in.
+
+    None and "" give None; anything else that is not such a string raises ValueError.
+    """
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"invalid timestamp {value!r}")
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"invalid timestamp {value!r}") from None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+# Plain dict lookups; attribute access on the enum classes is slow in a hot loop.
+_MEMBERS: dict[type[Choice], dict[str, Choice]] = {
+    kind: dict(kind._value2member_map_)
+    for kind in (ConversationState, ConversationStatus, Owner, AdsRunning, LeadsBucket, MessageType, TaskType)
+}
+
+
+def choice(kind: type[Choice], value: str) -> str:
+    """The shared ``kind`` member for ``value``; unknown values come back interned."""
+    return _MEMBERS[kind].get(value) or sys.intern(value)
+
+
+def contact_row(contact: Contact) -> list:
+    return [contact.contact_id, contact.whatsapp_e164, contact.first_name, contact.timezone, contact.consent_granted]
+
+
+def contact_from_row(row: list) -> Contact:
+    return Contact(row[0], row[1], row[2], row[3], row[4])
+
+
+def conversation_row(conversation: Conversation) -> list:
+    return [
+        conversation.conversation_id,
+        conversation.contact_id,
+        conversation.state,
+        conversation.status,
+        conversation.service_window_expires_at,
+        conversation.owner,
+        conversation.ads_running,
+        conversation.monthly_leads_bucket,
+    ]
+
+
+def conversation_from_row(row: list) -> Conversation:
+    return Conversation(
+        row[0],
+        row[1],
+        choice(ConversationState, row[2]),
+        choice(ConversationStatus, row[3]),
+        decode_datetime(row[4]),
+        choice(Owner, row[5]),
+        choice(AdsRunning, row[6]),
+        choice(LeadsBucket, row[7]),
+    )
+
+
+def message_row(message: InboundMessage | OutboundMessage) -> list:
+    if isinstance(message, InboundMessage):
+        return [
+            0,
+            message.conversation_id,
+            message.contact_id,
+            message.content,
+            message.provider_message_id,
+            message.received_at,
+        ]
+    return [1, message.conversation_id, message.contact_id, message.content, message.message_type, message.template_name]
+
+
+def message_from_row(row: list) -> InboundMessage | OutboundMessage:
+    if row[0] == 0:
+        return InboundMessage(row[4], row[1], row[2], row[3], decode_datetime(row[5]))
+    return OutboundMessage(row[1], row[2], row[3], choice(MessageType, row[4]), row[5])
+
+
+def task_row(task: ScheduledTask) -> list:
+    return [task.conversation_id, task.task_type, task.run_at, dict(task.payload) if task.payload else None]
+
+
+def task_from_row(row: list) -> ScheduledTask:
+    task = ScheduledTask(row[0], choice(TaskType, row[1]), decode_datetime(row[2]))
+    if row[3]:
+        task.payload = row[3]
+    return task
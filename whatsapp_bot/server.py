@@ -0,0 +1,306 @@
+"""HTTP front end for ``WhatsAppBotApp`` with the routes of the Node service.
+
+``BotServer`` handles each connection on its own thread and speaks HTTP/1.1,
+so clients can keep connections alive. Calls into the app are serialized by
+one lock because the app and its stores are not thread-safe. JSON parsing,
+socket I/O and response encoding happen outside that lock. Bodies use the
+Node service's camelCase keys and are decoded straight into the model
+dataclasses. A body larger than ``max_body`` gets 413 without being read.
+Due tasks are sent by a background ``run_scheduler_loop`` thread, and
+``POST /scheduler/run`` remains available for manual ticks.
+
+Run from the repository root::
+
+    python -m whatsapp_bot.server --port 3000 --db bot.db
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import threading
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+from .app import WhatsAppBotApp
+from .models import Contact, Conversation, MessageType, OutboundMessage
+from .rows import parse_timestamp
+
+DEFAULT_MAX_BODY = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class RequestError(ValueError):
+    """Client error carrying the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: HTTPStatus = HTTPStatus.BAD_REQUEST) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _required(body: dict, *keys: str) -> list:
+    missing = [key for key in keys if not body.get(key)]
+    if missing:
+        if len(keys) == 1:
+            raise RequestError(f"{keys[0]} is required")
+        raise RequestError(f"{', '.join(keys[:-1])} and {keys[-1]} are required")
+    return [_string(body, key) for key in keys]
+
+
+def _string(body: dict, key: str) -> str | None:
+    """``body[key]`` if it is a string, None if absent or null; 400 for any other JSON type."""
+    value = body.get(key)
+    if value is not None and not isinstance(value, str):
+        raise RequestError(f"{key} must be a string")
+    return value
+
+
+def contact_from_json(body: dict) -> Contact:
+    contact_id, e164, first_name = _required(body, "contactId", "whatsappE164", "firstName")
+    return Contact(contact_id, e164, first_name, _string(body, "timezone") or "Europe/Berlin")
+
+
+def contact_to_json(contact: Contact) -> dict:
+    return {
+        "contactId": contact.contact_id,
+        "whatsappE164": contact.whatsapp_e164,
+        "firstName": contact.first_name,
+        "timezone": contact.timezone,
+        "consentGranted": contact.consent_granted,
+    }
+
+
+def conversation_to_json(conversation: Conversation) -> dict:
+    expires = conversation.service_window_expires_at
+    return {
+        "conversationId": conversation.conversation_id,
+        "contactId": conversation.contact_id,
+        "state": str(conversation.state),
+        "status": str(conversation.status),
+        "serviceWindowExpiresAt": expires.isoformat() + "Z" if expires else None,
+        "owner": str(conversation.owner),
+        "adsRunning": str(conversation.ads_running),
+        "monthlyLeadsBucket": str(conversation.monthly_leads_bucket),
+    }
+
+
+def message_to_json(message: OutboundMessage) -> dict:
+    return {
+        "conversationId": message.conversation_id,
+        "contactId": message.contact_id,
+        "messageType": str(message.message_type),
+        "templateName": message.template_name,
+        "content": message.content,
+    }
+
+
+class BotServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Keep-alive clients hold a thread each; allow a deep accept queue for bursts.
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        app: WhatsAppBotApp | None = None,
+        max_body: int = DEFAULT_MAX_BODY,
+        scheduler_interval: float | None = 60.0,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ) -> None:
+        super().__init__(address, BotRequestHandler)
+        self.app = app if app is not None else WhatsAppBotApp()
+        self.max_body = max_body
+        self.clock = clock
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._scheduler: threading.Thread | None = None
+        if scheduler_interval is not None:
+            self._scheduler = threading.Thread(
+                target=self.app.run_scheduler_loop,
+                args=(self._stop, scheduler_interval, clock, self.lock),
+                name="scheduler",
+                daemon=True,
+            )
+            self._scheduler.start()
+
+    def server_close(self) -> None:
+        self._stop.set()
+        if self._scheduler is not None:
+            self._scheduler.join()
+        super().server_close()
+
+    # -- routes; each returns (status, payload) ------------------------------
+
+    def health(self, body: dict) -> tuple[HTTPStatus, dict]:
+        return HTTPStatus.OK, {"ok": True}
+
+    def register_contact(self, body: dict) -> tuple[HTTPStatus, dict]:
+        contact = contact_from_json(body)
+        with self.lock:
+            self.app.register_contact(contact)
+        return HTTPStatus.CREATED, {"contact": contact_to_json(contact)}
+
+    def revoke_consent(self, body: dict) -> tuple[HTTPStatus, dict]:
+        (contact_id,) = _required(body, "contactId")
+        with self.lock:
+            if self.app.store.get_contact(contact_id) is None:
+                raise RequestError(f"Unknown contact {contact_id}")
+            self.app.revoke_consent(contact_id)
+        return HTTPStatus.OK, {"ok": True}
+
+    def receive_inbound(self, body: dict) -> tuple[HTTPStatus, dict]:
+        message_id, conversation_id, contact_id = _required(body, "providerMessageId", "conversationId", "contactId")
+        received_at = parse_timestamp(body.get("receivedAt")) or self.clock()
+        content = _string(body, "content") or ""
+        with self.lock:
+            outbound = self.app.receive_inbound(message_id, conversation_id, contact_id, content, received_at)
+            conversation = self.app.store.get_conversation(conversation_id)
+            # Encode while holding the lock: the app mutates conversations in place.
+            payload = {
+                "outbound": [m.content for m in outbound],
+                "conversation": conversation_to_json(conversation) if conversation else None,
+            }
+        return HTTPStatus.OK, payload
+
+    def send_message(self, body: dict) -> tuple[HTTPStatus, dict]:
+        conversation_id, contact_id = _required(body, "conversationId", "contactId")
+        message_type = _string(body, "messageType") or MessageType.SESSION_TEXT
+        if message_type not in (MessageType.SESSION_TEXT, MessageType.TEMPLATE):
+            raise RequestError(f"invalid messageType {message_type!r}")
+        now = parse_timestamp(body.get("now")) or self.clock()
+        content = _string(body, "content") or ""
+        template_name = _string(body, "templateName")
+        with self.lock:
+            message = self.app.send_manual_message(
+                conversation_id,
+                contact_id,
+                content,
+                MessageType(message_type),
+                now=now,
+                template_name=template_name,
+            )
+        return HTTPStatus.OK, {"message": message_to_json(message)}
+
+    def run_scheduler(self, body: dict) -> tuple[HTTPStatus, dict]:
+        with self.lock:
+            sent = self.app.run_scheduler(self.clock())
+        return HTTPStatus.OK, {"sent": [message_to_json(m) for m in sent]}
+
+    def metrics_text(self) -> str | None:
+        if self.app.metrics is None:
+            return None
+        with self.lock:
+            return self.app.metrics.render_prometheus()
+
+
+ROUTES: dict[tuple[str, str], Callable[[BotServer, dict], tuple[HTTPStatus, dict]]] = {
+    ("GET", "/health"): BotServer.health,
+    ("POST", "/contacts"): BotServer.register_contact,
+    ("POST", "/contacts/revoke-consent"): BotServer.revoke_consent,
+    ("POST", "/webhooks/whatsapp/inbound"): BotServer.receive_inbound,
+    ("POST", "/messages/send"): BotServer.send_message,
+    ("POST", "/scheduler/run"): BotServer.run_scheduler,
+}
+
+
+class BotRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this Nagle + delayed ACK
+    # add ~40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+    server: BotServer
+
+    def do_GET(self) -> None:
+        if self.path == "/metrics":
+            text = self.server.metrics_text()
+            if text is not None:
+                self._send(HTTPStatus.OK, text.encode(), "text/plain; version=0.0.4")
+                return
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        route = ROUTES.get((method, self.path))
+        try:
+            body = self._read_json()
+            if route is None:
+                raise RequestError("Not found", HTTPStatus.NOT_FOUND)
+            status, payload = route(self.server, body)
+        except RequestError as exc:
+            status, payload = exc.status, {"error": str(exc)}
+        except ValueError as exc:
+            # The app reports unknown contacts and policy blocks as ValueError.
+            status, payload = HTTPStatus.BAD_REQUEST, {"error": str(exc)}
+        except Exception:
+            # Answer rather than drop the connection; the traceback goes to the log.
+            logger.exception("%s %s failed", method, self.path)
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+        self._send_json(status, payload)
+
+    def _read_json(self) -> dict:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise RequestError("invalid Content-Length") from None
+        if length > self.server.max_body:
+            # The body is left unread, so the connection cannot be reused.
+            self.close_connection = True
+            raise RequestError("Request body too large", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        if length <= 0:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise RequestError("Invalid JSON body") from None
+        if not isinstance(body, dict):
+            raise RequestError("JSON body must be an object")
+        return body
+
+    def _send_json(self, status: HTTPStatus, payload: Any) -> None:
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode(), "application/json; charset=utf-8")
+
+    def _send(self, status: HTTPStatus, data: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Per-request access logs cost more than the request; rely on metrics instead.
+        pass
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve WhatsAppBotApp over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--db", help="SQLite database file; in-memory store when omitted")
+    parser.add_argument("--max-body", type=int, default=DEFAULT_MAX_BODY)
+    parser.add_argument("--scheduler-interval", type=float, default=60.0, help="longest scheduler sleep in seconds")
+    args = parser.parse_args(argv)
+
+    app = WhatsAppBotApp()
+    if args.db:
+        from .sqlite_store import SqliteStore
+
+        app = WhatsAppBotApp(store=SqliteStore(args.db))
+    server = BotServer((args.host, args.port), app, args.max_body, args.scheduler_interval)
+    print(f"Server listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
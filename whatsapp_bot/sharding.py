@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import multiprocessing
+from datetime import datetime
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Sequence
+
+from .app import WhatsAppBotApp
+from .models import Contact, InboundMessage, OutboundMessage
+from .pipeline import shard_for
+from .store import Store
+
+# App methods a shard worker will execute on request.
+_WORKER_OPS = frozenset(
+    {
+        "register_contact",
+        "revoke_consent",
+        "receive_inbound",
+        "receive_inbound_batch",
+        "send_manual_message",
+        "run_scheduler",
+    }
+)
+
+
+def _worker_main(conn: Connection, shard: int, store_factory: Callable[[int], Store] | None) -> None:
+    app = WhatsAppBotApp(store=store_factory(shard)) if store_factory else WhatsAppBotApp()
+    while True:
+        op, args, kwargs = conn.recv()
+        if op is None:
+            close = getattr(app.store, "close", None)
+            if close:
+                close()
+            conn.send(("ok", None))
+            return
+        try:
+            if op not in _WORKER_OPS:
+                raise ValueError(f"Unsupported shard operation: {op}")
+            conn.send(("ok", getattr(app, op)(*args, **kwargs)))
+        except Exception as exc:
+            conn.send(("error", exc))
+
+
+class ShardedSupervisor:
+    """Runs one ``WhatsAppBotApp`` per worker process, partitioned by ``conversation_id``.
+
+    Each worker owns the conversations whose ``shard_for`` hash maps to it, with
+    its own engine and store shard built by ``store_factory(shard_index)``.
+    Contact registration, consent revocation and scheduler ticks fan out to every
+    shard; batched requests are sent to all shards before any reply is awaited,
+    so shards work in parallel.
+    """
+
+    def __init__(
+        self,
+        shards: int,
+        store_factory: Callable[[int], Store] | None = None,
+        mp_context: str | None = None,
+    ) -> None:
+        if shards <= 0:
+            raise ValueError("shards must be positive")
+        self.shards = shards
+        self.store_factory = store_factory
+        self._ctx = multiprocessing.get_context(mp_context)
+        self._conns: list[Connection] = []
+        self._procs: list[multiprocessing.process.BaseProcess] = []
+
+    def start(self) -> None:
+        if self._procs:
+            raise RuntimeError("supervisor already started")
+        for shard in range(self.shards):
+            parent, child = self._ctx.Pipe()
+            proc = self._ctx.Process(
+                target=_worker_main,
+                args=(child, shard, self.store_factory),
+                name=f"whatsapp-bot-shard-{shard}",
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    def close(self) -> None:
+        for conn in self._conns:
+            conn.send((None, (), {}))
+        for conn in self._conns:
+            conn.recv()
+            conn.close()
+        for proc in self._procs:
+            proc.join()
+        self._conns = []
+        self._procs = []
+
+    def __enter__(self) -> ShardedSupervisor:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def shard_for(self, conversation_id: str) -> int:
+        return shard_for(conversation_id, self.shards)
+
+    def register_contact(self, contact: Contact) -> Contact:
+        self._broadcast("register_contact", contact)
+        return contact
+
+    def revoke_consent(self, contact_id: str) -> None:
+        self._broadcast("revoke_consent", contact_id)
+
+    def run_scheduler(self, now: datetime | None = None) -> list[OutboundMessage]:
+        now = now or datetime.utcnow()
+        sent: list[OutboundMessage] = []
+        for shard_sent in self._broadcast("run_scheduler", now):
+            sent.extend(shard_sent)
+        return sent
+
+    def receive_inbound(
+        self,
+        provider_message_id: str,
+        conversation_id: str,
+        contact_id: str,
+        content: str,
+        received_at: datetime | None = None,
+    ) -> list[OutboundMessage]:
+        return self._call(
+            self.shard_for(conversation_id),
+            "receive_inbound",
+            provider_message_id,
+            conversation_id,
+            contact_id,
+            content,
+            received_at,
+        )
+
+    def receive_inbound_batch(self, messages: Sequence[InboundMessage]) -> list[list[OutboundMessage]]:
+        partitions: dict[int, list[int]] = {}
+        for index, message in enumerate(messages):
+            partitions.setdefault(self.shard_for(message.conversation_id), []).append(index)
+        for shard, indexes in partitions.items():
+            self._conns[shard].send(("receive_inbound_batch", ([messages[i] for i in indexes],), {}))
+        replies = {shard: self._conns[shard].recv() for shard in partitions}
+
+        results: list[list[OutboundMessage]] = [[] for _ in messages]
+        for shard, indexes in partitions.items():
+            for index, outbound in zip(indexes, self._unwrap(replies[shard])):
+                results[index] = outbound
+        return results
+
+    def send_manual_message(self, conversation_id: str, contact_id: str, content: str, **kwargs: Any) -> OutboundMessage:
+        return self._call(self.shard_for(conversation_id), "send_manual_message", conversation_id, contact_id, content, **kwargs)
+
+    def _call(self, shard: int, op: str, *args: Any, **kwargs: Any) -> Any:
+        conn = self._conns[shard]
+        conn.send((op, args, kwargs))
+        return self._unwrap(conn.recv())
+
+    def _broadcast(self, op: str, *args: Any) -> list[Any]:
+        for conn in self._conns:
+            conn.send((op, args, {}))
+        replies = [conn.recv() for conn in self._conns]
+        return [self._unwrap(reply) for reply in replies]
+
+    @staticmethod
+    def _unwrap(reply: tuple[str, Any]) -> Any:
+        status, value = reply
+        if status == "error":
+            raise value
+        return value
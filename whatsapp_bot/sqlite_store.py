@@ -0,0 +1,522 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Mapping
+
+from .models import (
+    EMPTY_PAYLOAD,
+    AdsRunning,
+    Contact,
+    Conversation,
+    ConversationState,
+    ConversationStatus,
+    InboundMessage,
+    LeadsBucket,
+    MessageType,
+    OutboundMessage,
+    Owner,
+    ScheduledTask,
+    TaskType,
+)
+from .rows import choice, decode_datetime, sortable_timestamp
+from .taskqueue import TaskStats
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    contact_id TEXT PRIMARY KEY,
+    whatsapp_e164 TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    timezone TEXT NOT NULL,
+    consent_granted INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    conversation_id TEXT PRIMARY KEY,
+    contact_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    status TEXT NOT NULL,
+    service_window_expires_at TEXT,
+    owner TEXT NOT NULL,
+    ads_running TEXT NOT NULL,
+    monthly_leads_bucket TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_contact_idx ON conversations (contact_id);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    contact_id TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    provider_message_id TEXT,
+    content TEXT NOT NULL,
+    received_at TEXT,
+    message_type TEXT,
+    template_name TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_conversation_idx ON messages (conversation_id, id);
+CREATE INDEX IF NOT EXISTS messages_contact_idx ON messages (contact_id, direction, id);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    task_type TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_run_at_idx ON tasks (run_at);
+CREATE TABLE IF NOT EXISTS audit_events (
+    id INTEGER PRIMARY KEY,
+    event_type TEXT NOT NULL,
+    contact_id TEXT NOT NULL,
+    details TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audit_events_created_idx ON audit_events (created_at);
+CREATE INDEX IF NOT EXISTS audit_events_contact_idx ON audit_events (contact_id, created_at);
+"""
+
+# Statements are module constants so sqlite3's per-connection statement cache
+# reuses the prepared statement for every call.
+_UPSERT_CONTACT = (
+    "INSERT OR REPLACE INTO contacts (contact_id, whatsapp_e164, first_name, timezone, consent_granted) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_CONTACT_COLUMNS = "contact_id, whatsapp_e164, first_name, timezone, consent_granted"
+_GET_CONTACT = f"SELECT {_CONTACT_COLUMNS} FROM contacts WHERE contact_id = ?"
+_GET_CONTACTS = f"SELECT {_CONTACT_COLUMNS} FROM contacts WHERE contact_id IN ({{}})"
+_REVOKE_CONSENT = "UPDATE contacts SET consent_granted = 0 WHERE contact_id = ?"
+_KNOWN_CONTACTS = "SELECT contact_id FROM contacts WHERE contact_id IN ({})"
+_CONVERSATION_COLUMNS = (
+    "conversation_id, contact_id, state, status, service_window_expires_at, owner, ads_running, monthly_leads_bucket"
+)
+_GET_CONVERSATION = f"SELECT {_CONVERSATION_COLUMNS} FROM conversations WHERE conversation_id = ?"
+_GET_CONVERSATIONS = f"SELECT {_CONVERSATION_COLUMNS} FROM conversations WHERE conversation_id IN ({{}})"
+_INSERT_CONVERSATION = f"INSERT INTO conversations ({_CONVERSATION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_UPDATE_CONVERSATION = (
+    "UPDATE conversations SET state = ?, status = ?, service_window_expires_at = ?, owner = ?, "
+    "ads_running = ?, monthly_leads_bucket = ? WHERE conversation_id = ?"
+)
+_INSERT_MESSAGE = (
+    "INSERT INTO messages (conversation_id, contact_id, direction, provider_message_id, content, "
+    "received_at, message_type, template_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_MESSAGE_COLUMNS = (
+    "id, conversation_id, contact_id, direction, provider_message_id, content, received_at, message_type, template_name"
+)
+_HISTORY_PAGE = (
+    f"SELECT {_MESSAGE_COLUMNS} FROM messages WHERE conversation_id = ? AND id < ? ORDER BY id DESC LIMIT ?"
+)
+_LAST_INBOUND = (
+    f"SELECT {_MESSAGE_COLUMNS} FROM messages WHERE contact_id = ? AND direction = 'in' ORDER BY id DESC LIMIT 1"
+)
+# Scheduling is an upsert: a conversation has at most one pending task per type, and
+# re-scheduling moves it (dropping any lease, so a worker holding the old one cannot ack it).
+_INSERT_TASK = (
+    "INSERT INTO tasks (conversation_id, task_type, run_at, payload) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (conversation_id, task_type) DO UPDATE SET "
+    "run_at = excluded.run_at, payload = excluded.payload, lease_owner = NULL, lease_expires_at = NULL"
+)
+_MAX_TASK_ID = "SELECT COALESCE(MAX(id), 0) FROM tasks"
+_COUNT_TASKS_AFTER = "SELECT COUNT(*) FROM tasks WHERE id > ?"
+# Databases created before task leases existed get the lease columns added on open.
+_TASK_LEASE_MIGRATION = (
+    "ALTER TABLE tasks ADD COLUMN lease_owner TEXT",
+    "ALTER TABLE tasks ADD COLUMN lease_expires_at TEXT",
+)
+_TASK_LEASE_INDEX = (
+    "CREATE INDEX IF NOT EXISTS tasks_lease_idx ON tasks (lease_expires_at) WHERE lease_expires_at IS NOT NULL"
+)
+# Older databases may hold several tasks per (conversation, type); keep the newest before
+# the unique key replaces the plain index.
+_TASK_KEY_MIGRATION = (
+    "DELETE FROM tasks WHERE id NOT IN (SELECT MAX(id) FROM tasks GROUP BY conversation_id, task_type)",
+    "DROP INDEX IF EXISTS tasks_conversation_idx",
+    "CREATE UNIQUE INDEX tasks_conversation_type_key ON tasks (conversation_id, task_type)",
+)
+# A task is claimable once due, unless another worker holds an unexpired lease on it.
+_CLAIMABLE = "run_at <= ? AND (lease_expires_at IS NULL OR lease_expires_at <= ?)"
+_TASK_COLUMNS = "id, conversation_id, task_type, run_at, payload"
+_SELECT_DUE_TASKS = f"SELECT {_TASK_COLUMNS} FROM tasks WHERE {_CLAIMABLE} ORDER BY run_at, id"
+_DELETE_DUE_TASKS = f"DELETE FROM tasks WHERE {_CLAIMABLE}"
+_CLAIM_DUE_TASKS = (
+    "UPDATE tasks SET lease_owner = ?, lease_expires_at = ? "
+    f"WHERE id IN (SELECT id FROM tasks WHERE {_CLAIMABLE} ORDER BY run_at, id LIMIT ?) "
+    f"RETURNING {_TASK_COLUMNS}"
+)
+_ACK_TASK = "DELETE FROM tasks WHERE id = ? AND lease_owner = ?"
+_RELEASE_TASK = (
+    "UPDATE tasks SET lease_owner = NULL, lease_expires_at = NULL, run_at = COALESCE(?, run_at) "
+    "WHERE id = ? AND lease_owner = ?"
+)
+_NEXT_TASK_AT = "SELECT MIN(run_at) FROM tasks WHERE lease_expires_at IS NULL"
+_NEXT_LEASE_EXPIRY = "SELECT MIN(lease_expires_at) FROM tasks WHERE lease_expires_at IS NOT NULL"
+_CANCEL_TASKS = "DELETE FROM tasks WHERE conversation_id = ?"
+_CANCEL_TASKS_OF_TYPE = "DELETE FROM tasks WHERE conversation_id = ? AND task_type = ?"
+_CANCEL_CONTACT_TASKS = (
+    "DELETE FROM tasks WHERE conversation_id IN (SELECT conversation_id FROM conversations WHERE contact_id = ?)"
+)
+_SIZES = """
+SELECT (SELECT COUNT(*) FROM contacts), (SELECT COUNT(*) FROM conversations), (SELECT COUNT(*) FROM messages),
+       (SELECT COUNT(*) FROM tasks), (SELECT COUNT(*) FROM audit_events)
+"""
+_INSERT_AUDIT = "INSERT INTO audit_events (event_type, contact_id, details, created_at) VALUES (?, ?, ?, ?)"
+_SELECT_AUDIT = "SELECT event_type, contact_id, details, created_at FROM audit_events"
+# Bound on host parameters per ``IN (...)`` lookup.
+_IN_CHUNK = 500
+_MAX_ROWID = 2**63 - 1
+
+
+def _audit_ts(value: datetime) -> str:
+    # Audit rows keep the ``T`` separator of the dicts they are returned as.
+    return value.isoformat(timespec="microseconds")
+
+
+def _payload_json(payload: Mapping[str, str]) -> str:
+    return json.dumps(dict(payload)) if payload else "{}"
+
+
+def _payload(value: str) -> Mapping[str, str]:
+    return json.loads(value) if value != "{}" else EMPTY_PAYLOAD
+
+
+def _message_from_row(row: tuple) -> InboundMessage | OutboundMessage:
+    if row[3] == "in":
+        return InboundMessage(row[4], row[1], row[2], row[5], decode_datetime(row[6]))
+    return OutboundMessage(row[1], row[2], row[5], choice(MessageType, row[7]), row[8])
+
+
+def _task_from_row(row: tuple) -> ScheduledTask:
+    return ScheduledTask(row[1], choice(TaskType, row[2]), decode_datetime(row[3]), _payload(row[4]), task_id=row[0])
+
+
+def _contact_row(contact: Contact) -> tuple:
+    return (contact.contact_id, contact.whatsapp_e164, contact.first_name, contact.timezone, int(contact.consent_granted))
+
+
+def _contact_from_row(row: tuple) -> Contact:
+    return Contact(row[0], row[1], row[2], row[3], bool(row[4]))
+
+
+def _conversation_row(conversation: Conversation) -> tuple:
+    return (
+        conversation.conversation_id,
+        conversation.contact_id,
+        conversation.state,
+        conversation.status,
+        sortable_timestamp(conversation.service_window_expires_at),
+        conversation.owner,
+        conversation.ads_running,
+        conversation.monthly_leads_bucket,
+    )
+
+
+def _conversation_update_row(conversation: Conversation) -> tuple:
+    return (
+        conversation.state,
+        conversation.status,
+        sortable_timestamp(conversation.service_window_expires_at),
+        conversation.owner,
+        conversation.ads_running,
+        conversation.monthly_leads_bucket,
+        conversation.conversation_id,
+    )
+
+
+def _conversation_from_row(row: tuple) -> Conversation:
+    return Conversation(
+        row[0],
+        row[1],
+        choice(ConversationState, row[2]),
+        choice(ConversationStatus, row[3]),
+        decode_datetime(row[4]),
+        choice(Owner, row[5]),
+        choice(AdsRunning, row[6]),
+        choice(LeadsBucket, row[7]),
+    )
+
+
+def _message_row(message: InboundMessage | OutboundMessage) -> tuple:
+    if isinstance(message, InboundMessage):
+        return (
+            message.conversation_id,
+            message.contact_id,
+            "in",
+            message.provider_message_id,
+            message.content,
+            sortable_timestamp(message.received_at),
+            None,
+            None,
+        )
+    return (
+        message.conversation_id,
+        message.contact_id,
+        "out",
+        None,
+        message.content,
+        None,
+        message.message_type,
+        message.template_name,
+    )
+
+
+class SqliteStore:
+    """Durable store with the same surface as ``InMemoryStore``, backed by SQLite in WAL mode."""
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._depth = 0
+        self._migrate()
+        self.task_stats = TaskStats()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _migrate(self) -> None:
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        if "lease_owner" not in columns:
+            for statement in _TASK_LEASE_MIGRATION:
+                self.conn.execute(statement)
+        self.conn.execute(_TASK_LEASE_INDEX)
+        indexes = {row[1] for row in self.conn.execute("PRAGMA index_list(tasks)")}
+        if "tasks_conversation_type_key" not in indexes:
+            with self.transaction():
+                for statement in _TASK_KEY_MIGRATION:
+                    self.conn.execute(statement)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group writes into one transaction; nested calls join the outer one."""
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        self.conn.execute("BEGIN")
+        self._depth = 1
+        try:
+            yield
+        except BaseException:
+            self._depth = 0
+            self.conn.execute("ROLLBACK")
+            raise
+        self._depth = 0
+        self.conn.execute("COMMIT")
+
+    def sizes(self) -> dict[str, int]:
+        row = self.conn.execute(_SIZES).fetchone()
+        return dict(zip(("contacts", "conversations", "messages", "pending_tasks", "audit_events"), row))
+
+    def upsert_contact(self, contact: Contact) -> Contact:
+        self.conn.execute(_UPSERT_CONTACT, _contact_row(contact))
+        return contact
+
+    def upsert_contacts(self, contacts: Iterable[Contact]) -> None:
+        with self.transaction():
+            self.conn.executemany(_UPSERT_CONTACT, map(_contact_row, contacts))
+
+    def get_contact(self, contact_id: str) -> Contact | None:
+        row = self.conn.execute(_GET_CONTACT, (contact_id,)).fetchone()
+        return _contact_from_row(row) if row else None
+
+    def get_contacts(self, contact_ids: Iterable[str]) -> dict[str, Contact]:
+        return {row[0]: _contact_from_row(row) for row in self._select_in(_GET_CONTACTS, list(contact_ids))}
+
+    def get_conversation(self, conversation_id: str) -> Conversation | None:
+        row = self.conn.execute(_GET_CONVERSATION, (conversation_id,)).fetchone()
+        return _conversation_from_row(row) if row else None
+
+    def create_or_get_conversation(self, conversation_id: str, contact_id: str) -> Conversation:
+        conversation = self.get_conversation(conversation_id)
+        if conversation:
+            return conversation
+        conversation = Conversation(conversation_id=conversation_id, contact_id=contact_id)
+        self.conn.execute(_INSERT_CONVERSATION, _conversation_row(conversation))
+        return conversation
+
+    def get_or_create_conversations(self, contact_by_conversation: dict[str, str]) -> dict[str, Conversation]:
+        found = {
+            row[0]: _conversation_from_row(row)
+            for row in self._select_in(_GET_CONVERSATIONS, list(contact_by_conversation))
+        }
+        created = [
+            Conversation(conversation_id=conversation_id, contact_id=contact_id)
+            for conversation_id, contact_id in contact_by_conversation.items()
+            if conversation_id not in found
+        ]
+        if created:
+            with self.transaction():
+                self.conn.executemany(_INSERT_CONVERSATION, [_conversation_row(c) for c in created])
+            found.update((c.conversation_id, c) for c in created)
+        return found
+
+    def save_conversation(self, conversation: Conversation) -> None:
+        self.conn.execute(_UPDATE_CONVERSATION, _conversation_update_row(conversation))
+
+    def save_conversations(self, conversations: Iterable[Conversation]) -> None:
+        with self.transaction():
+            self.conn.executemany(_UPDATE_CONVERSATION, [_conversation_update_row(c) for c in conversations])
+
+    def save_message(self, message: InboundMessage | OutboundMessage) -> None:
+        self.conn.execute(_INSERT_MESSAGE, _message_row(message))
+
+    def save_messages(self, messages: Iterable[InboundMessage | OutboundMessage]) -> None:
+        with self.transaction():
+            self.conn.executemany(_INSERT_MESSAGE, [_message_row(m) for m in messages])
+
+    def conversation_history(
+        self, conversation_id: str, cursor: int | None = None, limit: int = 50
+    ) -> tuple[list[InboundMessage | OutboundMessage], int | None]:
+        """Page backwards through a conversation; cursors are message row ids."""
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        before = cursor if cursor is not None else _MAX_ROWID
+        rows = self.conn.execute(_HISTORY_PAGE, (conversation_id, before, limit + 1)).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        rows.reverse()
+        return [_message_from_row(row) for row in rows], (rows[0][0] if more else None)
+
+    def last_messages(self, conversation_id: str, n: int) -> list[InboundMessage | OutboundMessage]:
+        return self.conversation_history(conversation_id, limit=n)[0]
+
+    def last_inbound(self, contact_id: str) -> InboundMessage | None:
+        row = self.conn.execute(_LAST_INBOUND, (contact_id,)).fetchone()
+        return _message_from_row(row) if row else None
+
+    def _select_in(self, sql: str, keys: list[str]) -> list[tuple]:
+        rows: list[tuple] = []
+        for start in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[start : start + _IN_CHUNK]
+            rows.extend(self.conn.execute(sql.format(",".join("?" * len(chunk))), chunk))
+        return rows
+
+    def schedule_tasks(self, tasks: list[ScheduledTask]) -> None:
+        if not tasks:
+            return
+        with self.transaction():
+            # Upserts keep the row id, so rows above the previous maximum are the new ones.
+            (last_id,) = self.conn.execute(_MAX_TASK_ID).fetchone()
+            self.conn.executemany(
+                _INSERT_TASK,
+                [
+                    (t.conversation_id, t.task_type, sortable_timestamp(t.run_at), _payload_json(t.payload))
+                    for t in tasks
+                ],
+            )
+            (inserted,) = self.conn.execute(_COUNT_TASKS_AFTER, (last_id,)).fetchone()
+        self.task_stats.scheduled += len(tasks)
+        self.task_stats.duplicates_collapsed += len(tasks) - inserted
+
+    def due_tasks(self, now: datetime) -> list[ScheduledTask]:
+        cutoff = sortable_timestamp(now)
+        with self.transaction():
+            rows = self.conn.execute(_SELECT_DUE_TASKS, (cutoff, cutoff)).fetchall()
+            if rows:
+                self.conn.execute(_DELETE_DUE_TASKS, (cutoff, cutoff))
+        self.task_stats.popped += len(rows)
+        return [_task_from_row(row) for row in rows]
+
+    def claim_due_tasks(
+        self, worker_id: str, now: datetime, limit: int = 100, lease_seconds: float = 60.0
+    ) -> list[ScheduledTask]:
+        """Lease up to ``limit`` due tasks to ``worker_id`` without removing them.
+
+        Claimed tasks stay invisible to other workers until ``ack_task`` deletes
+        them, ``release_task`` hands them back, or the lease runs out, after which
+        any worker may claim them again. The claim is a single UPDATE, so
+        concurrent workers on the same database never receive the same task.
+        """
+        cutoff = sortable_timestamp(now)
+        expires = sortable_timestamp(now + timedelta(seconds=lease_seconds))
+        rows = self.conn.execute(_CLAIM_DUE_TASKS, (worker_id, expires, cutoff, cutoff, limit)).fetchall()
+        rows.sort(key=lambda row: (row[3], row[0]))
+        return [_task_from_row(row) for row in rows]
+
+    def ack_task(self, task_id: int, worker_id: str) -> bool:
+        """Delete a task this worker still holds the lease on; False if the lease was lost."""
+        done = self.conn.execute(_ACK_TASK, (task_id, worker_id)).rowcount == 1
+        self.task_stats.popped += int(done)
+        return done
+
+    def release_task(self, task_id: int, worker_id: str, run_at: datetime | None = None) -> bool:
+        """Drop this worker's lease, optionally moving the task to ``run_at``."""
+        # sortable_timestamp passes None through: no run_at keeps the task's time.
+        params = (sortable_timestamp(run_at), task_id, worker_id)
+        return self.conn.execute(_RELEASE_TASK, params).rowcount == 1
+
+    def next_task_at(self) -> datetime | None:
+        pending, expiry = (self.conn.execute(sql).fetchone()[0] for sql in (_NEXT_TASK_AT, _NEXT_LEASE_EXPIRY))
+        return decode_datetime(min(filter(None, (pending, expiry)), default=None))
+
+    def cancel_tasks(self, conversation_id: str, task_type: str | None = None) -> int:
+        if task_type is None:
+            cancelled = self.conn.execute(_CANCEL_TASKS, (conversation_id,)).rowcount
+        else:
+            cancelled = self.conn.execute(_CANCEL_TASKS_OF_TYPE, (conversation_id, task_type)).rowcount
+        self.task_stats.cancelled += cancelled
+        return cancelled
+
+    def cancel_contact_tasks(self, contact_id: str) -> int:
+        cancelled = self.conn.execute(_CANCEL_CONTACT_TASKS, (contact_id,)).rowcount
+        self.task_stats.cancelled += cancelled
+        return cancelled
+
+    def record_audit(self, event_type: str, contact_id: str, details: dict | None = None) -> None:
+        self.conn.execute(
+            _INSERT_AUDIT,
+            (event_type, contact_id, json.dumps(details or {}), _audit_ts(datetime.utcnow())),
+        )
+
+    def record_audits(self, events: Iterable[tuple[str, str, dict | None]]) -> None:
+        created_at = _audit_ts(datetime.utcnow())
+        with self.transaction():
+            self.conn.executemany(
+                _INSERT_AUDIT,
+                [
+                    (event_type, contact_id, json.dumps(details or {}), created_at)
+                    for event_type, contact_id, details in events
+                ],
+            )
+
+    def query_audit(
+        self, start: datetime | None = None, end: datetime | None = None, contact_id: str | None = None
+    ) -> Iterator[dict]:
+        """Audit events with ``start <= created_at < end`` (naive UTC), optionally for one contact."""
+        clauses, params = [], []
+        if contact_id is not None:
+            clauses.append("contact_id = ?")
+            params.append(contact_id)
+        if start is not None:
+            clauses.append("created_at >= ?")
+            params.append(_audit_ts(start))
+        if end is not None:
+            clauses.append("created_at < ?")
+            params.append(_audit_ts(end))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        for event_type, contact, details, created_at in self.conn.execute(f"{_SELECT_AUDIT}{where} ORDER BY id", params):
+            yield {"event_type": event_type, "contact_id": contact, "details": json.loads(details), "created_at": created_at}
+
+    def revoke_consent(self, contact_id: str) -> None:
+        with self.transaction():
+            if self.conn.execute(_REVOKE_CONSENT, (contact_id,)).rowcount:
+                self.cancel_contact_tasks(contact_id)
+                self.record_audit("consent_revoked", contact_id)
+
+    def revoke_consents(self, contact_ids: Iterable[str]) -> int:
+        """Revoke consent for every known contact in ``contact_ids``; returns how many were known."""
+        known = [(row[0],) for row in self._select_in(_KNOWN_CONTACTS, list(dict.fromkeys(contact_ids)))]
+        if not known:
+            return 0
+        with self.transaction():
+            self.conn.executemany(_REVOKE_CONSENT, known)
+            self.task_stats.cancelled += self.conn.executemany(_CANCEL_CONTACT_TASKS, known).rowcount
+            self.record_audits(("consent_revoked", contact_id, None) for (contact_id,) in known)
+        return len(known)
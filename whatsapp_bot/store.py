@@ -1,55 +1,230 @@
 from __future__ import annotations
 
+from contextlib import nullcontext
 from dataclasses import replace
 from datetime import datetime
+from typing import ContextManager, Iterable, Iterator, Protocol
 
+from .audit import AuditLog
 from .models import Contact, Conversation, InboundMessage, OutboundMessage, ScheduledTask
+from .taskqueue import TaskQueue, TaskStats
+
+
+class Store(Protocol):
+    """Storage surface used by ``WhatsAppBotApp``."""
+
+    @property
+    def task_stats(self) -> TaskStats: ...
+
+    def upsert_contact(self, contact: Contact) -> Contact: ...
+
+    def upsert_contacts(self, contacts: Iterable[Contact]) -> None: ...
+
+    def get_contact(self, contact_id: str) -> Contact | None: ...
+
+    def get_contacts(self, contact_ids: Iterable[str]) -> dict[str, Contact]: ...
+
+    def get_conversation(self, conversation_id: str) -> Conversation | None: ...
+
+    def create_or_get_conversation(self, conversation_id: str, contact_id: str) -> Conversation: ...
+
+    def get_or_create_conversations(self, contact_by_conversation: dict[str, str]) -> dict[str, Conversation]: ...
+
+    def save_conversation(self, conversation: Conversation) -> None: ...
+
+    def save_conversations(self, conversations: Iterable[Conversation]) -> None: ...
+
+    def save_message(self, message: InboundMessage | OutboundMessage) -> None: ...
+
+    def save_messages(self, messages: Iterable[InboundMessage | OutboundMessage]) -> None: ...
+
+    def conversation_history(
+        self, conversation_id: str, cursor: int | None = None, limit: int = 50
+    ) -> tuple[list[InboundMessage | OutboundMessage], int | None]: ...
+
+    def last_inbound(self, contact_id: str) -> InboundMessage | None: ...
+
+    def schedule_tasks(self, tasks: list[ScheduledTask]) -> None: ...
+
+    def due_tasks(self, now: datetime) -> list[ScheduledTask]: ...
+
+    def next_task_at(self) -> datetime | None: ...
+
+    def cancel_tasks(self, conversation_id: str, task_type: str | None = None) -> int: ...
+
+    def cancel_contact_tasks(self, contact_id: str) -> int: ...
+
+    def record_audit(self, event_type: str, contact_id: str, details: dict | None = None) -> None: ...
+
+    def record_audits(self, events: Iterable[tuple[str, str, dict | None]]) -> None: ...
+
+    def query_audit(
+        self, start: datetime | None = None, end: datetime | None = None, contact_id: str | None = None
+    ) -> Iterator[dict]: ...
+
+    def revoke_consent(self, contact_id: str) -> None: ...
+
+    def revoke_consents(self, contact_ids: Iterable[str]) -> int: ...
+
+    def transaction(self) -> ContextManager[None]: ...
+
+    def sizes(self) -> dict[str, int]: ...
 
 
 class InMemoryStore:
     def __init__(self) -> None:
         self.contacts: dict[str, Contact] = {}
         self.conversations: dict[str, Conversation] = {}
+        self.conversations_by_contact: dict[str, set[str]] = {}
         self.messages: list[InboundMessage | OutboundMessage] = []
-        self.tasks: list[ScheduledTask] = []
-        self.audit_events: list[dict] = []
+        # Offsets into ``messages``; the index never copies message objects.
+        self.message_index: dict[str, list[int]] = {}
+        self.last_inbound_index: dict[str, int] = {}
+        self.tasks = TaskQueue()
+        self.audit = AuditLog()
 
     def upsert_contact(self, contact: Contact) -> Contact:
         self.contacts[contact.contact_id] = contact
         return contact
 
+    def upsert_contacts(self, contacts: Iterable[Contact]) -> None:
+        self.contacts.update((contact.contact_id, contact) for contact in contacts)
+
     def get_contact(self, contact_id: str) -> Contact | None:
         return self.contacts.get(contact_id)
 
+    def get_contacts(self, contact_ids: Iterable[str]) -> dict[str, Contact]:
+        contacts = self.contacts
+        return {cid: contacts[cid] for cid in contact_ids if cid in contacts}
+
+    def get_conversation(self, conversation_id: str) -> Conversation | None:
+        return self.conversations.get(conversation_id)
+
     def create_or_get_conversation(self, conversation_id: str, contact_id: str) -> Conversation:
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = Conversation(conversation_id=conversation_id, contact_id=contact_id)
-        return self.conversations[conversation_id]
+        conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            conversation = Conversation(conversation_id=conversation_id, contact_id=contact_id)
+            self.conversations[conversation_id] = conversation
+            self.conversations_by_contact.setdefault(contact_id, set()).add(conversation_id)
+        return conversation
+
+    def get_or_create_conversations(self, contact_by_conversation: dict[str, str]) -> dict[str, Conversation]:
+        return {
+            conversation_id: self.create_or_get_conversation(conversation_id, contact_id)
+            for conversation_id, contact_id in contact_by_conversation.items()
+        }
+
+    def save_conversation(self, conversation: Conversation) -> None:
+        self.conversations[conversation.conversation_id] = conversation
+
+    def save_conversations(self, conversations: Iterable[Conversation]) -> None:
+        for conversation in conversations:
+            self.conversations[conversation.conversation_id] = conversation
 
     def save_message(self, message: InboundMessage | OutboundMessage) -> None:
+        offset = len(self.messages)
         self.messages.append(message)
+        self.message_index.setdefault(message.conversation_id, []).append(offset)
+        if isinstance(message, InboundMessage):
+            self.last_inbound_index[message.contact_id] = offset
+
+    def save_messages(self, messages: Iterable[InboundMessage | OutboundMessage]) -> None:
+        for message in messages:
+            self.save_message(message)
+
+    def conversation_history(
+        self, conversation_id: str, cursor: int | None = None, limit: int = 50
+    ) -> tuple[list[InboundMessage | OutboundMessage], int | None]:
+        """Page backwards through a conversation, oldest first within the page.
+
+        Pass the returned cursor to fetch the next older page; None means the
+        start of the conversation was reached.
+        """
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        offsets = self.message_index.get(conversation_id, [])
+        end = len(offsets) if cursor is None else min(cursor, len(offsets))
+        start = max(0, end - limit)
+        messages = self.messages
+        return [messages[i] for i in offsets[start:end]], (start or None)
+
+    def last_messages(self, conversation_id: str, n: int) -> list[InboundMessage | OutboundMessage]:
+        return self.conversation_history(conversation_id, limit=n)[0]
+
+    def last_inbound(self, contact_id: str) -> InboundMessage | None:
+        offset = self.last_inbound_index.get(contact_id)
+        return self.messages[offset] if offset is not None else None
 
     def schedule_tasks(self, tasks: list[ScheduledTask]) -> None:
-        self.tasks.extend(tasks)
+        self.tasks.push_many(tasks)
 
     def due_tasks(self, now: datetime) -> list[ScheduledTask]:
-        due = [t for t in self.tasks if t.run_at <= now]
-        self.tasks = [t for t in self.tasks if t.run_at > now]
-        return due
+        return self.tasks.pop_due(now)
+
+    @property
+    def task_stats(self) -> TaskStats:
+        return self.tasks.stats
+
+    def next_task_at(self) -> datetime | None:
+        return self.tasks.next_run_at()
+
+    def cancel_tasks(self, conversation_id: str, task_type: str | None = None) -> int:
+        return self.tasks.cancel(conversation_id, task_type)
+
+    def cancel_contact_tasks(self, contact_id: str) -> int:
+        cancel = self.tasks.cancel
+        return sum(cancel(conversation_id) for conversation_id in self.conversations_by_contact.get(contact_id, ()))
+
+    @property
+    def audit_events(self) -> AuditLog:
+        """Read-only sequence of audit event dicts, oldest first."""
+        return self.audit
 
     def record_audit(self, event_type: str, contact_id: str, details: dict | None = None) -> None:
-        self.audit_events.append(
-            {
-                "event_type": event_type,
-                "contact_id": contact_id,
-                "details": details or {},
-                "created_at": datetime.utcnow().isoformat(),
-            }
-        )
+        self.audit.append(event_type, contact_id, details)
+
+    def record_audits(self, events: Iterable[tuple[str, str, dict | None]]) -> None:
+        append = self.audit.append
+        for event_type, contact_id, details in events:
+            append(event_type, contact_id, details)
+
+    def query_audit(
+        self, start: datetime | None = None, end: datetime | None = None, contact_id: str | None = None
+    ) -> Iterator[dict]:
+        """Audit events with ``start <= created_at < end`` (naive UTC), optionally for one contact."""
+        return self.audit.query(start, end, contact_id)
+
+    def transaction(self) -> ContextManager[None]:
+        return nullcontext()
+
+    def sizes(self) -> dict[str, int]:
+        """Row counts per collection, for metrics and capacity planning."""
+        return {
+            "contacts": len(self.contacts),
+            "conversations": len(self.conversations),
+            "messages": len(self.messages),
+            "pending_tasks": len(self.tasks),
+            "audit_events": len(self.audit),
+        }
 
     def revoke_consent(self, contact_id: str) -> None:
+        if self._revoke(contact_id):
+            self.record_audit("consent_revoked", contact_id)
+
+    def _revoke(self, contact_id: str) -> bool:
         contact = self.contacts.get(contact_id)
         if not contact:
-            return
+            return False
         self.contacts[contact_id] = replace(contact, consent_granted=False)
-        self.record_audit("consent_revoked", contact_id)
+        self.cancel_contact_tasks(contact_id)
+        return True
+
+    def revoke_consents(self, contact_ids: Iterable[str]) -> int:
+        """Revoke consent for every known contact in ``contact_ids``; returns how many were known."""
+        revoked = 0
+        with self.transaction():
+            for contact_id in dict.fromkeys(contact_ids):
+                if contact_id in self.contacts:
+                    self.revoke_consent(contact_id)
+                    revoked += 1
+        return revoked
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from .models import ScheduledTask
+
+# Heap entries are mutable lists ``[run_at, seq, task]``. Cancelling a task
+# clears the task slot in place instead of re-heapifying; dead entries are
+# skipped when they reach the top of the heap.
+_RUN_AT, _SEQ, _TASK = 0, 1, 2
+
+
+@dataclass
+class TaskStats:
+    scheduled: int = 0
+    # Tasks taken off the queue as due; a deferred task is popped again later.
+    popped: int = 0
+    # Due tasks that produced a message, counted by the app rather than the store.
+    executed: int = 0
+    cancelled: int = 0
+    # Schedules that replaced a pending task of the same conversation and type.
+    duplicates_collapsed: int = 0
+
+
+class TaskQueue:
+    """Time-ordered index of pending scheduled tasks keyed on ``run_at``.
+
+    At most one task per ``(conversation_id, task_type)`` is pending: pushing
+    another one replaces it, which makes re-scheduling idempotent.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[list] = []
+        self._by_conversation: dict[str, dict[str, list]] = {}
+        self._seq = itertools.count()
+        self._live = 0
+        self.stats = TaskStats()
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __bool__(self) -> bool:
+        return self._live > 0
+
+    def __iter__(self) -> Iterator[ScheduledTask]:
+        for entry in self._heap:
+            if entry[_TASK] is not None:
+                yield entry[_TASK]
+
+    def push(self, task: ScheduledTask) -> None:
+        entry = [task.run_at, next(self._seq), task]
+        heapq.heappush(self._heap, entry)
+        self._index(task, entry)
+        self.stats.scheduled += 1
+        # Rescheduling tombstones the old entry, which may be the head.
+        self._prune_head()
+
+    def push_many(self, tasks: Iterable[ScheduledTask]) -> None:
+        tasks = list(tasks)
+        if len(tasks) * 16 < len(self._heap):
+            for task in tasks:
+                self.push(task)
+            return
+        # Bulk loads: appending and re-heapifying once beats one sift per task.
+        seq = self._seq
+        for task in tasks:
+            entry = [task.run_at, next(seq), task]
+            self._heap.append(entry)
+            self._index(task, entry)
+        heapq.heapify(self._heap)
+        self.stats.scheduled += len(tasks)
+        self._prune_head()
+
+    def _index(self, task: ScheduledTask, entry: list) -> None:
+        by_type = self._by_conversation.get(task.conversation_id)
+        if by_type is None:
+            by_type = self._by_conversation[task.conversation_id] = {}
+        previous = by_type.get(task.task_type)
+        by_type[task.task_type] = entry
+        if previous is None:
+            self._live += 1
+        else:
+            previous[_TASK] = None
+            self.stats.duplicates_collapsed += 1
+
+    def next_run_at(self) -> datetime | None:
+        return self._heap[0][_RUN_AT] if self._heap else None
+
+    def pop_due(self, now: datetime) -> list[ScheduledTask]:
+        heap = self._heap
+        due: list[ScheduledTask] = []
+        while heap and heap[0][_RUN_AT] <= now:
+            entry = heapq.heappop(heap)
+            task = entry[_TASK]
+            if task is None:
+                continue
+            self._unindex(task)
+            self._live -= 1
+            due.append(task)
+        self.stats.popped += len(due)
+        self._prune_head()
+        if due:
+            self._maybe_compact()
+        return due
+
+    def pending_for(self, conversation_id: str) -> list[ScheduledTask]:
+        return [entry[_TASK] for entry in self._by_conversation.get(conversation_id, {}).values()]
+
+    def has_pending(self, conversation_id: str) -> bool:
+        return conversation_id in self._by_conversation
+
+    def cancel(self, conversation_id: str, task_type: str | None = None) -> int:
+        by_type = self._by_conversation.get(conversation_id)
+        if not by_type:
+            return 0
+        if task_type is None:
+            cancelled = list(by_type.values())
+            del self._by_conversation[conversation_id]
+        else:
+            entry = by_type.pop(task_type, None)
+            if entry is None:
+                return 0
+            cancelled = [entry]
+            if not by_type:
+                del self._by_conversation[conversation_id]
+        for entry in cancelled:
+            entry[_TASK] = None
+        self._live -= len(cancelled)
+        self.stats.cancelled += len(cancelled)
+        self._prune_head()
+        self._maybe_compact()
+        return len(cancelled)
+
+    def _unindex(self, task: ScheduledTask) -> None:
+        by_type = self._by_conversation[task.conversation_id]
+        del by_type[task.task_type]
+        if not by_type:
+            del self._by_conversation[task.conversation_id]
+
+    def _prune_head(self) -> None:
+        # Keeps the heap head live so next_run_at() stays O(1).
+        heap = self._heap
+        while heap and heap[0][_TASK] is None:
+            heapq.heappop(heap)
+
+    def _maybe_compact(self) -> None:
+        if len(self._heap) > 2 * self._live + 64:
+            self._heap = [e for e in self._heap if e[_TASK] is not None]
+            heapq.heapify(self._heap)
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Iterable, Mapping
 
 
 @dataclass(frozen=True)
@@ -41,8 +44,100 @@ TEMPLATES: dict[str, TemplateDefinition] = {
 }
 
 
-def render_template(name: str, **variables: str) -> str:
-    template = TEMPLATES.get(name)
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Template pre-split into ``(literal, placeholder)`` segments.
+
+    Templates without placeholders keep their text in ``constant`` and every
+    render returns that same string object.
+    """
+
+    name: str
+    segments: tuple[tuple[str, str | None], ...]
+    placeholders: frozenset[str]
+    fields: tuple[str, ...]
+    constant: str | None = field(default=None, compare=False)
+
+    def render(self, variables: Mapping[str, object]) -> str:
+        if self.constant is not None:
+            return self.constant
+        missing = self.placeholders.difference(variables)
+        if missing:
+            raise ValueError(f"Missing variables for template {self.name}: {', '.join(sorted(missing))}")
+        parts: list[str] = []
+        for literal, placeholder in self.segments:
+            parts.append(literal)
+            if placeholder is not None:
+                parts.append(str(variables[placeholder]))
+        return "".join(parts)
+
+
+def compile_template(definition: TemplateDefinition) -> CompiledTemplate:
+    segments: list[tuple[str, str | None]] = []
+    for literal, placeholder, spec, conversion in Formatter().parse(definition.content):
+        if placeholder is not None and (spec or conversion or not placeholder.isidentifier()):
+            raise ValueError(f"Unsupported placeholder {{{placeholder}}} in template {definition.name}")
+        # Formatter.parse already folds "{{" / "}}" escapes into the literal text.
+        segments.append((literal, placeholder))
+    placeholders = frozenset(p for _, p in segments if p is not None)
+    constant = "".join(literal for literal, _ in segments) if not placeholders else None
+    return CompiledTemplate(definition.name, tuple(segments), placeholders, tuple(sorted(placeholders)), constant)
+
+
+COMPILED_TEMPLATES: dict[str, CompiledTemplate] = {name: compile_template(t) for name, t in TEMPLATES.items()}
+
+
+def get_template(name: str) -> CompiledTemplate:
+    template = COMPILED_TEMPLATES.get(name)
     if not template:
         raise ValueError(f"Unknown template: {name}")
-    return template.content.format(**variables)
+    return template
+
+
+def render_template(name: str, **variables: str) -> str:
+    return get_template(name).render(variables)
+
+
+def render_many(name: str, variables: Iterable[Mapping[str, object]]) -> list[str]:
+    """Render one template for many variable sets, e.g. a whole scheduler batch."""
+    template = get_template(name)
+    if template.constant is not None:
+        return [template.constant for _ in variables]
+    render = template.render
+    return [render(v) for v in variables]
+
+
+class RenderCache:
+    """Bounded LRU of rendered text keyed by template name and the values it uses."""
+
+    def __init__(self, maxsize: int = 10_000) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, str] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def render(self, name: str, variables: Mapping[str, object]) -> str:
+        template = get_template(name)
+        if template.constant is not None:
+            return template.constant
+        try:
+            key = (name, *(variables[p] for p in template.fields))
+        except KeyError:
+            return template.render(variables)  # raises the missing-variable error
+        entries = self._entries
+        text = entries.get(key)
+        if text is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return text
+        self.misses += 1
+        text = template.render(variables)
+        entries[key] = text
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return text
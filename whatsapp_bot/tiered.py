@@ -0,0 +1,249 @@
+"""Two-tier conversation store: recent conversations in RAM, idle ones compressed on disk.
+
+``TieredStore`` keeps the ``InMemoryStore`` API and moves conversations that
+can no longer produce work to a SQLite cold tier, so RAM holds the active
+funnel rather than the whole history.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+import zlib
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+from .models import (
+    SERVICE_WINDOW,
+    Conversation,
+    ConversationState,
+    InboundMessage,
+    OutboundMessage,
+    Owner,
+    ScheduledTask,
+)
+from .rows import conversation_from_row, conversation_row, encode, message_from_row, message_row
+from .store import InMemoryStore
+
+COLD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cold_conversations (
+    conversation_id TEXT PRIMARY KEY,
+    contact_id TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cold_conversations_contact_idx ON cold_conversations (contact_id);
+"""
+_INSERT_COLD = "INSERT OR REPLACE INTO cold_conversations (conversation_id, contact_id, data) VALUES (?, ?, ?)"
+_SELECT_COLD = "SELECT data FROM cold_conversations WHERE conversation_id = ?"
+_SELECT_COLD_FOR_CONTACT = "SELECT data FROM cold_conversations WHERE contact_id = ?"
+_DELETE_COLD = "DELETE FROM cold_conversations WHERE conversation_id = ?"
+_COUNT_COLD = "SELECT COUNT(*) FROM cold_conversations"
+
+
+def _pack(conversation: Conversation, messages: list[InboundMessage | OutboundMessage]) -> bytes:
+    record = {"conversation": conversation_row(conversation), "messages": [message_row(m) for m in messages]}
+    return zlib.compress(encode(record).encode("utf-8"))
+
+
+def _unpack(data: bytes) -> tuple[Conversation, list[InboundMessage | OutboundMessage]]:
+    record = json.loads(zlib.decompress(data))
+    return conversation_from_row(record["conversation"]), [message_from_row(row) for row in record["messages"]]
+
+
+class TieredStore(InMemoryStore):
+    """``InMemoryStore`` that moves idle and settled conversations to a compressed cold tier.
+
+    A conversation is evicted with its message history once it has no pending
+    tasks and has been quiet for ``max_idle``. Settled conversations (closed,
+    or handed to a human) go after ``settled_idle``. Idle time counts from the
+    last inbound message. ``max_resident`` additionally caps the number of
+    conversations kept in RAM, evicting the least recently active first.
+    Eviction runs at most every ``evict_interval`` on scheduler ticks
+    (``due_tasks``), or on demand through ``evict``. Reads and writes that
+    touch an evicted conversation load it back first, so callers never see
+    the tiers.
+
+    The cold tier is a SQLite file of zlib-compressed ``rows`` layouts, the
+    format the event log uses. It extends memory, not durability: it is cleared on open,
+    like the rest of an ``InMemoryStore``.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        max_idle: timedelta | None = timedelta(days=7),
+        settled_idle: timedelta | None = timedelta(hours=1),
+        max_resident: int | None = None,
+        evict_interval: timedelta = timedelta(minutes=5),
+    ) -> None:
+        super().__init__()
+        self._tmp = None
+        if path is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix="whatsapp-bot-cold-")
+            path = os.path.join(self._tmp.name, "cold.db")
+        self.path = path
+        self.max_idle = max_idle
+        self.settled_idle = settled_idle
+        self.max_resident = max_resident
+        self.evict_interval = evict_interval
+        self.evicted = 0
+        self.rehydrated = 0
+        self._next_eviction: datetime | None = None
+        self.cold = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.cold.execute("PRAGMA journal_mode=WAL")
+        self.cold.execute("PRAGMA synchronous=OFF")
+        self.cold.executescript(COLD_SCHEMA)
+        self.cold.execute("DELETE FROM cold_conversations")
+
+    def close(self) -> None:
+        self.cold.close()
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+    # -- rehydration --------------------------------------------------------
+
+    def _rehydrate(self, conversation_id: str) -> Conversation | None:
+        row = self.cold.execute(_SELECT_COLD, (conversation_id,)).fetchone()
+        if row is None:
+            return None
+        conversation, messages = _unpack(row[0])
+        self.cold.execute(_DELETE_COLD, (conversation_id,))
+        self.conversations[conversation_id] = conversation
+        self.conversations_by_contact.setdefault(conversation.contact_id, set()).add(conversation_id)
+        contact_id = conversation.contact_id
+        previous = self.last_inbound_index.get(contact_id)
+        for message in messages:
+            InMemoryStore.save_message(self, message)
+        # Another resident conversation of the contact may hold a newer inbound message.
+        if previous is not None:
+            current = self.last_inbound_index[contact_id]
+            if self.messages[previous].received_at > self.messages[current].received_at:
+                self.last_inbound_index[contact_id] = previous
+        self.rehydrated += 1
+        return conversation
+
+    def get_conversation(self, conversation_id: str) -> Conversation | None:
+        conversation = self.conversations.get(conversation_id)
+        return conversation if conversation is not None else self._rehydrate(conversation_id)
+
+    def create_or_get_conversation(self, conversation_id: str, contact_id: str) -> Conversation:
+        if conversation_id not in self.conversations:
+            self._rehydrate(conversation_id)
+        return super().create_or_get_conversation(conversation_id, contact_id)
+
+    def save_conversation(self, conversation: Conversation) -> None:
+        if conversation.conversation_id not in self.conversations:
+            self._rehydrate(conversation.conversation_id)
+        super().save_conversation(conversation)
+
+    def save_conversations(self, conversations: Iterable[Conversation]) -> None:
+        for conversation in conversations:
+            self.save_conversation(conversation)
+
+    def save_message(self, message: InboundMessage | OutboundMessage) -> None:
+        if message.conversation_id not in self.conversations:
+            self._rehydrate(message.conversation_id)
+        super().save_message(message)
+
+    def conversation_history(
+        self, conversation_id: str, cursor: int | None = None, limit: int = 50
+    ) -> tuple[list[InboundMessage | OutboundMessage], int | None]:
+        if conversation_id not in self.conversations:
+            self._rehydrate(conversation_id)
+        return super().conversation_history(conversation_id, cursor, limit)
+
+    def last_inbound(self, contact_id: str) -> InboundMessage | None:
+        resident = super().last_inbound(contact_id)
+        if resident is not None:
+            return resident
+        # Read the cold tier without promoting: a lookup is not activity.
+        latest: InboundMessage | None = None
+        for (data,) in self.cold.execute(_SELECT_COLD_FOR_CONTACT, (contact_id,)):
+            for message in _unpack(data)[1]:
+                if not isinstance(message, InboundMessage):
+                    continue
+                if latest is None or message.received_at >= latest.received_at:
+                    latest = message
+        return latest
+
+    # -- eviction -------------------------------------------------------------
+
+    def due_tasks(self, now: datetime) -> list[ScheduledTask]:
+        # Evict before popping: conversations with due tasks still count as busy.
+        if self._next_eviction is None or now >= self._next_eviction:
+            self.evict(now)
+        return super().due_tasks(now)
+
+    def evict(self, now: datetime) -> int:
+        """Move evictable conversations to the cold tier; returns how many moved."""
+        self._next_eviction = now + self.evict_interval
+        idle: list[tuple[datetime, str]] = []
+        chosen: list[str] = []
+        pending = self.tasks.has_pending
+        for conversation_id, conversation in self.conversations.items():
+            if pending(conversation_id):
+                continue
+            expires = conversation.service_window_expires_at
+            last_active = expires - SERVICE_WINDOW if expires is not None else datetime.min
+            limit = self.settled_idle if self._settled(conversation) else self.max_idle
+            if limit is not None and now - last_active >= limit:
+                chosen.append(conversation_id)
+            else:
+                idle.append((last_active, conversation_id))
+        if self.max_resident is not None:
+            excess = len(self.conversations) - len(chosen) - self.max_resident
+            if excess > 0:
+                idle.sort()
+                chosen.extend(conversation_id for _, conversation_id in idle[:excess])
+        if chosen:
+            self._move_to_cold(chosen)
+        return len(chosen)
+
+    @staticmethod
+    def _settled(conversation: Conversation) -> bool:
+        # BotEngine.is_settled, without tying the store to an engine.
+        return conversation.state == ConversationState.CLOSED or conversation.owner == Owner.HUMAN
+
+    def _move_to_cold(self, conversation_ids: list[str]) -> None:
+        messages = self.messages
+        rows = []
+        for conversation_id in conversation_ids:
+            conversation = self.conversations.pop(conversation_id)
+            offsets = self.message_index.pop(conversation_id, [])
+            rows.append((conversation_id, conversation.contact_id, _pack(conversation, [messages[i] for i in offsets])))
+            by_contact = self.conversations_by_contact.get(conversation.contact_id)
+            if by_contact is not None:
+                by_contact.discard(conversation_id)
+                if not by_contact:
+                    del self.conversations_by_contact[conversation.contact_id]
+        self.cold.execute("BEGIN")
+        self.cold.executemany(_INSERT_COLD, rows)
+        self.cold.execute("COMMIT")
+        self.evicted += len(rows)
+        self._compact_messages()
+
+    def _compact_messages(self) -> None:
+        """Drop messages of evicted conversations and renumber the offset indexes."""
+        resident = self.conversations
+        kept: list[InboundMessage | OutboundMessage] = []
+        remap: dict[int, int] = {}
+        for offset, message in enumerate(self.messages):
+            if message.conversation_id in resident:
+                remap[offset] = len(kept)
+                kept.append(message)
+        self.messages = kept
+        for offsets in self.message_index.values():
+            offsets[:] = [remap[i] for i in offsets]
+        self.last_inbound_index = {
+            contact_id: remap[offset] for contact_id, offset in self.last_inbound_index.items() if offset in remap
+        }
+
+    def sizes(self) -> dict[str, int]:
+        sizes = super().sizes()
+        sizes["cold_conversations"] = self.cold.execute(_COUNT_COLD).fetchone()[0]
+        return sizes
+
+    def cold_conversation_ids(self) -> Iterator[str]:
+        for (conversation_id,) in self.cold.execute("SELECT conversation_id FROM cold_conversations"):
+            yield conversation_id